@@ -0,0 +1,162 @@
+import os
+from dotenv import load_dotenv
+
+# .env 파일이 있으면 환경변수로 불러오기
+load_dotenv()
+
+
+def _int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+# === 서버 시작 (백그라운드 초기화 / 레디니스) ===
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "true").lower() == "true"   # 준비 완료 전 워밍업 추론 1회
+STARTUP_RETRY_INTERVAL = _float("STARTUP_RETRY_INTERVAL", 10.0)          # 초기화 실패 시 재시도 간격(초)
+STARTUP_RETRY_AFTER = _int("STARTUP_RETRY_AFTER", 5)                     # 준비 전 피팅 요청에 주는 Retry-After(초)
+
+# === 비동기 피팅 작업 큐 ===
+TRYON_WORKERS = _int("TRYON_WORKERS", 2)              # 동시에 처리할 피팅 작업 수
+TRYON_QUEUE_MAX = _int("TRYON_QUEUE_MAX", 16)         # 대기열 최대 길이 (초과 시 429)
+TRYON_JOB_TTL = _float("TRYON_JOB_TTL", 600.0)        # 완료된 작업 결과 보관 시간(초)
+TRYON_RETRY_AFTER = _int("TRYON_RETRY_AFTER", 30)     # 평균 처리시간을 모를 때 Retry-After 기본값(초)
+TRYON_JOB_DB = os.getenv("TRYON_JOB_DB", "data/jobs.sqlite3")   # 워커가 여러 개일 때 작업 상태 공유 (SQLite)
+
+# === 같은 입력의 동시 피팅 요청 합치기 (single-flight) ===
+COALESCE_TRY_ON = os.getenv("COALESCE_TRY_ON", "true").lower() == "true"
+DISCONNECT_POLL_INTERVAL = _float("DISCONNECT_POLL_INTERVAL", 1.0)   # 대기 중 클라이언트 연결 끊김 확인 간격(초)
+
+# === 배치 피팅 (사람 1명 × 옷 여러 벌) ===
+BATCH_MAX_ITEMS = _int("BATCH_MAX_ITEMS", 20)         # 한 요청의 최대 옷 개수
+BATCH_MAX_PARALLEL = _int("BATCH_MAX_PARALLEL", 3)    # 요청 하나에서 동시에 처리할 옷 개수
+
+# === 옷 누끼(배경 제거) 캐시 ===
+CUTOUT_CACHE_DIR = os.getenv("CUTOUT_CACHE_DIR", "cache/cutouts")
+
+# === 피팅 결과 캐시 ===
+RESULT_CACHE_INDEX = os.getenv("RESULT_CACHE_INDEX", "cache/result_index.sqlite3")   # SQLite, 워커 간 공유
+RESULT_CACHE_MAX_ENTRIES = _int("RESULT_CACHE_MAX_ENTRIES", 1000)
+RESULT_CACHE_MAX_BYTES = _int("RESULT_CACHE_MAX_BYTES", 2 * 1024 ** 3)   # 2GB
+
+# === 피팅 결과 인코딩 ===
+RESULT_FORMAT = os.getenv("RESULT_FORMAT", "png")     # 기본 저장 형식: png | webp | jpeg (Accept / format 으로 더 작은 형식 선택)
+# Accept 헤더로 고를 수 있는 형식 (선호 순서)
+RESULT_FORMATS = [f.strip() for f in os.getenv("RESULT_FORMATS", "webp,jpeg,png").split(",") if f.strip()]
+RESULT_QUALITY = _int("RESULT_QUALITY", 90)            # WebP / JPEG 품질
+RESULT_WEBP_METHOD = _int("RESULT_WEBP_METHOD", 4)     # WebP 압축 노력 0(빠름)~6(작음)
+RESULT_PNG_COMPRESS_LEVEL = _int("RESULT_PNG_COMPRESS_LEVEL", 3)   # PNG 압축 0~9 (PIL 기본 6은 느림)
+RESULT_ENCODE_WORKERS = _int("RESULT_ENCODE_WORKERS", 2)   # 동시에 인코딩할 수 있는 결과 수
+
+# === 피팅 결과 저장소 (static/results) ===
+RESULT_STORAGE_MAX_BYTES = _int("RESULT_STORAGE_MAX_BYTES", 5 * 1024 ** 3)    # 5GB 넘으면 오래 안 본 것부터 삭제
+RESULT_STORAGE_TTL = _float("RESULT_STORAGE_TTL", 7 * 24 * 3600)            # 마지막 접근 후 보관 시간(초)
+RESULT_STORAGE_SHARD_DEPTH = _int("RESULT_STORAGE_SHARD_DEPTH", 1)          # 하위 폴더 단계 (1단계 = 256개)
+RESULT_STORAGE_SWEEP_INTERVAL = _float("RESULT_STORAGE_SWEEP_INTERVAL", 300.0)   # 스위퍼 실행 간격(초)
+
+# === rembg (배경 제거) 세션 풀 ===
+# rembg: 옷 배경 제거 / none: 배경 제거 생략 (rembg 없는 환경, 오프라인 부하 테스트)
+BACKGROUND_REMOVAL = os.getenv("BACKGROUND_REMOVAL", "rembg")
+REMBG_MODEL = os.getenv("REMBG_MODEL", "u2net")
+REMBG_SESSIONS = _int("REMBG_SESSIONS", 2)            # 동시에 배경 제거 가능한 세션 수
+REMBG_THREADS = _int("REMBG_THREADS", 0)              # 세션당 ONNX 스레드 수 (0 = 기본값)
+# 예: REMBG_PROVIDERS=CUDAExecutionProvider,CPUExecutionProvider (비우면 GPU 우선 자동 선택)
+REMBG_PROVIDERS = [p.strip() for p in os.getenv("REMBG_PROVIDERS", "").split(",") if p.strip()] or None
+
+# === 추론 백엔드 선택 ===
+# gradio: 원격 IDM-VTON Space (기본) / stub: 오프라인 결정적 스텁 (부하·회귀 테스트) / onnx: 로컬 ONNX 모델
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "gradio")
+STUB_LATENCY = _float("STUB_LATENCY", 0.0)            # 스텁 응답 지연(초), 원격 GPU 시간 흉내
+STUB_JITTER = _float("STUB_JITTER", 0.0)              # 추가 지연 최대값(초), 입력별로 결정적
+STUB_OUTPUT_SIZE = tuple(int(v) for v in os.getenv("STUB_OUTPUT_SIZE", "768x1024").split("x"))
+STUB_CONCURRENCY = _int("STUB_CONCURRENCY", 0)        # 동시에 처리할 수 (0 = 제한 없음)
+ONNX_MODEL_PATH = os.getenv("ONNX_MODEL_PATH", "models/tryon.onnx")
+ONNX_PROVIDERS = [p.strip() for p in os.getenv("ONNX_PROVIDERS", "").split(",") if p.strip()] or None
+
+# === 멀티 워커 (uvicorn --workers N) ===
+WORKERS = _int("WEB_CONCURRENCY", 1)   # uvicorn 워커 수 (uvicorn 과 같은 환경변수)
+# 추론 서버 주소: 비우면 워커마다 모델/클라이언트를 직접 로드 (기존 방식)
+# 주소를 주면 모델은 추론 전용 프로세스 하나에만 올리고 워커들은 IPC 로 요청 ("data/inference.sock" 또는 "127.0.0.1:7100")
+# TCP 주소는 INFERENCE_SERVER_AUTHKEY 를 직접 지정해야만 허용 (IPC 가 pickle 을 주고받음)
+INFERENCE_SERVER = os.getenv("INFERENCE_SERVER", "")
+INFERENCE_SERVER_AUTOSTART = os.getenv("INFERENCE_SERVER_AUTOSTART", "true").lower() == "true"   # 대표 워커가 직접 띄움
+# 인증 키: 비우면 무작위로 만들어 INFERENCE_SERVER_AUTHKEY_FILE(0600)로 워커끼리 공유 (유닉스 소켓만)
+INFERENCE_SERVER_AUTHKEY = os.getenv("INFERENCE_SERVER_AUTHKEY", "")
+INFERENCE_SERVER_AUTHKEY_FILE = os.getenv("INFERENCE_SERVER_AUTHKEY_FILE", "data/inference.key")
+INFERENCE_SERVER_CONNECTIONS = _int("INFERENCE_SERVER_CONNECTIONS", 8)   # 워커당 동시 요청(연결) 수
+INFERENCE_SERVER_TIMEOUT = _float("INFERENCE_SERVER_TIMEOUT", 120.0)     # 시작 시 서버 준비를 기다리는 최대 시간(초)
+PRIMARY_LOCK = os.getenv("PRIMARY_LOCK", "data/primary.lock")             # 대표 워커 선출용 파일 잠금
+
+# === 원격 추론 (IDM-VTON) 클라이언트 ===
+# 쉼표로 여러 엔드포인트 지정 가능 (Space 이름 또는 http://127.0.0.1:7860/ 같은 URL)
+VTON_ENDPOINTS = [e.strip() for e in os.getenv("VTON_ENDPOINTS", "yisol/IDM-VTON").split(",") if e.strip()]
+VTON_MAX_IN_FLIGHT = _int("VTON_MAX_IN_FLIGHT", 2)    # 동시에 진행할 원격 예측 수
+VTON_TIMEOUT = _float("VTON_TIMEOUT", 120.0)          # 호출 1회 타임아웃(초)
+VTON_RETRIES = _int("VTON_RETRIES", 2)                # 실패 시 재시도 횟수
+VTON_BACKOFF_BASE = _float("VTON_BACKOFF_BASE", 1.0)  # 재시도 대기 기준(초), 지수 증가 + 지터
+VTON_BACKOFF_MAX = _float("VTON_BACKOFF_MAX", 10.0)
+VTON_BREAKER_THRESHOLD = _int("VTON_BREAKER_THRESHOLD", 5)   # 연속 실패 N번이면 회로 차단
+VTON_BREAKER_RESET = _float("VTON_BREAKER_RESET", 60.0)      # 차단 유지 시간(초)
+
+# === 공정 스케줄링 / 클라이언트별 요청 한도 ===
+# 클라이언트 = 등록된 API 키(API_KEYS 또는 CLIENT_WEIGHTS 에 있는 키), 그 밖에는 접속 IP
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+SCHEDULER_SLOTS = _int("SCHEDULER_SLOTS", VTON_MAX_IN_FLIGHT)     # 동시에 추론할 수 (워커마다)
+SCHEDULER_BULK_EVERY = _int("SCHEDULER_BULK_EVERY", 5)            # 둘 다 대기 중이면 N번째 슬롯마다 배치/작업에 1번
+API_KEY_HEADER = os.getenv("API_KEY_HEADER", "X-API-Key")
+TRUST_FORWARDED_FOR = os.getenv("TRUST_FORWARDED_FOR", "false").lower() == "true"   # 프록시 뒤: X-Forwarded-For 첫 IP 사용
+RATE_LIMIT_PER_MINUTE = _float("RATE_LIMIT_PER_MINUTE", 30.0)     # 클라이언트당 분당 피팅 수 (0 이면 한도 없음)
+RATE_LIMIT_BURST = _float("RATE_LIMIT_BURST", 10.0)               # 한 번에 몰아 쓸 수 있는 최대 수
+# 클라이언트별 가중치 ("key1:4,key2:2", 기본 1): 높을수록 대기열에서 더 많은 몫
+CLIENT_WEIGHTS = {
+    client.strip(): float(weight)
+    for client, _, weight in (item.rpartition(":") for item in os.getenv("CLIENT_WEIGHTS", "").split(","))
+    if client.strip()
+}
+# 등록된 API 키 (쉼표 구분): 등록되지 않은 키는 무시하고 IP 로 구분 → 키를 바꿔 가며 한도를 피할 수 없음
+API_KEYS = {k.strip() for k in os.getenv("API_KEYS", "").split(",") if k.strip()} | set(CLIENT_WEIGHTS)
+
+# === 옷 업로드 ===
+MAX_UPLOAD_BYTES = _int("MAX_UPLOAD_BYTES", 20 * 1024 * 1024)   # 업로드 최대 크기 (20MB)
+
+# === 옷 카탈로그 인덱스 ===
+CATALOG_DB = os.getenv("CATALOG_DB", "data/catalog.sqlite3")
+# 닮은 옷 판단 기준: 64비트 지각 해시 중 다른 비트 수 (pHash 로 찾고 dHash 로 확인)
+CLOTH_DEDUPE_PHASH_DISTANCE = _int("CLOTH_DEDUPE_PHASH_DISTANCE", 10)
+CLOTH_DEDUPE_DHASH_DISTANCE = _int("CLOTH_DEDUPE_DHASH_DISTANCE", 16)
+# 해시는 흑백이라 색도 비교: 4x4 칸별 평균 RGB 거리(0 ~ 441)가 이 이하여야 같은 옷 (다른 색상은 별개 상품)
+CLOTH_DEDUPE_COLOR_DISTANCE = _float("CLOTH_DEDUPE_COLOR_DISTANCE", 40.0)
+
+# === 파생 이미지 (썸네일 / WebP / AVIF) ===
+DERIVATIVE_SIZES = [int(w) for w in os.getenv("DERIVATIVE_SIZES", "256,512").split(",") if w.strip()]
+DERIVATIVE_FORMATS = [f.strip() for f in os.getenv("DERIVATIVE_FORMATS", "webp,avif").split(",") if f.strip()]
+DERIVATIVE_QUALITY = _int("DERIVATIVE_QUALITY", 80)
+DERIVATIVE_WORKERS = _int("DERIVATIVE_WORKERS", 2)
+DERIVATIVE_WAIT = _float("DERIVATIVE_WAIT", 0.5)      # 피팅 응답 전 결과 썸네일을 기다리는 최대 시간(초)
+# 원본 크기 변환본 형식 (원본보다 작을 때만 저장, /static 이 Accept 헤더로 골라 보냄), 비우면 끔
+DERIVATIVE_FULL_FORMATS = [f.strip() for f in os.getenv("DERIVATIVE_FULL_FORMATS", "webp").split(",") if f.strip()]
+
+# === 정적 파일 캐싱 (/static) ===
+# 이름이 uuid/해시라 내용이 바뀌지 않는 경로 → Cache-Control: immutable
+STATIC_IMMUTABLE_PREFIXES = [p.strip() for p in os.getenv("STATIC_IMMUTABLE_PREFIXES", "clothes/,results/,derived/").split(",") if p.strip()]
+STATIC_MAX_AGE = _int("STATIC_MAX_AGE", 365 * 24 * 3600)
+STATIC_STAT_TTL = _float("STATIC_STAT_TTL", 1.0)      # stat 결과 캐시 시간(초), 삭제된 결과를 오래 믿지 않도록 짧게
+STATIC_VARIANT_FORMATS = [f.strip() for f in os.getenv("STATIC_VARIANT_FORMATS", "avif,webp").split(",") if f.strip()]
+
+# === 사람 사진 전처리 (원격 추론 전) ===
+PERSON_TARGET_SIZE = tuple(int(v) for v in os.getenv("PERSON_TARGET_SIZE", "768x1024").split("x"))   # IDM-VTON 입력 크기
+PERSON_TRANSFER_FORMAT = os.getenv("PERSON_TRANSFER_FORMAT", "jpeg")   # jpeg | webp | png
+PERSON_TRANSFER_QUALITY = _int("PERSON_TRANSFER_QUALITY", 90)
+
+# === 사람 사진 세션 (한 번 올리고 ID 로 재사용) ===
+PERSON_SESSION_DIR = os.getenv("PERSON_SESSION_DIR", "cache/person_sessions")
+PERSON_SESSION_TTL = _float("PERSON_SESSION_TTL", 1800)                              # 마지막 사용 후 만료(초)
+PERSON_SESSION_MAX_MEMORY = _int("PERSON_SESSION_MAX_MEMORY", 256 * 1024 ** 2)      # 메모리에 둘 최대 바이트
+PERSON_SESSION_MAX_DISK = _int("PERSON_SESSION_MAX_DISK", 1024 ** 3)                # 디스크 최대 바이트
+
+# === 추론 입력 스테이징 ===
+STAGING_BACKING = os.getenv("STAGING_BACKING", "disk")          # disk | tmpfs (/dev/shm, 메모리)
+STAGING_DIR = os.getenv("STAGING_DIR", "temp_uploads")          # backing=disk 일 때 위치
+STAGING_PNG_COMPRESS_LEVEL = _int("STAGING_PNG_COMPRESS_LEVEL", 1)   # 버릴 파일이므로 빠른 압축
@@ -1,65 +1,66 @@
-import os
-import shutil
-import time
-from gradio_client import Client, handle_file
-from PIL import Image, ImageEnhance # 👈 ImageEnhance 추가 필수!
+from PIL import Image
+from app import config
+from app.services.inference_backend import InferenceBackend, create_backend
+from app.services.inference_client import RemoteInferenceClient
+from app.services.staging_service import InputStager
+from app.services.image_enhance import enhance_fused
+from app.services.metrics import timed
 
 class AIEngine:
-    def __init__(self):
-        print("🤖 AI Engine: IDM-VTON (Warping Mode) 초기화 중...")
-        try:
-            self.client = Client("yisol/IDM-VTON")
-            print("   ✅ IDM-VTON 엔진 연결 성공! (Remote GPU)")
-        except Exception as e:
-            print(f"   ❌ 엔진 연결 실패: {e}")
-            self.client = None
+    # IDM-VTON 고정 파라미터 (같은 입력이면 같은 결과 → 결과 캐시 키에도 사용)
+    STEPS = 30
+    SEED = 30
+
+    def __init__(self, connect: bool = True, rembg_pool=None, inference: RemoteInferenceClient = None,
+                 stager: InputStager = None, backend: InferenceBackend = None, background_removal: str = None):
+        self.rembg_pool = rembg_pool  # 미리 워밍업된 rembg 세션 풀 (없으면 rembg 기본 세션)
+        self.background_removal = background_removal or config.BACKGROUND_REMOVAL
+        # 피팅 추론 백엔드 (INFERENCE_BACKEND: 원격 Gradio / 오프라인 스텁 / 로컬 ONNX)
+        self.backend = backend or create_backend(config.INFERENCE_BACKEND, stager=stager, inference=inference)
+        if not connect:
+            # 배경 제거/화질 개선만 쓰는 경우 (예: 누끼 캐시 백필)
+            return
+
+        print(f"🤖 AI Engine: IDM-VTON (Warping Mode) 초기화 중... (backend={self.backend.name})")
+        self.backend.connect()
+
+    def warmup(self):
+        """
+        첫 요청 전에 한 번: 배경 제거(rembg 모델 import/로딩), 화질 개선(NumPy), 추론 백엔드 워밍업
+        → 첫 실제 요청이 모델 로딩 비용을 치르지 않음
+        """
+        sample = Image.new("RGB", (64, 64), color="white")
+        self.enhance_cloth(self.remove_background(sample))
+        self.backend.warmup()
 
     def remove_background(self, image: Image.Image) -> Image.Image:
-        from rembg import remove
-        return remove(image.convert("RGB"))
+        if self.background_removal == "none":
+            # 배경 제거 생략: 원본 그대로 (투명도 채널만 맞춤)
+            return image.convert("RGBA")
+        with timed("rembg"):
+            if self.rembg_pool is not None:
+                return self.rembg_pool.remove(image.convert("RGB"))
+            from rembg import remove
+            return remove(image.convert("RGB"))
 
     # === [신규 추가] 옷 화질 개선 함수 ===
+    # 1. 선명도 강화 (흐릿한 로고 방지)      → 20% 더 선명하게
+    # 2. 색상 대비 강화 (주름/질감 강조)     → 10% 더 진하게
+    # 3. 색 농도 강화 (물빠짐 방지)          → 10%
+    SHARPNESS = 1.2
+    CONTRAST = 1.1
+    COLOR = 1.1
+
     def enhance_cloth(self, image: Image.Image) -> Image.Image:
         """
         AI가 옷의 특징을 더 잘 잡도록 선명도와 콘트라스트를 강조
+        (PIL ImageEnhance 3단계와 같은 결과를 NumPy 한 번의 처리로 계산, 알파 채널 유지)
         """
-        # 1. 선명도 강화 (흐릿한 로고 방지)
-        enhancer = ImageEnhance.Sharpness(image)
-        image = enhancer.enhance(1.2) # 20% 더 선명하게
-
-        # 2. 색상 대비 강화 (주름/질감 강조)
-        enhancer = ImageEnhance.Contrast(image)
-        image = enhancer.enhance(1.1) # 10% 더 진하게
-        
-        # 3. 색 농도 강화 (물빠짐 방지)
-        enhancer = ImageEnhance.Color(image)
-        image = enhancer.enhance(1.1)
-
-        return image
-
-    def virtual_try_on(self, cloth_image: Image.Image, person_image: Image.Image, category: str) -> Image.Image:
-        print(f"\n📢 [IDM-VTON] 피팅 요청: 카테고리={category}")
-        
-        if self.client is None:
-            print("🚨 엔진이 연결되지 않았습니다.")
-            return cloth_image
-
-        # 1. 파일 임시 저장용 폴더
-        temp_dir = "temp_uploads"
-        os.makedirs(temp_dir, exist_ok=True)
-        
-        timestamp = int(time.time())
-        person_path = f"{temp_dir}/person_{timestamp}.png"
-        cloth_path = f"{temp_dir}/cloth_{timestamp}.png"
-        
-        # === [수정] 저장하기 전에 옷 화질 개선 적용 ===
-        print("   ✨ 옷 이미지 화질 개선(Enhancing) 적용 중...")
-        enhanced_cloth = self.enhance_cloth(cloth_image)
-        
-        person_image.save(person_path)
-        enhanced_cloth.save(cloth_path) # 개선된 이미지를 저장
+        with timed("enhance_cloth"):
+            return enhance_fused(image, self.SHARPNESS, self.CONTRAST, self.COLOR)
 
-        # 2. 카테고리 매핑
+    def map_category(self, category: str) -> str:
+        """ 프론트 카테고리 → IDM-VTON 옷 설명 """
         vton_desc = "short sleeve shirt"
         if category == "lower_body":
             vton_desc = "trousers"
@@ -67,33 +68,25 @@ class AIEngine:
             vton_desc = "dress"
         elif category == "upper_body":
             vton_desc = "shirt"
+        return vton_desc
 
-        print("   🚀 원격 GPU로 데이터 전송 및 처리 시작 (약 15~30초 소요)...")
-        
-        try:
-            result = self.client.predict(
-                {"background": handle_file(person_path), "layers": [], "composite": None},
-                handle_file(cloth_path),
-                vton_desc,
-                True,      # Auto-masking
-                30,        # Steps
-                30,        # Seed
-                api_name="/tryon"
-            )
-            
-            print(f"   ✅ 처리 완료! 결과 경로: {result}")
-            
-            if not result:
-                raise ValueError("서버응답이 비어있습니다")
+    def virtual_try_on(self, cloth_image: Image.Image, person_image, category: str,
+                       enhanced: bool = False) -> Image.Image:
+        """
+        person_image: PIL 이미지 또는 전처리된 PreparedImage
+        enhanced=True 이면 이미 화질 개선된 옷 (누끼 캐시) → enhance_cloth 생략
+        """
+        print(f"\n📢 [IDM-VTON] 피팅 요청: 카테고리={category}")
 
-            if isinstance(result, (list, tuple)):
-                final_image_path = result[0]
-            else:
-                final_image_path = result
+        # === [수정] 저장하기 전에 옷 화질 개선 적용 ===
+        if enhanced:
+            enhanced_cloth = cloth_image
+        else:
+            print("   ✨ 옷 이미지 화질 개선(Enhancing) 적용 중...")
+            enhanced_cloth = self.enhance_cloth(cloth_image)
 
-            final_image = Image.open(final_image_path)
-            return final_image
+        # 2. 카테고리 매핑
+        vton_desc = self.map_category(category)
 
-        except Exception as e:
-            print(f"   💥 IDM-VTON 처리 중 에러: {e}")
-            return cloth_image
\ No newline at end of file
+        # 3. 추론 백엔드 호출 (원격 GPU 등), 실패 시 InferenceError → API에서 502/503 처리
+        return self.backend.try_on(person_image, enhanced_cloth, vton_desc, self.STEPS, self.SEED)
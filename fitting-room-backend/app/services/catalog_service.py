@@ -0,0 +1,311 @@
+import base64
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.services.perceptual_hash import BKTree, color_distance, from_hex, hamming, image_hashes, to_hex
+
+
+class InvalidCursorError(ValueError):
+    """ 페이지 커서 형식이 잘못됨 """
+
+
+class ClothCatalog:
+    """
+    옷 목록 인덱스 (SQLite)
+    - 목록 요청마다 폴더를 glob + stat 하지 않고 인덱스에서 바로 조회
+    - 저장(save_cloth_stream) 시 갱신, 서버 시작 시 폴더와 동기화(rebuild)
+    - 최신순 커서 페이지네이션, 카테고리 필터, 변경 버전 기반 ETag (옷의 파생 이미지가 완성돼도 버전 증가)
+    - 옷마다 지각 해시(pHash / dHash) 보관 → 다시 올린(크기 변경 / 재압축 / 살짝 잘린) 같은 옷 찾기
+      pHash 로 BK-트리 검색 후 dHash 로 한 번 더 확인, 트리는 메모리에 두고 해시가 바뀔 때만 갱신
+      (이 프로세스의 추가/삭제는 트리에 바로 반영, 다른 워커가 해시를 바꿨을 때만 새로 만듦)
+    - 해시는 흑백이라 색 서명(칸별 평균 RGB)까지 가까워야 같은 옷 → 같은 디자인의 다른 색상은 중복 아님
+    """
+
+    def __init__(self, db_path: str = "data/catalog.sqlite3", cloth_dir: str = "static/clothes",
+                 phash_distance: int = 10, dhash_distance: int = 16, color_distance: float = 40.0):
+        self.db_path = db_path
+        self.CLOTH_DIR = cloth_dir
+        self.phash_distance = phash_distance   # 64비트 중 다른 비트 수가 이 이하면 닮은 후보
+        self.dhash_distance = dhash_distance
+        self.color_distance = color_distance   # 색 서명 거리(0 ~ 441)가 이 이하여야 같은 색
+        self._tree: Optional[BKTree[str]] = None
+        self._tree_key = None
+        self._hashes: Dict[str, Tuple[int, int, bytes]] = {}
+        self._dead = 0   # 트리에 남아 있지만 지워진(또는 해시가 바뀐) 항목 수 → 많아지면 새로 만듦
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        os.makedirs(cloth_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS clothes (
+                filename   TEXT PRIMARY KEY,
+                category   TEXT,
+                size       INTEGER NOT NULL,
+                mtime      REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_clothes_recent ON clothes (mtime DESC, filename DESC);
+            CREATE INDEX IF NOT EXISTS idx_clothes_category ON clothes (category, mtime DESC, filename DESC);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+            INSERT OR IGNORE INTO meta (key, value) VALUES ('hash_version', 0);
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(clothes)")}
+        for column in ("phash", "dhash", "color"):
+            if column not in columns:  # 지각 해시 이전에 만든 인덱스
+                self._conn.execute(f"ALTER TABLE clothes ADD COLUMN {column} TEXT")
+
+    def rebuild(self) -> int:
+        """ 폴더 내용과 인덱스를 맞춤 (서버 시작 시 1회), 바뀐 항목 수 반환 """
+        t0 = time.perf_counter()
+        on_disk = {}
+        with os.scandir(self.CLOTH_DIR) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.startswith("."):
+                    st = entry.stat()
+                    on_disk[entry.name] = (st.st_size, st.st_mtime)
+
+        with self._lock:
+            indexed = {
+                name: (size, mtime)
+                for name, size, mtime in self._conn.execute("SELECT filename, size, mtime FROM clothes")
+            }
+            stale = [name for name in indexed if name not in on_disk]
+            changed = [(name, size, mtime) for name, (size, mtime) in on_disk.items() if indexed.get(name) != (size, mtime)]
+
+            if stale or changed:
+                self._conn.execute("BEGIN")
+                self._conn.executemany("DELETE FROM clothes WHERE filename = ?", [(name,) for name in stale])
+                self._conn.executemany(
+                    "INSERT INTO clothes (filename, size, mtime) VALUES (?, ?, ?) "
+                    "ON CONFLICT(filename) DO UPDATE SET size = excluded.size, mtime = excluded.mtime, "
+                    "phash = NULL, dhash = NULL, color = NULL",
+                    changed,
+                )
+                self._bump_version()
+                self._bump_hash_version()
+                self._conn.execute("COMMIT")
+
+        hashed, failed = self.hash_missing()
+        print(f"📚 옷 카탈로그 인덱스 동기화: {len(on_disk)}개 (변경 {len(stale) + len(changed)}개, "
+              f"지각 해시 {hashed}개 계산 / {failed}개 실패, {(time.perf_counter() - t0) * 1000:.0f}ms)")
+        return len(stale) + len(changed)
+
+    def hash_missing(self) -> Tuple[int, int]:
+        """ 지각 해시가 없는 옷(기존 파일, 바뀐 파일)의 해시 계산 → (계산 수, 실패 수) """
+        with self._lock:
+            names = [row[0] for row in self._conn.execute(
+                "SELECT filename FROM clothes WHERE phash IS NULL OR color IS NULL")]
+        computed, failed = [], 0
+        for name in names:
+            try:
+                p, d, c = image_hashes(os.path.join(self.CLOTH_DIR, name))
+            except Exception:
+                failed += 1  # 이미지가 아니거나 깨진 파일 → 다음 동기화 때 다시 시도
+                continue
+            computed.append((to_hex(p), to_hex(d), c.hex(), name))
+        if computed:
+            with self._lock:
+                self._conn.execute("BEGIN")
+                self._conn.executemany("UPDATE clothes SET phash = ?, dhash = ?, color = ? WHERE filename = ?",
+                                       computed)
+                self._bump_hash_version()
+                self._conn.execute("COMMIT")
+        return len(computed), failed
+
+    def add(self, filename: str, category: Optional[str] = None, hashes: Optional[Tuple[int, int, bytes]] = None):
+        """ 새로 저장된 옷 파일 등록 (hashes: 업로드 때 계산한 (pHash, dHash, 색 서명)) """
+        st = os.stat(os.path.join(self.CLOTH_DIR, filename))
+        p, d, c = (to_hex(hashes[0]), to_hex(hashes[1]), hashes[2].hex()) if hashes is not None else (None,) * 3
+        with self._lock:
+            self._conn.execute("BEGIN")
+            had_hashes = self._conn.execute(
+                "SELECT 1 FROM clothes WHERE filename = ? AND phash IS NOT NULL", (filename,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO clothes (filename, category, size, mtime, phash, dhash, color) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (filename, category, st.st_size, st.st_mtime, p, d, c),
+            )
+            self._bump_version()
+            if hashes is not None or had_hashes:
+                self._update_tree(self._bump_hash_version(), filename, hashes)
+            self._conn.execute("COMMIT")
+
+    def set_category(self, filename: str, category: Optional[str]) -> bool:
+        """ 이미 있는 옷의 카테고리 변경 (같은 사진을 다른 카테고리로 다시 올린 경우), 바뀌었으면 True """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            changed = self._conn.execute(
+                "UPDATE clothes SET category = ? WHERE filename = ? AND category IS NOT ?",
+                (category, filename, category),
+            ).rowcount
+            if changed:
+                self._bump_version()
+            self._conn.execute("COMMIT")
+        return bool(changed)
+
+    def find_similar(self, hashes: Tuple[int, int, bytes], phash_distance: Optional[int] = None,
+                     dhash_distance: Optional[int] = None,
+                     max_color_distance: Optional[float] = None) -> List[Tuple[str, int]]:
+        """ 닮은 옷 → [(파일명, pHash 거리)] 가까운 순 """
+        phash_distance = self.phash_distance if phash_distance is None else phash_distance
+        dhash_distance = self.dhash_distance if dhash_distance is None else dhash_distance
+        max_color_distance = self.color_distance if max_color_distance is None else max_color_distance
+        tree, known = self._index()
+        with self._lock:  # 트리는 이 프로세스의 추가/삭제로 제자리에서 바뀜
+            candidates = tree.search(hashes[0], phash_distance)
+            known = {name: known[name] for _, name in candidates if name in known}
+        found, seen = [], set()
+        for distance, name in candidates:
+            current = known.get(name)
+            # 지워진 항목, 해시가 바뀐 항목의 옛 노드는 건너뜀
+            if current is None or name in seen or hamming(current[0], hashes[0]) != distance:
+                continue
+            seen.add(name)
+            if hamming(current[1], hashes[1]) <= dhash_distance \
+                    and color_distance(current[2], hashes[2]) <= max_color_distance:
+                found.append((name, distance))
+        return found
+
+    def duplicate_clusters(self, phash_distance: Optional[int] = None, dhash_distance: Optional[int] = None,
+                           max_color_distance: Optional[float] = None) -> List[List[str]]:
+        """ 서로 닮은 옷끼리 묶은 그룹 (2개 이상인 것만, 큰 그룹 먼저, 그룹 안은 먼저 올린 순) """
+        _, known = self._index()
+        with self._lock:
+            known = dict(known)  # 검색 중 다른 스레드가 추가해도 순회가 깨지지 않도록
+        parent = {name: name for name in known}
+
+        def root(name: str) -> str:
+            while parent[name] != name:
+                parent[name] = parent[parent[name]]
+                name = parent[name]
+            return name
+
+        for name, hashes in known.items():
+            for other, _ in self.find_similar(hashes, phash_distance, dhash_distance, max_color_distance):
+                if other not in parent:
+                    continue
+                a, b = root(name), root(other)
+                if a != b:
+                    parent[b] = a
+
+        groups: Dict[str, List[str]] = {}
+        for name in known:
+            groups.setdefault(root(name), []).append(name)
+        with self._lock:
+            mtimes = dict(self._conn.execute("SELECT filename, mtime FROM clothes"))
+        clusters = [sorted(g, key=lambda n: (mtimes.get(n, 0.0), n)) for g in groups.values() if len(g) > 1]
+        clusters.sort(key=lambda g: (-len(g), g[0]))
+        return clusters
+
+    def remove(self, filename: str):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            had_hashes = self._conn.execute(
+                "SELECT 1 FROM clothes WHERE filename = ? AND phash IS NOT NULL", (filename,)).fetchone()
+            self._conn.execute("DELETE FROM clothes WHERE filename = ?", (filename,))
+            self._bump_version()
+            if had_hashes:
+                self._update_tree(self._bump_hash_version(), filename, None)
+            self._conn.execute("COMMIT")
+
+    def list_page(self, limit: Optional[int] = None, cursor: Optional[str] = None,
+                  category: Optional[str] = None) -> Tuple[List[str], Optional[str]]:
+        """ 최신순 파일명 목록과 다음 페이지 커서 (마지막 페이지면 None) """
+        where, params = [], []
+        if category is not None:
+            where.append("category = ?")
+            params.append(category)
+        if cursor:
+            mtime, filename = self._decode_cursor(cursor)
+            where.append("(mtime < ? OR (mtime = ? AND filename < ?))")
+            params += [mtime, mtime, filename]
+
+        sql = "SELECT filename, mtime FROM clothes"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY mtime DESC, filename DESC"
+        if limit is not None:
+            # 한 개 더 읽어서 다음 페이지가 있는지 확인
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self._encode_cursor(rows[-1][1], rows[-1][0])
+        return [name for name, _ in rows], next_cursor
+
+    def version(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def mark_changed(self):
+        """ 목록은 그대로지만 응답 내용이 바뀜(파생 이미지 생성 완료 등) → 버전을 올려 ETag 무효화 """
+        with self._lock:
+            self._bump_version()
+
+    def etag(self, *parts) -> str:
+        """ 카탈로그 버전 + 요청 조건으로 만든 ETag (목록이 안 바뀌었으면 같은 값) """
+        raw = ":".join([str(self.version())] + [str(p) for p in parts])
+        return f'W/"{hashlib.sha1(raw.encode()).hexdigest()}"'
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _index(self) -> Tuple[BKTree[str], Dict[str, Tuple[int, int, bytes]]]:
+        """ 지각 해시 BK-트리 (hash_version 이 바뀐 경우 = 다른 워커가 해시를 바꿨을 때만 새로 만듦) """
+        with self._lock:
+            key = self._conn.execute("SELECT value FROM meta WHERE key = 'hash_version'").fetchone()[0]
+            if self._tree is not None and key == self._tree_key and self._dead <= len(self._hashes) // 4 + 16:
+                return self._tree, self._hashes
+            # 색 서명이 아직 없는(색 검사 이전에 만든) 항목은 다음 동기화 때 채워질 때까지 제외
+            rows = self._conn.execute("SELECT filename, phash, dhash, color FROM clothes "
+                                      "WHERE phash IS NOT NULL AND color IS NOT NULL").fetchall()
+            tree: BKTree[str] = BKTree()
+            known = {}
+            for name, p, d, c in rows:
+                known[name] = (from_hex(p), from_hex(d), bytes.fromhex(c))
+                tree.add(known[name][0], name)
+            self._tree, self._tree_key, self._hashes, self._dead = tree, key, known, 0
+            return tree, known
+
+    def _update_tree(self, hash_version: int, filename: str, hashes: Optional[Tuple[int, int, bytes]]):
+        """ 이 프로세스의 추가/삭제를 메모리 트리에 바로 반영 (잠금 + 트랜잭션 안에서 호출) """
+        if self._tree is None or self._tree_key != hash_version - 1:
+            return  # 그 사이 다른 워커가 해시를 바꿈 → 다음 검색 때 새로 만듦
+        if self._hashes.pop(filename, None) is not None:
+            self._dead += 1  # 옛 노드는 트리에 남음 (검색 때 건너뜀)
+        if hashes is not None:
+            self._hashes[filename] = hashes
+            self._tree.add(hashes[0], filename)
+        self._tree_key = hash_version
+
+    def _bump_version(self):
+        self._conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    def _bump_hash_version(self) -> int:
+        """ 지각 해시 / 색 서명이 바뀜 → 새 hash_version """
+        self._conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'hash_version'")
+        return self._conn.execute("SELECT value FROM meta WHERE key = 'hash_version'").fetchone()[0]
+
+    @staticmethod
+    def _encode_cursor(mtime: float, filename: str) -> str:
+        return base64.urlsafe_b64encode(f"{mtime!r}|{filename}".encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[float, str]:
+        try:
+            mtime, filename = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+            return float(mtime), filename
+        except Exception:
+            raise InvalidCursorError("Invalid cursor")
@@ -0,0 +1,42 @@
+import hashlib
+import os
+import threading
+from typing import Dict, Tuple
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(path: str) -> str:
+    """ 파일 내용을 조금씩 읽어서 SHA-256 계산 (큰 파일도 메모리 절약) """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileHashIndex:
+    """
+    파일 경로 → SHA-256 캐시
+    (크기, 수정시각)이 그대로면 다시 읽지 않고 저장된 해시를 재사용
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def digest(self, path: str) -> str:
+        st = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+            return entry[2]
+
+        value = sha256_file(path)
+        with self._lock:
+            self._entries[path] = (st.st_size, st.st_mtime_ns, value)
+        return value
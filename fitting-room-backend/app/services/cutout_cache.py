@@ -0,0 +1,110 @@
+import os
+import threading
+import uuid
+from glob import glob
+from typing import Dict, Optional
+from PIL import Image
+
+from app.services.content_hash import FileHashIndex
+from app.services.file_lock import file_lock
+
+
+class ClothCutoutCache:
+    """
+    배경 제거(rembg) + 화질 개선이 끝난 옷 이미지 캐시
+    원본 파일의 SHA-256을 키로 저장하므로 같은 옷은 한 번만 처리한다.
+      - {hash}.png           : 배경 제거 결과
+      - {hash}.enhanced.png  : 배경 제거 + enhance_cloth 결과 (피팅에 바로 사용)
+    캐시 폴더를 여러 워커가 공유하므로 만들 때는 프로세스 간 파일 잠금(.locks/{hash 앞 2자리}.lock)도 잡음
+    """
+
+    def __init__(self, ai_engine, cache_dir: str = "cache/cutouts"):
+        self.ai_engine = ai_engine
+        self.CACHE_DIR = cache_dir
+        os.makedirs(self.CACHE_DIR, exist_ok=True)
+
+        self.hash_index = FileHashIndex()
+        self.hits = 0
+        self.misses = 0
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def cutout_path(self, digest: str) -> str:
+        return os.path.join(self.CACHE_DIR, f"{digest}.png")
+
+    def enhanced_path(self, digest: str) -> str:
+        return os.path.join(self.CACHE_DIR, f"{digest}.enhanced.png")
+
+    def load(self, cloth_path: str) -> Optional[Image.Image]:
+        """ 캐시된 (배경 제거 + 개선) 옷 이미지 반환, 없으면 None """
+        path = self.enhanced_path(self.hash_index.digest(cloth_path))
+        if not os.path.exists(path):
+            return None
+        image = Image.open(path)
+        image.load()
+        return image
+
+    def get_or_build(self, cloth_path: str) -> Image.Image:
+        """ 피팅 경로용: 캐시에 있으면 로드, 없으면 지금 만들어서 저장 """
+        image = self.load(cloth_path)
+        if image is not None:
+            self.hits += 1
+            return image
+        self.misses += 1
+        return self.build(cloth_path)
+
+    def build(self, cloth_path: str) -> Image.Image:
+        """ 배경 제거 + 화질 개선 후 캐시에 저장 (같은 옷을 동시에 두 번 처리하지 않음) """
+        digest = self.hash_index.digest(cloth_path)
+        with self._lock_for(digest), file_lock(os.path.join(self.CACHE_DIR, ".locks", f"{digest[:2]}.lock")):
+            enhanced_path = self.enhanced_path(digest)
+            if os.path.exists(enhanced_path):
+                image = Image.open(enhanced_path)
+                image.load()
+                return image
+
+            cutout = self.ai_engine.remove_background(Image.open(cloth_path))
+            self._atomic_save(cutout, self.cutout_path(digest))
+
+            enhanced = self.ai_engine.enhance_cloth(cutout)
+            self._atomic_save(enhanced, enhanced_path)
+            return enhanced
+
+    def warm(self, cloth_path: str):
+        """ 업로드 직후 백그라운드에서 호출: 실패해도 요청에는 영향 없음 """
+        try:
+            self.build(cloth_path)
+            print(f"   🧊 옷 누끼 캐시 생성 완료: {os.path.basename(cloth_path)}")
+        except Exception as e:
+            print(f"   ⚠️ 옷 누끼 캐시 생성 실패 ({cloth_path}): {e}")
+
+    def backfill(self, cloth_dir: str) -> Dict[str, int]:
+        """ 기존 옷 폴더 전체에 대해 캐시가 없는 것만 생성 """
+        result = {"built": 0, "skipped": 0, "failed": 0}
+        for path in sorted(glob(os.path.join(cloth_dir, "*"))):
+            if not os.path.isfile(path):
+                continue
+            try:
+                if os.path.exists(self.enhanced_path(self.hash_index.digest(path))):
+                    result["skipped"] += 1
+                    continue
+                self.build(path)
+                result["built"] += 1
+                print(f"   ✅ {os.path.basename(path)}")
+            except Exception as e:
+                result["failed"] += 1
+                print(f"   ❌ {os.path.basename(path)}: {e}")
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def _lock_for(self, digest: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(digest, threading.Lock())
+
+    def _atomic_save(self, image: Image.Image, path: str):
+        # 임시 파일에 쓰고 rename → 다른 요청이 반쯤 쓰인 파일을 읽지 않도록
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        image.save(tmp_path, format="PNG")
+        os.replace(tmp_path, path)
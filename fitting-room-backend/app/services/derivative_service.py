@@ -0,0 +1,151 @@
+import asyncio
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+from PIL import Image, ImageOps, features
+
+# 형식별 저장 옵션
+SAVE_OPTIONS = {
+    "webp": {"format": "WEBP", "method": 4},
+    "avif": {"format": "AVIF", "speed": 8},
+    "jpeg": {"format": "JPEG", "optimize": True, "progressive": True},
+}
+
+
+def derived_relative(web_path: str, width, fmt: str) -> str:
+    """
+    "/static/clothes/abc.jpg" (또는 "clothes/abc.jpg") → "clothes/abc_256.webp"
+    "/static/results/ab/abcd.png" → "results/ab/abcd_256.webp" (분산 폴더 구조 유지)
+    width 가 "full" 이면 원본 크기 변환본 (abc_full.webp)
+    """
+    relative = web_path.rstrip("/").split("/static/", 1)[-1]
+    stem = os.path.splitext(relative)[0]
+    return f"{stem}_{width}.{fmt}"
+
+
+class DerivativeGenerator:
+    """
+    썸네일/경량 포맷 파생 이미지 생성기
+    원본(/static/clothes/x.jpg, /static/results/y.png)이 저장되면
+    백그라운드 스레드 풀에서 /static/derived/{clothes|results}/{이름}_{너비}.{형식} 을 만든다.
+    full_formats 를 주면 원본 크기 변환본 {이름}_full.{형식} 도 만든다 (원본보다 작을 때만)
+    → /static 에서 Accept 헤더를 보고 원본 URL 그대로 더 작은 파일을 보냄
+    """
+
+    def __init__(self, root: str = "static/derived", sizes: Iterable[int] = (256, 512),
+                 formats: Iterable[str] = ("webp", "avif"), quality: int = 80, workers: int = 2,
+                 full_formats: Iterable[str] = ()):
+        self.DERIVED_DIR = root
+        self.sizes = sorted(set(sizes))
+        self.formats = self._supported(formats)
+        self.full_formats = self._supported(full_formats)
+        self.quality = quality
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="derivative")
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, file_path: str, web_path: str) -> Future:
+        """ 파생 이미지 생성을 백그라운드 풀에 등록 """
+        future = self._executor.submit(self.generate, file_path, web_path)
+        with self._lock:
+            self._pending[web_path] = future
+        future.add_done_callback(lambda _: self._forget(web_path, future))
+        return future
+
+    def generate(self, file_path: str, web_path: str):
+        """ 모든 크기 × 형식 조합 생성 (블로킹) """
+        try:
+            with Image.open(file_path) as source:
+                source_format = source.format
+                if not self.full_formats:
+                    # JPEG은 draft 모드로 필요한 크기 근처까지만 디코딩
+                    source.draft("RGB", (self.sizes[-1], self.sizes[-1]))
+                image = ImageOps.exif_transpose(source)
+                image.load()
+
+            # 원본 크기 변환본 먼저 (variants() 는 마지막 썸네일로 완료 여부를 판단)
+            source_size = os.path.getsize(file_path)
+            for fmt in self.full_formats:
+                if SAVE_OPTIONS[fmt]["format"] != source_format:
+                    self._atomic_save(image, self._file_path(web_path, "full", fmt), fmt, max_size=source_size)
+
+            # 큰 것부터 줄여나가면 매번 원본에서 줄이는 것보다 빠름
+            current = image
+            for width in reversed(self.sizes):
+                if current.width > width:
+                    height = max(1, round(current.height * width / current.width))
+                    current = current.resize((width, height), Image.Resampling.LANCZOS)
+                for fmt in self.formats:
+                    self._atomic_save(current, self._file_path(web_path, width, fmt), fmt)
+        except Exception as e:
+            print(f"   ⚠️ 파생 이미지 생성 실패 ({web_path}): {e}")
+            raise
+
+    def variants(self, web_path: str) -> Dict[str, Dict[str, str]]:
+        """ 이미 만들어진 파생 이미지 URL: {"webp": {"256": url, ...}, ...} (아직이면 빈 dict) """
+        # 가장 마지막에 만들어지는 파일(최소 크기 × 마지막 형식)로 완료 여부 판단 → stat 1회
+        if not self.formats or not os.path.exists(self._file_path(web_path, self.sizes[0], self.formats[-1])):
+            return {}
+        return {
+            fmt: {str(width): self._web_path(web_path, width, fmt) for width in self.sizes}
+            for fmt in self.formats
+        }
+
+    async def variants_when_ready(self, web_path: str, timeout: float) -> Dict[str, Dict[str, str]]:
+        """ 생성 중이면 최대 timeout 초 기다린 뒤 variants 반환 (작업 자체는 취소하지 않음) """
+        with self._lock:
+            future = self._pending.get(web_path)
+        if future is not None and timeout > 0:
+            try:
+                await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+            except Exception:
+                pass
+        return self.variants(web_path)
+
+    def remove(self, web_path: str):
+        """ 원본이 삭제될 때 파생 이미지도 정리 """
+        paths = [self._file_path(web_path, width, fmt) for width in self.sizes for fmt in self.formats]
+        paths += [self._file_path(web_path, "full", fmt) for fmt in self.full_formats]
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _forget(self, web_path: str, future: Future):
+        with self._lock:
+            if self._pending.get(web_path) is future:
+                del self._pending[web_path]
+
+    @staticmethod
+    def _supported(formats: Iterable[str]):
+        supported = []
+        for fmt in formats:
+            if fmt in SAVE_OPTIONS and features.check(fmt if fmt != "jpeg" else "jpg"):
+                supported.append(fmt)
+            else:
+                print(f"   ⚠️ 파생 이미지 형식 '{fmt}' 은(는) 이 환경에서 지원되지 않아 건너뜁니다")
+        return supported
+
+    def _file_path(self, web_path: str, width, fmt: str) -> str:
+        return os.path.join(self.DERIVED_DIR, derived_relative(web_path, width, fmt))
+
+    def _web_path(self, web_path: str, width, fmt: str) -> str:
+        return f"/static/derived/{derived_relative(web_path, width, fmt)}"
+
+    def _atomic_save(self, image: Image.Image, path: str, fmt: str, max_size: Optional[int] = None):
+        """ 임시 파일에 저장 후 교체, max_size 이상이면 버림 (원본보다 크면 변환본 의미 없음) """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        image.save(tmp_path, quality=self.quality, **SAVE_OPTIONS[fmt])
+        if max_size is not None and os.path.getsize(tmp_path) >= max_size:
+            os.remove(tmp_path)
+            return
+        os.replace(tmp_path, path)
@@ -0,0 +1,42 @@
+import os
+from contextlib import contextmanager
+from typing import IO, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 간 잠금 없이 동작 (스레드 잠금만)
+    fcntl = None
+
+
+def _open(path: str) -> IO:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    return open(path, "a")
+
+
+@contextmanager
+def file_lock(path: str):
+    """ 프로세스 간 배타 잠금 (같은 파일을 잠그는 다른 워커는 풀릴 때까지 대기) """
+    with _open(path) as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def try_lock(path: str) -> Optional[IO]:
+    """
+    잠금을 바로 얻으면 열린 파일을 반환 (닫거나 프로세스가 끝나면 해제)
+    이미 다른 프로세스가 잡고 있으면 None
+    """
+    f = _open(path)
+    if fcntl is None:
+        return f
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
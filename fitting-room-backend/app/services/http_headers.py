@@ -0,0 +1,39 @@
+from typing import List, Set, Tuple
+
+
+def parse_accept(header: str) -> List[Tuple[str, float]]:
+    """ Accept / Accept-Encoding 헤더: "image/webp;q=0.9, image/*" → [("image/webp", 0.9), ("image/*", 1.0)] """
+    parsed = []
+    for part in header.split(","):
+        pieces = [p.strip() for p in part.split(";")]
+        if not pieces[0]:
+            continue
+        q = 1.0
+        for param in pieces[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        parsed.append((pieces[0].lower(), q))
+    return parsed
+
+
+def accepted(header: str) -> Set[str]:
+    """ "image/webp;q=0.9, br, gzip;q=0" → {"image/webp", "br"} (q=0 은 거부) """
+    return {token for token, q in parse_accept(header) if q > 0}
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    If-None-Match 약한 비교 (StaticFiles.is_not_modified 와 같은 규칙)
+    - 'W/"a", "b"' 처럼 쉼표로 나열된 태그 중 하나라도 같거나 "*" 이면 True
+    """
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    if "*" in tags:
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in tags if tag}
+
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
@@ -0,0 +1,119 @@
+import numpy as np
+from PIL import Image, ImageEnhance
+
+# PIL 의 RGB → L 변환 계수 (ITU-R 601-2, 16비트 고정소수점)
+_L_WEIGHTS = (np.float32(19595), np.float32(38470), np.float32(7471))
+
+# 한 번에 처리할 행 수: 타일 버퍼가 CPU 캐시에 들어갈 정도로 작게
+TILE_ROWS = 32
+
+
+def enhance_reference(image: Image.Image, sharpness: float, contrast: float, color: float) -> Image.Image:
+    """ 기존 PIL ImageEnhance 3단계 체인 (비교/예외 모드용 기준 구현) """
+    image = ImageEnhance.Sharpness(image).enhance(sharpness)
+    image = ImageEnhance.Contrast(image).enhance(contrast)
+    return ImageEnhance.Color(image).enhance(color)
+
+
+def _luma(pixels: np.ndarray, channels: int, out: np.ndarray) -> np.ndarray:
+    """
+    PIL convert("L") 과 같은 밝기 값: (R*19595 + G*38470 + B*7471 + 0x8000) >> 16
+    중간값이 2^24 미만의 정수라 float32 로도 정확히 계산됨
+    """
+    np.multiply(pixels[:, 0::channels], _L_WEIGHTS[0], out=out)
+    out += pixels[:, 1::channels] * _L_WEIGHTS[1]
+    out += pixels[:, 2::channels] * _L_WEIGHTS[2]
+    out += np.float32(0x8000)
+    out *= np.float32(1 / 65536)
+    np.floor(out, out=out)
+    return out
+
+
+def _blend_(degenerate, image: np.ndarray, factor: float):
+    """ Image.blend(degenerate, image, factor) 를 image 버퍼 안에서 계산 (외삽 후 0~255 로 자르고 소수점 버림) """
+    image -= degenerate
+    image *= np.float32(factor)
+    image += degenerate
+    np.clip(image, 0, 255, out=image)
+    np.floor(image, out=image)
+
+
+def enhance_fused(image: Image.Image, sharpness: float, contrast: float, color: float,
+                  tile_rows: int = TILE_ROWS) -> Image.Image:
+    """
+    Sharpness → Contrast → Color 를 NumPy 로 합쳐서 처리 (PIL 체인과 같은 결과)
+    - 중간 PIL 이미지를 만들지 않고, 미리 할당한 타일 버퍼 몇 개만 재사용
+    - 행 타일 단위로 처리해서 작업 데이터가 캐시 안에 머묾
+      1차: 선명도 + 평균 밝기 합계 / 2차: (평균이 필요한) 대비 + 채도
+    - 알파 채널은 계산에서 빼고 원본 그대로 다시 붙임 (PIL 체인도 알파는 바꾸지 않음)
+    - RGB / RGBA 외의 모드는 기준 구현으로 처리
+    """
+    if image.mode not in ("RGB", "RGBA"):
+        return enhance_reference(image, sharpness, contrast, color)
+
+    pixels = np.asarray(image)
+    h, w, c = pixels.shape
+    row = w * c
+    src = pixels.reshape(h, row)           # 채널이 섞인 한 줄 = 연속 메모리
+    result = np.empty((h, row), dtype=np.uint8)
+
+    tile = max(1, min(tile_rows, h))
+    window = np.empty((tile + 2, row), dtype=np.float32)             # 위아래 한 줄씩 포함한 원본
+    work = np.empty((tile, row), dtype=np.float32)                   # 필터 / 블렌딩 결과
+    row_sums = np.empty((tile + 2, max(w - 2, 0) * c), dtype=np.float32)
+    luma = np.empty((tile, w), dtype=np.float32)
+    gray = np.empty((tile, w, c), dtype=np.float32)
+
+    # 1. Sharpness: SMOOTH(3x3, 가운데 5 / 나머지 1, 합 13) 필터와 블렌딩, 가장자리 픽셀은 원본 유지
+    #    3x3 합 = 가로 3칸 합을 세로로 3줄 더한 것
+    luma_total = 0.0
+    for y0 in range(0, h, tile):
+        y1 = min(h, y0 + tile)
+        n = y1 - y0
+        a0, a1 = max(0, y0 - 1), min(h, y1 + 1)
+        x = window[:a1 - a0]
+        np.copyto(x, src[a0:a1], casting="unsafe")
+        top = y0 - a0
+        current = x[top:top + n]
+        smooth = work[:n]
+        np.copyto(smooth, current)
+
+        first, last = max(y0, 1) - y0, min(y1, h - 1) - y0   # 이미지 맨 위/아래 줄 제외
+        if w > 2 and last > first:
+            sums = row_sums[:a1 - a0]
+            np.add(x[:, :-2 * c], x[:, c:-c], out=sums)
+            sums += x[:, 2 * c:]
+            k, m = first + top, last - first
+            inner = smooth[first:last, c:-c]
+            np.add(sums[k - 1:k - 1 + m], sums[k:k + m], out=inner)
+            inner += sums[k + 1:k + 1 + m]
+            center = sums[k:k + m]   # 이미 다 쓴 가로 합 버퍼를 가운데 가중치 계산에 재사용
+            np.multiply(x[k:k + m, c:-c], np.float32(4), out=center)
+            inner += center
+            inner /= np.float32(13)
+            inner += np.float32(0.5)
+            np.floor(inner, out=inner)
+
+        _blend_(smooth, current, sharpness)
+        luma_total += _luma(current, c, luma[:n]).sum(dtype=np.float64)
+        np.copyto(result[y0:y1], current, casting="unsafe")
+
+    # 2. Contrast: 전체 평균 밝기(정수 반올림)를 기준으로 블렌딩
+    # 3. Color: 픽셀별 회색(밝기) 값을 기준으로 블렌딩
+    mean = np.float32(int(luma_total / (h * w) + 0.5))
+    for y0 in range(0, h, tile):
+        y1 = min(h, y0 + tile)
+        n = y1 - y0
+        block = work[:n]
+        np.copyto(block, result[y0:y1], casting="unsafe")
+        _blend_(mean, block, contrast)
+
+        block_gray = gray[:n]
+        block_gray[...] = _luma(block, c, luma[:n])[..., None]
+        _blend_(block_gray.reshape(n, row), block, color)
+        np.copyto(result[y0:y1], block, casting="unsafe")
+
+    out = result.reshape(h, w, c)
+    if c == 4:
+        out[..., 3] = pixels[..., 3]
+    return Image.fromarray(out, image.mode)
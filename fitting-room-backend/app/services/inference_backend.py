@@ -0,0 +1,296 @@
+import hashlib
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+from gradio_client import handle_file
+from PIL import Image, ImageOps
+
+from app.services.inference_client import RemoteInferenceClient, InferenceError
+from app.services.metrics import timed
+from app.services.preprocess_service import PreparedImage
+from app.services.staging_service import InputStager
+
+
+def _person_image(person) -> Image.Image:
+    """ PIL 이미지 또는 PreparedImage → PIL 이미지 """
+    return person.image if isinstance(person, PreparedImage) else person
+
+
+class InferenceBackend(ABC):
+    """
+    가상 피팅 추론 백엔드 (INFERENCE_BACKEND 설정으로 선택)
+    입력: 사람 사진(PIL 또는 PreparedImage), 화질 개선까지 끝난 옷 이미지, IDM-VTON 옷 설명, steps, seed
+    출력: 결과 PIL 이미지 (실패 시 InferenceError)
+    """
+    name = "base"
+
+    def connect(self):
+        """ 서버 시작 시 연결 / 모델 로딩 (필요한 백엔드만) """
+
+    def warmup(self):
+        """ 연결 후 첫 요청 전에 한 번: 첫 호출 비용(그래프 최적화, 메모리 할당 등)을 미리 치름 """
+
+    @abstractmethod
+    def try_on(self, person, cloth: Image.Image, vton_desc: str, steps: int, seed: int) -> Image.Image:
+        ...
+
+    def identity(self) -> str:
+        """ 결과를 만든 백엔드 / 모델 식별자 (결과 캐시 키에 포함 → 스텁 결과가 실제 결과로 재사용되지 않도록) """
+        return self.name
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class GradioBackend(InferenceBackend):
+    """ 원격 IDM-VTON Gradio Space (입력 파일 스테이징 → 원격 예측 → 결과 파일 열기) """
+    name = "gradio"
+
+    def __init__(self, inference: RemoteInferenceClient, stager: InputStager, api_name: str = "/tryon"):
+        self.inference = inference
+        self.stager = stager
+        self.api_name = api_name
+
+    def connect(self):
+        self.inference.connect()
+
+    def identity(self) -> str:
+        spaces = ",".join(sorted(endpoint.src for endpoint in self.inference.endpoints))
+        return f"{self.name}:{spaces}:{self.api_name}"
+
+    def try_on(self, person, cloth: Image.Image, vton_desc: str, steps: int, seed: int) -> Image.Image:
+        # 입력 파일 스테이징: 요청별 핸들 → 동시 요청 안전, 끝나면 자동 삭제
+        with self.stager.open() as staged:
+            with timed("stage_inputs"):
+                if isinstance(person, PreparedImage):
+                    # 전처리에서 이미 모델 해상도 + 전송용 형식으로 인코딩됨 → 그대로 기록
+                    person_path = staged.add_bytes(person.data, person.ext)
+                else:
+                    person_path = staged.add_image(person)
+                cloth_path = staged.add_image(cloth)
+
+            print("   🚀 원격 GPU로 데이터 전송 및 처리 시작 (약 15~30초 소요)...")
+
+            # 실패 시 옷 이미지를 몰래 돌려주지 않고 InferenceError 를 그대로 올림 (API에서 502/503 처리)
+            # (gradio_client 는 결과 파일 다운로드까지 끝낸 뒤 경로를 돌려줌 → 다운로드 시간 포함)
+            with timed("remote_predict"):
+                result = self.inference.predict(
+                    {"background": handle_file(person_path), "layers": [], "composite": None},
+                    handle_file(cloth_path),
+                    vton_desc,
+                    True,   # Auto-masking
+                    steps,
+                    seed,
+                    api_name=self.api_name
+                )
+
+        print(f"   ✅ 처리 완료! 결과 경로: {result}")
+
+        if not result:
+            raise InferenceError("서버응답이 비어있습니다")
+
+        final_image_path = result[0] if isinstance(result, (list, tuple)) else result
+        with timed("result_load"):
+            final_image = Image.open(final_image_path)
+            final_image.load()
+        return final_image
+
+    # warmup: 원격 GPU 추론은 15~30초 + 공유 GPU 사용이라 시작할 때마다 돌리지 않음 (connect 로 API 정보만 미리 받음)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, **self.inference.stats()}
+
+
+class StubBackend(InferenceBackend):
+    """
+    오프라인 스텁: 원격 GPU 없이 우리 서버 오버헤드만 측정할 때 (부하 테스트, 회귀 테스트)
+    - 결과는 입력에서 결정적으로 계산 (사람 사진 위에 옷을 합성) → 같은 입력이면 같은 결과
+    - latency(+ jitter) 만큼 대기해서 원격 추론 시간을 흉내 냄, jitter 도 입력 기준으로 결정적
+    - concurrency > 0 이면 동시에 처리하는 수를 제한 (원격 GPU 슬롯 수 흉내)
+    """
+    name = "stub"
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0,
+                 output_size: Tuple[int, int] = (768, 1024), concurrency: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.output_size = output_size
+        self.concurrency = concurrency
+        self._semaphore = threading.BoundedSemaphore(concurrency) if concurrency > 0 else None
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.in_flight = 0
+
+    def identity(self) -> str:
+        return f"{self.name}:{self.output_size[0]}x{self.output_size[1]}"
+
+    def try_on(self, person, cloth: Image.Image, vton_desc: str, steps: int, seed: int) -> Image.Image:
+        if self._semaphore is not None:
+            with self._semaphore:
+                return self._run(person, cloth, vton_desc, steps, seed)
+        return self._run(person, cloth, vton_desc, steps, seed)
+
+    def _run(self, person, cloth: Image.Image, vton_desc: str, steps: int, seed: int) -> Image.Image:
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+        try:
+            with timed("stub_render"):
+                result = self.render(_person_image(person), cloth, vton_desc, steps, seed)
+            if self.latency or self.jitter:
+                digest = hashlib.sha256(result.tobytes()).digest()
+                time.sleep(self.latency + self.jitter * random.Random(digest).random())
+            return result
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def warmup(self):
+        # 지연 흉내 없이 합성만 한 번
+        self.render(Image.new("RGB", (64, 64), "white"), Image.new("RGB", (32, 32), "gray"), "shirt", 1, 0)
+
+    def render(self, person: Image.Image, cloth: Image.Image, vton_desc: str, steps: int, seed: int) -> Image.Image:
+        """ 사람 사진을 출력 크기로 맞추고 옷을 몸통 위치에 합성 """
+        width, height = self.output_size
+        result = ImageOps.fit(person.convert("RGB"), self.output_size)
+        top = height // 2 if vton_desc == "trousers" else height // 5
+        garment = cloth.convert("RGBA")
+        garment.thumbnail((width * 3 // 5, height * 2 // 5))
+        result.paste(garment, ((width - garment.width) // 2, top), garment)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "calls": self.calls,
+            "in_flight": self.in_flight,
+            "latency": self.latency,
+            "jitter": self.jitter,
+            "concurrency": self.concurrency,
+        }
+
+
+class OnnxBackend(InferenceBackend):
+    """
+    로컬 ONNX 모델 연결 지점 (onnxruntime 필요)
+    모델 입출력 규약:
+    - 입력 "person", "cloth": float32 [1, 3, H, W], RGB 0~1 (H, W 는 모델 입력 크기, 동적이면 input_size)
+    - 선택 입력 "category": int64 [1] (CATEGORY_IDS), "seed": int64 [1]
+    - 첫 번째 출력: float32 [1, 3, H, W], RGB 0~1
+    """
+    name = "onnx"
+    CATEGORY_IDS = {"shirt": 0, "short sleeve shirt": 0, "trousers": 1, "dress": 2}
+
+    def __init__(self, model_path: str, providers: Optional[List[str]] = None,
+                 input_size: Tuple[int, int] = (768, 1024)):
+        self.model_path = model_path
+        self.requested_providers = providers
+        self.providers: List[str] = []
+        self.input_size = input_size
+        self.session = None
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def identity(self) -> str:
+        """ 모델 파일 경로 + 크기 + 수정 시각 (모델을 바꾸면 캐시도 새로) """
+        try:
+            st = os.stat(self.model_path)
+        except OSError:
+            return f"{self.name}:{self.model_path}"
+        return f"{self.name}:{os.path.abspath(self.model_path)}:{st.st_size}:{st.st_mtime_ns}"
+
+    def connect(self):
+        if self.session is not None:
+            return
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise InferenceError(f"onnxruntime is not installed: {e}")
+        from app.services.rembg_pool import select_providers
+        self.providers = select_providers(self.requested_providers)
+        self.session = ort.InferenceSession(self.model_path, providers=self.providers)
+        shape = self.session.get_inputs()[0].shape
+        if isinstance(shape[-1], int) and isinstance(shape[-2], int):
+            self.input_size = (shape[-1], shape[-2])
+        print(f"   ✅ ONNX 피팅 모델 로드: {self.model_path} ({', '.join(self.providers)})")
+
+    def warmup(self):
+        # 빈 입력으로 한 번 실행 → 첫 요청이 세션 초기화 비용을 치르지 않음
+        blank = Image.new("RGB", self.input_size, "white")
+        self.try_on(blank, blank, "shirt", 1, 0)
+
+    def try_on(self, person, cloth: Image.Image, vton_desc: str, steps: int, seed: int) -> Image.Image:
+        import numpy as np
+        if self.session is None:
+            self.connect()
+
+        def tensor(image: Image.Image):
+            fitted = ImageOps.pad(image.convert("RGB"), self.input_size, color=(255, 255, 255))
+            return (np.asarray(fitted, dtype=np.float32) / 255.0).transpose(2, 0, 1)[None]
+
+        feeds = {"person": tensor(_person_image(person)), "cloth": tensor(cloth)}
+        names = {i.name for i in self.session.get_inputs()}
+        if "category" in names:
+            feeds["category"] = np.array([self.CATEGORY_IDS.get(vton_desc, 0)], dtype=np.int64)
+        if "seed" in names:
+            feeds["seed"] = np.array([seed], dtype=np.int64)
+
+        with self._lock:
+            self.calls += 1
+        try:
+            with timed("onnx_run"):
+                output = self.session.run(None, feeds)[0]
+        except Exception as e:
+            raise InferenceError(f"ONNX inference failed: {e}")
+        pixels = (np.clip(output[0].transpose(1, 2, 0), 0, 1) * 255 + 0.5).astype(np.uint8)
+        return Image.fromarray(pixels, "RGB")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "model": self.model_path,
+            "providers": self.providers,
+            "loaded": self.session is not None,
+            "calls": self.calls,
+        }
+
+
+def create_backend(kind: str, stager: InputStager = None,
+                   inference: RemoteInferenceClient = None) -> InferenceBackend:
+    """ 설정값(INFERENCE_BACKEND)으로 백엔드 생성: gradio | stub | onnx """
+    from app import config
+    if kind == "gradio":
+        return GradioBackend(
+            inference=inference or RemoteInferenceClient(
+                endpoints=config.VTON_ENDPOINTS,
+                max_in_flight=config.VTON_MAX_IN_FLIGHT,
+                timeout=config.VTON_TIMEOUT,
+                retries=config.VTON_RETRIES,
+                backoff_base=config.VTON_BACKOFF_BASE,
+                backoff_max=config.VTON_BACKOFF_MAX,
+                failure_threshold=config.VTON_BREAKER_THRESHOLD,
+                reset_timeout=config.VTON_BREAKER_RESET,
+            ),
+            stager=stager or InputStager(
+                root=config.STAGING_DIR,
+                backing=config.STAGING_BACKING,
+                png_compress_level=config.STAGING_PNG_COMPRESS_LEVEL,
+            ),
+        )
+    if kind == "stub":
+        return StubBackend(
+            latency=config.STUB_LATENCY,
+            jitter=config.STUB_JITTER,
+            output_size=config.STUB_OUTPUT_SIZE,
+            concurrency=config.STUB_CONCURRENCY,
+        )
+    if kind == "onnx":
+        return OnnxBackend(
+            model_path=config.ONNX_MODEL_PATH,
+            providers=config.ONNX_PROVIDERS,
+            input_size=config.PERSON_TARGET_SIZE,
+        )
+    raise ValueError(f"Unknown inference backend: {kind}")
@@ -0,0 +1,256 @@
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+# 회로 차단기 상태
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class InferenceError(Exception):
+    """ 원격 추론 실패 (재시도까지 모두 실패) """
+
+
+class InferenceRejectedError(InferenceError):
+    """ 원격이 요청 자체를 거절함 (입력 검증 실패 등) → 재시도하지 않음 """
+
+
+class InferenceUnavailableError(InferenceError):
+    """ 모든 엔드포인트의 회로 차단기가 열려 있음 → 바로 실패 """
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Inference backend is unavailable, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class EndpointConnectError(ConnectionError):
+    """ 엔드포인트 클라이언트 생성(연결) 실패 """
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    재시도하면 나을 수 있는 실패인지 (타임아웃 / 연결 / 전송 오류, 5xx / 429 응답)
+    입력 검증 실패, 잘못된 인자 같은 오류는 몇 번을 보내도 같으므로 재시도 / 차단기 집계에서 제외
+    """
+    if isinstance(error, (TimeoutError, ConnectionError, OSError)):
+        return True
+    try:
+        import httpx
+        if isinstance(error, httpx.TransportError):
+            return True
+    except ImportError:
+        pass
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return isinstance(status, int) and (status >= 500 or status == 429)
+
+
+class CircuitBreaker:
+    """
+    연속 실패가 failure_threshold 번 쌓이면 열림(OPEN) → reset_timeout 동안 호출 차단
+    시간이 지나면 HALF_OPEN 으로 한 번 시험 호출, 성공하면 다시 CLOSED
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def retry_after(self) -> float:
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    print(f"   🔌 회로 차단기 OPEN (연속 실패 {self.failures}회)")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+
+class Endpoint:
+    """ 원격 추론 엔드포인트 하나 (Gradio Space 이름 또는 URL) + 클라이언트/차단기/지표 """
+
+    def __init__(self, src: str, breaker: CircuitBreaker):
+        self.src = src
+        self.breaker = breaker
+        self.client = None
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.latencies = deque(maxlen=500)  # 최근 호출 지연시간(초)
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+
+        def percentile(q):
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "latency_avg": sum(latencies) / len(latencies) if latencies else None,
+            "latency_p50": percentile(0.50),
+            "latency_p95": percentile(0.95),
+            "circuit": self.breaker.state,
+            "connected": self.client is not None,
+        }
+
+
+def _gradio_client(src: str):
+    from gradio_client import Client
+    return Client(src)
+
+
+class RemoteInferenceClient:
+    """
+    원격 추론(Gradio) 클라이언트 계층
+    - 엔드포인트 여러 개를 돌아가며 사용 (회로가 열린 곳은 건너뜀)
+    - 동시에 진행 중인 예측 수를 세마포어로 제한 (재시도 대기 중에는 자리를 비워 둠)
+    - 호출별 타임아웃, 지터가 섞인 지수 백오프 재시도 (일시적인 실패만, 나머지는 바로 호출자에게)
+    """
+
+    def __init__(self, endpoints: List[str], max_in_flight: int = 2, timeout: float = 120.0,
+                 retries: int = 2, backoff_base: float = 1.0, backoff_max: float = 10.0,
+                 failure_threshold: int = 5, reset_timeout: float = 60.0,
+                 client_factory: Optional[Callable[[str], Any]] = None):
+        self.endpoints = [Endpoint(src, CircuitBreaker(failure_threshold, reset_timeout)) for src in endpoints]
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._client_factory = client_factory or _gradio_client
+        self._semaphore = threading.BoundedSemaphore(max_in_flight)
+        self._rotation = itertools.cycle(range(len(self.endpoints)))
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def connect(self):
+        """ 모든 엔드포인트에 미리 연결 (실패한 곳은 첫 호출 때 다시 시도) """
+        for endpoint in self.endpoints:
+            try:
+                self._get_client(endpoint)
+                print(f"   ✅ 추론 엔드포인트 연결 성공: {endpoint.src}")
+            except Exception as e:
+                print(f"   ❌ 추론 엔드포인트 연결 실패 ({endpoint.src}): {e}")
+
+    def predict(self, *args, api_name: str) -> Any:
+        return self._predict_with_retry(args, api_name)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "endpoints": {endpoint.src: endpoint.stats() for endpoint in self.endpoints},
+        }
+
+    @contextmanager
+    def _slot(self):
+        """ 동시 예측 자리 하나 (시도 한 번 동안만 잡음) """
+        with self._semaphore:
+            with self._lock:
+                self.in_flight += 1
+            try:
+                yield
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+
+    def _predict_with_retry(self, args, api_name: str) -> Any:
+        last_error: Optional[Exception] = None
+        for attempt in range(self.retries + 1):
+            with self._slot():
+                endpoint = self._pick_endpoint()
+                if endpoint is None:
+                    retry_after = min(e.breaker.retry_after() for e in self.endpoints)
+                    raise InferenceUnavailableError(max(1, int(retry_after + 0.5)))
+
+                try:
+                    return self._call(endpoint, args, api_name)
+                except Exception as e:
+                    if not is_transient(e):
+                        # 잘못된 요청 등 → 재시도해도 같은 결과, 바로 실패
+                        raise InferenceRejectedError(f"Inference rejected by {endpoint.src}: {e}") from e
+                    last_error = e
+                    print(f"   ⚠️ 추론 실패 ({endpoint.src}, 시도 {attempt + 1}/{self.retries + 1}): {e}")
+
+            if attempt < self.retries:
+                # full jitter: 0 ~ min(max, base * 2^attempt) 사이 랜덤 대기 (자리는 반납한 상태)
+                time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+
+        raise InferenceError(f"Inference failed after {self.retries + 1} attempts: {last_error}")
+
+    def _pick_endpoint(self) -> Optional[Endpoint]:
+        with self._lock:
+            for _ in range(len(self.endpoints)):
+                endpoint = self.endpoints[next(self._rotation)]
+                if endpoint.breaker.allow():
+                    return endpoint
+        return None
+
+    def _call(self, endpoint: Endpoint, args, api_name: str) -> Any:
+        endpoint.calls += 1
+        t0 = time.perf_counter()
+        try:
+            client = self._get_client(endpoint)
+            job = client.submit(*args, api_name=api_name)
+            try:
+                result = job.result(timeout=self.timeout)
+            except TimeoutError:
+                endpoint.timeouts += 1
+                job.cancel()
+                raise
+        except Exception as e:
+            endpoint.errors += 1
+            if is_transient(e):
+                endpoint.breaker.record_failure()
+            else:
+                # 엔드포인트는 응답함 (요청 자체의 문제) → 차단기에는 정상으로 기록 (HALF_OPEN 시험도 끝냄)
+                endpoint.breaker.record_success()
+            raise
+        finally:
+            endpoint.latencies.append(time.perf_counter() - t0)
+
+        endpoint.breaker.record_success()
+        return result
+
+    def _get_client(self, endpoint: Endpoint):
+        if endpoint.client is None:
+            try:
+                endpoint.client = self._client_factory(endpoint.src)
+            except Exception as e:
+                # Space 가 자는 중 / 설정을 못 받음 등 → 연결 실패로 보고 재시도
+                raise EndpointConnectError(f"Could not connect to {endpoint.src}: {e}") from e
+        return endpoint.client
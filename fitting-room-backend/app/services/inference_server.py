@@ -0,0 +1,341 @@
+import argparse
+import os
+import secrets
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from app.services.inference_backend import InferenceBackend
+from app.services.file_lock import file_lock
+from app.services.inference_client import InferenceError, InferenceRejectedError, InferenceUnavailableError
+from app.services.metrics import timed
+
+Address = Union[str, Tuple[str, int]]
+
+AUTHKEY_ENV = "INFERENCE_SERVER_AUTHKEY"
+
+
+def parse_address(address: str) -> Address:
+    """ "127.0.0.1:7100" → ("127.0.0.1", 7100), 그 밖에는 유닉스 소켓 경로 """
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address:
+        return host or "127.0.0.1", int(port)
+    return address
+
+
+def resolve_authkey(address: str, configured: str = "", key_file: str = "data/inference.key") -> bytes:
+    """
+    IPC 인증 키: recv() 가 받은 것을 그대로 unpickle 하므로 키를 아는 쪽만 접속할 수 있어야 함
+    - 설정값이 있으면 그대로 사용
+    - TCP 주소인데 설정값이 없으면 시작 거부 (다른 호스트에서도 닿을 수 있음)
+    - 유닉스 소켓이면 key_file 에서 읽고, 없으면 무작위 키를 만들어 0600 으로 저장 (워커 / 추론 서버가 공유)
+    """
+    if configured:
+        return configured.encode()
+    if isinstance(parse_address(address), tuple):
+        raise ValueError("A TCP inference server address requires INFERENCE_SERVER_AUTHKEY to be set")
+    with file_lock(key_file + ".lock"):
+        if os.path.exists(key_file):
+            with open(key_file, "rb") as f:
+                key = f.read().strip()
+            if key:
+                return key
+        key = secrets.token_hex(32).encode()
+        tmp_path = f"{key_file}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+        os.replace(tmp_path, key_file)
+        return key
+
+
+class InferenceServer:
+    """
+    추론 전용 프로세스: 모델(rembg 세션 풀, 추론 백엔드 / Gradio 클라이언트)은 여기서 한 번만 로드
+    uvicorn 워커들은 로컬 IPC(multiprocessing.connection: 유닉스 소켓 또는 TCP + authkey)로 요청
+    - 연결마다 스레드 하나, 요청 = (op, args) → ("ok", 값) 또는 ("error", 예외 이름, 메시지, retry_after)
+    - PIL 이미지 / PreparedImage 는 pickle 로 그대로 전달
+    """
+
+    def __init__(self, engine, address: Address, authkey: bytes):
+        self.engine = engine
+        self.address = address
+        self.authkey = authkey
+        self._listener: Optional[Listener] = None
+        self._closed = threading.Event()
+        self._lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+
+    def serve_forever(self):
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)  # 이전 실행에서 남은 소켓 파일
+        self._listener = Listener(self.address, authkey=self.authkey, backlog=64)
+        if isinstance(self.address, str):
+            os.chmod(self.address, 0o600)  # 같은 사용자(워커)만 접속
+        print(f"🛰️ 추론 서버 대기 중: {self.address}")
+        while not self._closed.is_set():
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                if self._closed.is_set():
+                    break
+                continue  # 인증 실패 / 중간에 끊긴 연결
+            threading.Thread(target=self.handle, args=(conn,), daemon=True, name="inference-conn").start()
+
+    def handle(self, conn: Connection):
+        with self._lock:
+            self.connections += 1
+        try:
+            while True:
+                try:
+                    op, args = conn.recv()
+                except (EOFError, OSError):
+                    break
+                try:
+                    reply = ("ok", self.dispatch(op, args))
+                except Exception as e:
+                    reply = ("error", type(e).__name__, str(e), getattr(e, "retry_after", None))
+                try:
+                    conn.send(reply)
+                except (OSError, ValueError):
+                    break
+        finally:
+            with self._lock:
+                self.connections -= 1
+            conn.close()
+
+    def dispatch(self, op: str, args: tuple) -> Any:
+        with self._lock:
+            self.requests += 1
+        if op == "try_on":
+            return self.engine.backend.try_on(*args)
+        if op == "remove_background":
+            return self.engine.remove_background(*args)
+        if op == "stats":
+            return self.stats()
+        if op == "warmup":
+            return self.engine.backend.warmup()
+        if op == "identity":
+            return self.engine.backend.identity()
+        if op == "ping":
+            return "pong"
+        raise ValueError(f"Unknown operation: {op}")
+
+    def stats(self) -> Dict[str, Any]:
+        rembg_pool = self.engine.rembg_pool
+        return {
+            "pid": os.getpid(),
+            "connections": self.connections,
+            "requests": self.requests,
+            "backend": self.engine.backend.stats(),
+            "rembg": rembg_pool.stats() if rembg_pool is not None else None,
+        }
+
+    def close(self):
+        self._closed.set()
+        if self._listener is not None:
+            self._listener.close()
+
+
+class InferenceProxy(InferenceBackend):
+    """
+    워커 쪽: 추론 서버에 요청을 넘기는 백엔드 (AIEngine 의 backend 와 rembg_pool 자리에 그대로 넣음)
+    - 연결은 풀로 재사용, 동시에 max_connections 개까지 (연결 하나 = 진행 중 요청 하나)
+    - 서버에 연결할 수 없으면 InferenceUnavailableError → API 503
+    """
+    name = "proxy"
+
+    def __init__(self, address: Address, authkey: bytes, max_connections: int = 8,
+                 connect_timeout: float = 60.0, retry_after: int = 5):
+        self.address = address
+        self.authkey = authkey
+        self.max_connections = max_connections
+        self.connect_timeout = connect_timeout
+        self.retry_after = retry_after
+        self._idle: List[Connection] = []
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.in_flight = 0
+        self.reconnects = 0
+        self._identity: Optional[str] = None
+
+    def connect(self):
+        """ 서버가 뜰 때까지 (모델 로딩 포함) connect_timeout 초 동안 재시도 """
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            try:
+                self.call("ping")
+                return
+            except InferenceUnavailableError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.5)
+
+    def warmup(self):
+        self.call("warmup")
+
+    def identity(self) -> str:
+        """ 서버 쪽 실제 백엔드의 식별자 (한 번 받아서 기억) """
+        if self._identity is None:
+            self._identity = self.call("identity")
+        return self._identity
+
+    def try_on(self, person, cloth, vton_desc: str, steps: int, seed: int):
+        with timed("ipc_try_on"):
+            return self.call("try_on", person, cloth, vton_desc, steps, seed)
+
+    def remove(self, image):
+        """ RembgSessionPool.remove 와 같은 모양 → AIEngine(rembg_pool=proxy) """
+        with timed("ipc_remove_background"):
+            return self.call("remove_background", image)
+
+    def call(self, op: str, *args) -> Any:
+        with self._slots:
+            with self._lock:
+                self.calls += 1
+                self.in_flight += 1
+            try:
+                return self._call(op, args)
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        local = {
+            "backend": self.name,
+            "address": str(self.address),
+            "calls": self.calls,
+            "in_flight": self.in_flight,
+            "idle_connections": len(self._idle),
+            "reconnects": self.reconnects,
+        }
+        try:
+            local["server"] = self.call("stats")
+        except InferenceError as e:
+            local["server"] = {"error": str(e)}
+        return local
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def _call(self, op: str, args: tuple) -> Any:
+        for attempt in range(2):
+            conn, fresh = self._checkout()
+            pooled = sent = False
+            try:
+                try:
+                    conn.send((op, args))
+                    sent = True
+                    reply = conn.recv()
+                except (EOFError, OSError) as e:
+                    # 보낸 뒤의 실패는 서버가 이미 실행했을 수 있음 → 다시 보내지 않음 (피팅이 두 번 돌지 않도록)
+                    if sent or fresh or attempt:
+                        raise InferenceUnavailableError(self.retry_after) from e
+                    # 쉬고 있던 연결이 끊겨 있었음 (서버 재시작 등) → 새 연결로 한 번 더
+                    with self._lock:
+                        self.reconnects += 1
+                    continue
+                with self._lock:
+                    self._idle.append(conn)
+                pooled = True
+                return self._unwrap(reply)
+            finally:
+                if not pooled:
+                    conn.close()  # 직렬화 실패 등 어떤 이유로든 풀에 돌려놓지 않은 연결은 닫음
+
+    def _checkout(self) -> Tuple[Connection, bool]:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn = self._idle.pop()
+            try:
+                stale = conn.poll()  # 쉬는 연결에 읽을 게 있으면 서버가 닫은 것(EOF) → 보내기 전에 버림
+            except (EOFError, OSError):
+                stale = True
+            if not stale:
+                return conn, False
+            conn.close()
+            with self._lock:
+                self.reconnects += 1
+        try:
+            return Client(self.address, authkey=self.authkey), True
+        except OSError as e:
+            raise InferenceUnavailableError(self.retry_after) from e
+
+    @staticmethod
+    def _unwrap(reply: tuple) -> Any:
+        if reply[0] == "ok":
+            return reply[1]
+        _, kind, message, retry_after = reply
+        if kind == "InferenceUnavailableError":
+            raise InferenceUnavailableError(retry_after or 5)
+        if kind == "InferenceRejectedError":
+            raise InferenceRejectedError(message)
+        if kind == "InferenceError":
+            raise InferenceError(message)
+        raise RuntimeError(f"{kind}: {message}")
+
+
+def spawn(address: str, authkey: bytes) -> subprocess.Popen:
+    """
+    추론 서버를 별도 프로세스로 실행 (uvicorn 워커는 데몬 프로세스라 multiprocessing 자식을 못 만듦 → subprocess)
+    authkey 는 명령줄 대신 환경변수로 전달
+    """
+    env = {**os.environ, AUTHKEY_ENV: authkey.decode()}
+    return subprocess.Popen([sys.executable, "-m", "app.services.inference_server", "--address", address], env=env)
+
+
+def build_engine():
+    """ 설정대로 rembg 세션 풀 + 추론 백엔드를 만들고 연결 (블로킹) """
+    from app import config
+    from app.services.ai_service import AIEngine
+    from app.services.rembg_pool import RembgSessionPool
+    from app.services.staging_service import InputStager
+
+    rembg_pool = None
+    if config.BACKGROUND_REMOVAL == "rembg":
+        rembg_pool = RembgSessionPool(
+            model_name=config.REMBG_MODEL,
+            size=config.REMBG_SESSIONS,
+            providers=config.REMBG_PROVIDERS,
+            intra_op_threads=config.REMBG_THREADS,
+        )
+        rembg_pool.start()
+    stager = InputStager(
+        root=config.STAGING_DIR,
+        backing=config.STAGING_BACKING,
+        png_compress_level=config.STAGING_PNG_COMPRESS_LEVEL,
+    )
+    stager.purge()
+    return AIEngine(rembg_pool=rembg_pool, stager=stager)
+
+
+def main():
+    from app import config
+    parser = argparse.ArgumentParser(description="Run the shared try-on inference process")
+    parser.add_argument("--address", default=config.INFERENCE_SERVER or "data/inference.sock")
+    args = parser.parse_args()
+
+    env_key = os.getenv(AUTHKEY_ENV)
+    authkey = env_key.encode() if env_key else resolve_authkey(
+        args.address, config.INFERENCE_SERVER_AUTHKEY, config.INFERENCE_SERVER_AUTHKEY_FILE)
+    server = InferenceServer(build_engine(), parse_address(args.address), authkey)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import asyncio
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+# 작업 상태값
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED_STATES = (SUCCEEDED, FAILED)
+
+
+class QueueFullError(Exception):
+    """ 대기열이 가득 찼을 때 발생 (retry_after 초 뒤에 다시 시도) """
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Try-on queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+@dataclass
+class TryOnJob:
+    id: str
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TryOnJob":
+        return cls(id=data["job_id"], status=data["status"], created_at=data["created_at"],
+                   started_at=data["started_at"], finished_at=data["finished_at"],
+                   result=data["result"], error=data["error"])
+
+
+class SharedJobStore:
+    """
+    여러 워커가 같이 보는 작업 상태 (SQLite, WAL)
+    작업은 접수한 워커가 실행하고, 상태가 바뀔 때마다 여기에 기록 → 다른 워커로 간 상태 조회도 응답 가능
+    """
+
+    def __init__(self, path: str = "data/jobs.sqlite3"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, data TEXT NOT NULL, finished_at REAL)")
+
+    def save(self, job: TryOnJob):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO jobs (id, data, finished_at) VALUES (?, ?, ?)",
+                               (job.id, json.dumps(job.to_dict()), job.finished_at))
+
+    def load(self, job_id: str) -> Optional[TryOnJob]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return TryOnJob.from_dict(json.loads(row[0])) if row else None
+
+    def prune(self, cutoff: float):
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (cutoff,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class TryOnJobQueue:
+    """
+    피팅 작업 큐: 요청은 작업 ID만 바로 돌려주고,
+    정해진 수의 워커가 스레드에서 (블로킹) 파이프라인을 실행한다.
+    shared: 여러 uvicorn 워커일 때 상태를 공유하는 SharedJobStore (다른 워커가 접수한 작업도 조회 가능)
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 16,
+                 job_ttl: float = 600.0, default_retry_after: int = 30,
+                 shared: Optional[SharedJobStore] = None, poll_interval: float = 0.5):
+        self.worker_count = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self.job_ttl = job_ttl
+        self.default_retry_after = default_retry_after
+        self.shared = shared
+        self.poll_interval = poll_interval   # 다른 워커의 작업 이벤트를 볼 때 공유 상태를 다시 읽는 간격(초)
+
+        self.jobs: Dict[str, TryOnJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        self._changed: Optional[asyncio.Condition] = None
+        self._avg_duration: Optional[float] = None  # 작업 처리시간 이동평균(초)
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._changed = asyncio.Condition()
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.worker_count)]
+        print(f"🧵 Try-on 작업 큐 시작: 워커 {self.worker_count}개, 대기열 {self.max_queue}")
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self.shared is not None:
+            self.shared.close()
+
+    def submit(self, fn: Callable[..., Dict[str, Any]], *args) -> TryOnJob:
+        """ 작업 등록 (대기열이 가득 차면 QueueFullError) """
+        self._prune()
+        job = TryOnJob(id=uuid.uuid4().hex)
+        try:
+            self._queue.put_nowait((job, fn, args))
+        except asyncio.QueueFull:
+            raise QueueFullError(self.retry_after())
+        self.jobs[job.id] = job
+        self._publish(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[TryOnJob]:
+        job = self.jobs.get(job_id)
+        if job is None and self.shared is not None:
+            return self.shared.load(job_id)  # 다른 워커가 접수한 작업
+        return job
+
+    def retry_after(self) -> int:
+        """ 지금 대기열이 한 칸 빌 때까지 걸릴 것으로 예상되는 시간(초) """
+        if self._avg_duration is None:
+            return self.default_retry_after
+        waiting = self._queue.qsize() if self._queue else 0
+        return max(1, math.ceil(self._avg_duration * (waiting + 1) / self.worker_count))
+
+    async def events(self, job_id: str, keepalive: float = 15.0):
+        """ 작업 상태가 바뀔 때마다 스냅샷을 내보내는 비동기 제너레이터 (SSE용), 끝나면 종료 """
+        last = None
+        idle = 0.0
+        while True:
+            job = self.jobs.get(job_id)
+            remote = job is None
+            if remote:
+                job = await asyncio.to_thread(self.get, job_id)
+            if job is None:
+                return
+            snapshot = job.to_dict()
+            if snapshot != last:
+                last = snapshot
+                idle = 0.0
+                yield snapshot
+            if job.status in FINISHED_STATES:
+                return
+            if remote:
+                # 다른 워커의 작업: 알림을 받을 수 없으므로 공유 상태를 주기적으로 다시 읽음
+                await asyncio.sleep(self.poll_interval)
+                idle += self.poll_interval
+                if idle >= keepalive:
+                    idle = 0.0
+                    yield None  # keep-alive
+                continue
+            async with self._changed:
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield None  # keep-alive
+
+    def stats(self) -> Dict[str, Any]:
+        counts = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+        for job in self.jobs.values():
+            counts[job.status] += 1
+        return {
+            "workers": self.worker_count,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue": self.max_queue,
+            "avg_duration": self._avg_duration,
+            "jobs": counts,
+        }
+
+    async def _worker(self, index: int):
+        while True:
+            job, fn, args = await self._queue.get()
+            try:
+                job.status = RUNNING
+                job.started_at = time.time()
+                await self._notify(job)
+                try:
+                    # 블로킹 파이프라인은 스레드에서 실행 → 이벤트 루프는 계속 응답 가능
+                    job.result = await asyncio.to_thread(fn, *args)
+                    job.status = SUCCEEDED
+                except Exception as e:
+                    print(f"   💥 피팅 작업 {job.id} 실패: {e}")
+                    job.error = str(e)
+                    job.status = FAILED
+                job.finished_at = time.time()
+                self._record_duration(job.finished_at - job.started_at)
+                await self._notify(job)
+            finally:
+                self._queue.task_done()
+
+    async def _notify(self, job: TryOnJob):
+        self._publish(job)
+        async with self._changed:
+            self._changed.notify_all()
+
+    def _publish(self, job: TryOnJob):
+        if self.shared is not None:
+            try:
+                self.shared.save(job)
+            except sqlite3.Error as e:
+                print(f"   ⚠️ 작업 상태 공유 실패 {job.id}: {e}")
+
+    def _record_duration(self, seconds: float):
+        if self._avg_duration is None:
+            self._avg_duration = seconds
+        else:
+            self._avg_duration = 0.8 * self._avg_duration + 0.2 * seconds
+
+    def _prune(self):
+        """ TTL이 지난 완료 작업 정리 """
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.status in FINISHED_STATES and now - job.finished_at > self.job_ttl
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+        if self.shared is not None:
+            self.shared.prune(now - self.job_ttl)
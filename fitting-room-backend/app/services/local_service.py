@@ -1,11 +1,57 @@
 import os
-import shutil
+import asyncio
 import uuid
+import hashlib
+import aiofiles
 from PIL import Image
 from glob import glob
+from app.services.metrics import timed
+from app.services.perceptual_hash import image_hashes
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """ 업로드 파일이 최대 크기를 넘음 """
+
+
+class UnsupportedImageError(ValueError):
+    """ 파일 내용이 지원하는 이미지 형식이 아님 """
+
+
+class NearDuplicateError(Exception):
+    """ 닮은 옷이 이미 있어서 새로 저장하지 않음 (dedupe 업로드) → 기존 옷 경로 / 지각 해시 거리 """
+
+    def __init__(self, path: str, distance: int):
+        super().__init__(f"Near-duplicate of {path} (distance {distance})")
+        self.path = path
+        self.distance = distance
+
+
+def sniff_image_format(head: bytes):
+    """ 파일 앞부분(매직 넘버)으로 이미지 형식 판별 → 확장자 (모르면 None) """
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head[4:8] == b"ftyp" and head[8:12] in (b"avif", b"avis"):
+        return "avif"
+    return None
+
 
 class LocalFileService:
-    def __init__(self):
+    def __init__(self, catalog=None, derivatives=None, results=None):
+        # 옷 목록 인덱스 (ClothCatalog, 없으면 매번 폴더 조회)
+        self.catalog = catalog
+        # 썸네일/WebP 파생 이미지 생성기 (DerivativeGenerator, 없으면 생성 안 함)
+        self.derivatives = derivatives
+        # 결과 저장소 (ResultStorage: 분산 폴더 + 용량/TTL 정리, 없으면 results 폴더에 그대로 저장)
+        self.results = results
+
         # 폴더 구분: 옷(clothes) / 결과(results)
         self.CLOTH_DIR = "static/clothes"
         self.RESULT_DIR = "static/results"
@@ -13,30 +59,150 @@ class LocalFileService:
         os.makedirs(self.CLOTH_DIR, exist_ok=True)
         os.makedirs(self.RESULT_DIR, exist_ok=True)
 
-    def save_cloth(self, file_obj) -> str:
-        """ 옷 사진을 저장하고 URL 경로 반환 """
-        file_extension = file_obj.filename.split('.')[-1]
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
-        file_path = os.path.join(self.CLOTH_DIR, unique_filename)
+    async def save_cloth_stream(self, upload, category: str = None, max_bytes: int = 20 * 1024 * 1024,
+                                dedupe: bool = False) -> str:
+        """
+        옷 사진을 조각(chunk) 단위로 임시 파일에 쓰면서 SHA-256 계산 → 완료 후 rename
+        - 파일명은 내용 해시 → 같은 사진을 다시 올리면 기존 파일 경로를 그대로 반환 (중복 저장 X)
+          이때 category 를 주면 기존 옷의 카테고리를 새 값으로 바꿈
+        - 확장자는 클라이언트 파일명이 아니라 실제 내용(매직 넘버)으로 결정
+        - 지각 해시(pHash / dHash)와 색 서명을 계산해 카탈로그에 저장
+          dedupe 면 크기만 바뀌었거나 재압축된 같은 옷이 이미 있을 때 저장하지 않고 NearDuplicateError
+        """
+        with timed("local.save_cloth_stream"):
+            return await self._save_cloth_stream(upload, category, max_bytes, dedupe)
+
+    async def _save_cloth_stream(self, upload, category: str, max_bytes: int, dedupe: bool = False) -> str:
+        tmp_path = os.path.join(self.CLOTH_DIR, f".upload-{uuid.uuid4()}.tmp")
+        digest = hashlib.sha256()
+        size = 0
+        head = b""
+        ext = None
+        try:
+            async with aiofiles.open(tmp_path, "wb") as buffer:
+                while True:
+                    chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    if ext is None:
+                        # 앞 16바이트가 모이면 바로 형식 검사 → 이미지가 아니면 끝까지 받지 않음
+                        head += chunk[:16 - len(head)]
+                        if len(head) >= 16:
+                            ext = sniff_image_format(head)
+                            if ext is None:
+                                raise UnsupportedImageError("Unsupported image format")
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise UploadTooLargeError(f"File exceeds the {max_bytes} byte limit")
+                    digest.update(chunk)
+                    await buffer.write(chunk)
+
+            ext = ext or sniff_image_format(head)
+            if ext is None:
+                raise UnsupportedImageError("Unsupported image format")
+
+            unique_filename = f"{digest.hexdigest()[:32]}.{ext}"
+            file_path = os.path.join(self.CLOTH_DIR, unique_filename)
+            if os.path.exists(file_path):
+                # 이미 같은 내용의 옷이 있음 → 새로 저장하지 않음
+                os.remove(tmp_path)
+                if self.catalog is not None and category is not None:
+                    self.catalog.set_category(unique_filename, category)
+            else:
+                hashes = None
+                if self.catalog is not None:
+                    # 디코딩 + 트리 검색은 스레드에서 (이벤트 루프를 막지 않도록)
+                    hashes, similar = await asyncio.to_thread(self._find_near_duplicate, tmp_path, dedupe)
+                    if similar is not None:
+                        os.remove(tmp_path)
+                        raise NearDuplicateError(f"/static/clothes/{similar[0]}", similar[1])
+                os.replace(tmp_path, file_path)
+                if self.catalog is not None:
+                    self.catalog.add(unique_filename, category, hashes=hashes)
+                self._submit_cloth_derivatives(file_path, unique_filename)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
 
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file_obj.file, buffer)
-            
         return f"/static/clothes/{unique_filename}"
 
+    def _submit_cloth_derivatives(self, file_path: str, filename: str):
+        """ 옷 썸네일 생성 등록, 끝나면 카탈로그 버전을 올림 (variants=true 목록의 ETag 가 바뀌도록) """
+        if self.derivatives is None:
+            return
+        future = self.derivatives.submit(file_path, f"/static/clothes/{filename}")
+        if self.catalog is not None:
+            catalog = self.catalog
+
+            def on_done(f):
+                if not f.cancelled() and f.exception() is None:
+                    catalog.mark_changed()
+
+            future.add_done_callback(on_done)
+
+    @staticmethod
+    def _perceptual_hashes(path: str):
+        """ (pHash, dHash, 색 서명), 디코딩할 수 없는 파일이면 None """
+        try:
+            with timed("local.perceptual_hash"):
+                return image_hashes(path)
+        except Exception:
+            return None
+
+    def _find_near_duplicate(self, path: str, dedupe: bool):
+        """ 지각 해시와 (dedupe 면) 가장 닮은 기존 옷 (파일명, 거리) 또는 None """
+        hashes = self._perceptual_hashes(path)
+        if not dedupe or hashes is None:
+            return hashes, None
+        with timed("local.find_near_duplicate"):
+            similar = self.catalog.find_similar(hashes)
+        return hashes, similar[0] if similar else None
+
+    @timed("local.list_clothes")
     def get_cloth_list(self):
         """ 저장된 모든 옷 사진 목록 반환 """
+        if self.catalog is not None:
+            names, _ = self.catalog.list_page()
+            return [f"/static/clothes/{name}" for name in names]
+
         # 최신순 정렬
         files = sorted(glob(os.path.join(self.CLOTH_DIR, "*")), key=os.path.getmtime, reverse=True)
         # 웹 경로로 변환
         return [f"/static/clothes/{os.path.basename(f)}" for f in files]
 
+    @timed("local.save_result")
     def save_image_from_bytes(self, image: Image.Image) -> str:
-        unique_filename = f"{uuid.uuid4()}.png"
-        file_path = os.path.join(self.RESULT_DIR, unique_filename)
+        if self.results is not None:
+            file_path, web_path = self.results.allocate("png")
+        else:
+            unique_filename = f"{uuid.uuid4()}.png"
+            file_path = os.path.join(self.RESULT_DIR, unique_filename)
+            web_path = f"/static/results/{unique_filename}"
         image.save(file_path, format="PNG")
-        return f"/static/results/{unique_filename}"
+        if self.results is not None:
+            self.results.register(file_path, web_path)
+        if self.derivatives is not None:
+            self.derivatives.submit(file_path, web_path)
+        return web_path
         
+    @timed("local.save_result")
+    def save_result_bytes(self, data: bytes, ext: str) -> str:
+        """ 이미 인코딩된 결과 이미지(WebP/JPEG/PNG) 저장 → 웹 경로 """
+        if self.results is not None:
+            file_path, web_path = self.results.allocate(ext)
+        else:
+            unique_filename = f"{uuid.uuid4()}.{ext}"
+            file_path = os.path.join(self.RESULT_DIR, unique_filename)
+            web_path = f"/static/results/{unique_filename}"
+        with open(file_path, "wb") as f:
+            f.write(data)
+        if self.results is not None:
+            self.results.register(file_path, web_path)
+        if self.derivatives is not None:
+            self.derivatives.submit(file_path, web_path)
+        return web_path
+
     def get_absolute_path(self, web_path: str):
         """ 웹 경로(/static/...)를 실제 파일 경로로 변환 """
         # 맨 앞의 '/' 제거
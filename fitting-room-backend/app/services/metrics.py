@@ -0,0 +1,263 @@
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# 요청별 추적 ID / 단계별 소요 시간 (스레드풀로 넘어가도 contextvars 가 복사되어 따라감)
+_trace_id: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("spans", default=None)
+
+# 기본 히스토그램 구간(초): 빠른 I/O(ms) ~ 원격 추론(수십 초)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+TRACE_HEADER = "X-Trace-Id"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}"
+                for key, v in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # key → [구간별 개수..., 합계, 개수]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[-1] if state else 0
+
+    def _samples(self):
+        lines = []
+        for key, state in sorted(self._values.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, state):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{labels} {state[-1]}")
+        return lines
+
+
+class Registry:
+    """ 지표 모음 → Prometheus 텍스트 형식 (text/plain; version=0.0.4) """
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "fitting_stage_seconds", "Time spent in each try-on pipeline / file I/O stage", ["stage"]))
+STAGE_ERRORS = REGISTRY.register(Counter(
+    "fitting_stage_errors_total", "Stages that raised an exception", ["stage"]))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "fitting_http_request_seconds", "HTTP request latency", ["method", "route", "status"]))
+REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "fitting_http_requests_in_flight", "HTTP requests currently being served", ["route"]))
+INFERENCE_IN_FLIGHT = REGISTRY.register(Gauge(
+    "fitting_inference_in_flight", "Try-on predictions currently running on the inference backend"))
+JOB_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "fitting_job_queue_depth", "Try-on jobs waiting in the async job queue"))
+COALESCED_REQUESTS = REGISTRY.register(Counter(
+    "fitting_tryon_coalesced_total", "Try-on requests that joined an identical in-flight try-on instead of starting one"))
+COMPONENT_READY = REGISTRY.register(Gauge(
+    "fitting_component_ready", "1 once a background-initialized component is ready", ["component"]))
+STARTUP_SECONDS = REGISTRY.register(Gauge(
+    "fitting_startup_seconds", "Time the successful initialization of each component took", ["component"]))
+SCHEDULER_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "fitting_scheduler_wait_seconds", "Time a try-on waited in the fair scheduler for an inference slot", ["lane"]))
+SCHEDULER_QUEUED = REGISTRY.register(Gauge(
+    "fitting_scheduler_queued", "Try-ons waiting in the fair scheduler for an inference slot", ["lane"]))
+RATE_LIMITED = REGISTRY.register(Counter(
+    "fitting_rate_limited_total", "Try-on requests rejected by the per-client rate limit", ["lane"]))
+
+
+def current_trace_id() -> Optional[str]:
+    return _trace_id.get()
+
+
+@contextmanager
+def timed(stage: str):
+    """
+    단계 소요 시간 측정 (with 블록 / 데코레이터 둘 다 가능)
+    - fitting_stage_seconds{stage} 히스토그램에 기록
+    - 요청 안이면 Server-Timing 헤더용 span 목록에도 추가
+    """
+    t0 = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - t0
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        spans = _spans.get()
+        if spans is not None:
+            spans.append((stage, elapsed))
+
+
+def _server_timing(spans: List[Tuple[str, float]]) -> str:
+    totals: Dict[str, float] = {}
+    for stage, elapsed in spans:
+        totals[stage] = totals.get(stage, 0.0) + elapsed
+    return ", ".join(f"{stage.replace('.', '-')};dur={elapsed * 1000:.1f}" for stage, elapsed in totals.items())
+
+
+def _route_label(scope) -> str:
+    """ 라벨 폭증을 막기 위해 실제 경로 대신 라우트 템플릿 사용 (/api/v1/try-on/jobs/{job_id}) """
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+    path = scope.get("path", "")
+    if path.startswith("/static/"):
+        return "/static"
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    요청마다 추적 ID 발급 + 지연/진행 중 요청 수 기록 (순수 ASGI 미들웨어: 스트리밍 응답도 그대로 통과)
+    - 요청 헤더에 X-Trace-Id 가 있으면 그대로 이어받고, 없으면 새로 생성
+    - 응답 헤더: X-Trace-Id, Server-Timing (응답 시작 전까지 끝난 단계들)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope.get("headers") or []).get(TRACE_HEADER.lower().encode())
+        trace_id = incoming.decode("latin-1")[:64] if incoming else uuid.uuid4().hex
+        spans: List[Tuple[str, float]] = []
+        trace_token = _trace_id.set(trace_id)
+        spans_token = _spans.set(spans)
+        # 진행 중 요청 수는 라우팅 전이라 경로 접두어로만 구분
+        group = "/static" if scope.get("path", "").startswith("/static/") else "/api"
+        REQUESTS_IN_FLIGHT.inc(route=group)
+        status = 500
+        t0 = time.perf_counter()
+
+        async def send_with_headers(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((TRACE_HEADER.lower().encode(), trace_id.encode("latin-1")))
+                if spans:
+                    headers.append((b"server-timing", _server_timing(spans).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            REQUESTS_IN_FLIGHT.dec(route=group)
+            REQUEST_SECONDS.observe(time.perf_counter() - t0, method=scope["method"],
+                                    route=_route_label(scope), status=str(status))
+            _spans.reset(spans_token)
+            _trace_id.reset(trace_token)
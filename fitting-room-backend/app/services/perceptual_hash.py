@@ -0,0 +1,143 @@
+from typing import Dict, Generic, Iterator, List, Optional, Tuple, TypeVar
+
+import numpy as np
+from PIL import Image, ImageOps
+
+HASH_BITS = 64
+T = TypeVar("T")
+
+
+COLOR_GRID = 4   # 색 서명: 4x4 칸의 평균 RGB (48바이트)
+
+
+def _flatten(img: Image.Image) -> Image.Image:
+    """ EXIF 회전 적용 + 투명 배경은 흰색으로 채운 RGB (누끼 PNG 와 원본 JPEG 를 같게 보도록) """
+    img = ImageOps.exif_transpose(img)
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        img = img.convert("RGBA")
+        background = Image.new("RGBA", img.size, (255, 255, 255, 255))
+        img = Image.alpha_composite(background, img)
+    return img.convert("RGB")
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    value = 0
+    for bit in bits.flatten():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def dhash(gray: Image.Image) -> int:
+    """ 차이 해시: 9x8 로 줄여 옆 픽셀보다 밝은지 → 64비트 (재압축 / 크기 변경에 강함) """
+    pixels = np.asarray(gray.resize((9, 8), Image.LANCZOS), dtype=np.int16)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    return np.cos(np.pi * (2 * x + 1) * k / (2 * n))
+
+
+_DCT32 = _dct_matrix(32)
+
+
+def phash(gray: Image.Image) -> int:
+    """ DCT 해시: 32x32 의 저주파 8x8 계수가 중앙값보다 큰지 → 64비트 (약간의 잘림 / 색 보정에도 강함) """
+    pixels = np.asarray(gray.resize((32, 32), Image.LANCZOS), dtype=np.float64)
+    low = (_DCT32 @ pixels @ _DCT32.T)[:8, :8]
+    median = np.median(low.flatten()[1:])  # DC(평균 밝기) 성분은 제외
+    return _bits_to_int(low > median)
+
+
+def color_signature(rgb: Image.Image) -> bytes:
+    """ 칸별 평균 색: pHash / dHash 는 흑백이라 같은 옷의 다른 색상(컬러웨이)을 구분하지 못함 """
+    return rgb.resize((COLOR_GRID, COLOR_GRID), Image.BOX).tobytes()
+
+
+def color_distance(a: bytes, b: bytes) -> float:
+    """ 두 색 서명의 칸별 RGB 거리 평균 (0 ~ 441) """
+    diff = np.frombuffer(a, np.uint8).astype(np.float64) - np.frombuffer(b, np.uint8)
+    return float(np.sqrt((diff.reshape(-1, 3) ** 2).sum(axis=1)).mean())
+
+
+def image_hashes(path: str) -> Tuple[int, int, bytes]:
+    """ 이미지 파일 → (pHash, dHash, 색 서명) """
+    with Image.open(path) as img:
+        img.draft("RGB", (128, 128))  # JPEG 는 작게 디코딩 (해시는 32x32 만 필요)
+        rgb = _flatten(img)
+    gray = rgb.convert("L")
+    return phash(gray), dhash(gray), color_signature(rgb)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def to_hex(value: int) -> str:
+    return f"{value:016x}"
+
+
+def from_hex(value: str) -> int:
+    return int(value, 16)
+
+
+class _Node(Generic[T]):
+    __slots__ = ("hash", "items", "children")
+
+    def __init__(self, value: int, item: T):
+        self.hash = value
+        self.items: List[T] = [item]
+        self.children: Dict[int, "_Node[T]"] = {}
+
+
+class BKTree(Generic[T]):
+    """
+    해밍 거리용 BK-트리: 거리 d 이내 검색 시 삼각 부등식으로 자식 대부분을 건너뜀
+    - 같은 해시는 노드 하나에 항목을 모아 둠
+    - 삭제는 지원하지 않음 (바뀌면 새로 만듦)
+    """
+
+    def __init__(self):
+        self._root: Optional[_Node[T]] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int, item: T):
+        self._size += 1
+        if self._root is None:
+            self._root = _Node(value, item)
+            return
+        node = self._root
+        while True:
+            distance = hamming(value, node.hash)
+            if distance == 0:
+                node.items.append(item)
+                return
+            child = node.children.get(distance)
+            if child is None:
+                node.children[distance] = _Node(value, item)
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, T]]:
+        """ 거리 max_distance 이내 항목 → [(거리, 항목)] 가까운 순 """
+        found = []
+        for distance, node in self._walk(value, max_distance):
+            found.extend((distance, item) for item in node.items)
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+    def _walk(self, value: int, max_distance: int) -> Iterator[Tuple[int, _Node[T]]]:
+        if self._root is None:
+            return
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node.hash)
+            if distance <= max_distance:
+                yield distance, node
+            low, high = distance - max_distance, distance + max_distance
+            stack.extend(child for d, child in node.children.items() if low <= d <= high)
@@ -0,0 +1,280 @@
+import io
+import json
+import os
+import re
+import secrets
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict
+from PIL import Image
+
+from app.services.content_hash import sha256_bytes
+from app.services.preprocess_service import PreparedImage
+
+
+_SESSION_ID = re.compile(r"[A-Za-z0-9_-]{16,64}")
+
+
+class SessionNotFoundError(KeyError):
+    """ 없는 세션이거나 TTL 이 지나서 삭제된 세션 """
+
+
+@dataclass
+class PersonSession:
+    """ 한 번 올려 둔 사람 사진 (모델 입력 형태로 전처리 완료) """
+    id: str
+    digest: str             # 원본 사진 해시 → 피팅 결과 캐시 키 (업로드 방식과 같은 키)
+    prepared: PreparedImage
+    expires_at: float
+
+
+class PersonSessionStore:
+    """
+    사람 사진 세션: 사진을 한 번만 올리고 이후 피팅 요청은 세션 ID 로 보냄
+    - 전처리(모델 해상도 + 전송용 인코딩)가 끝난 결과만 보관 → 요청마다 업로드/디코딩 없음
+    - 디스크: {id}.{ext} (인코딩된 바이트) + {id}.json (메타) → 서버 재시작 후에도 유지
+    - 메모리: 최근 쓴 세션만 LRU 로 보관 (max_memory_bytes), 밀려나면 디스크에서 다시 읽음
+    - 마지막 사용 후 ttl 초가 지나면 만료, 디스크 총량(max_disk_bytes)을 넘으면 오래 안 쓴 것부터 삭제
+    - 여러 워커가 같은 폴더를 쓰면: 모르는 ID 는 디스크의 {id}.json 에서 읽고,
+      마지막 사용 시각은 메타 파일 mtime 으로도 기록 → 다른 워커가 쓰고 있는 세션을 만료시키지 않음
+    """
+
+    def __init__(self, prepare: Callable[[bytes], PreparedImage], root: str = "cache/person_sessions",
+                 ttl: float = 1800, max_memory_bytes: int = 256 * 1024 ** 2, max_disk_bytes: int = 1024 ** 3):
+        self.prepare = prepare
+        self.root = root
+        self.ttl = ttl
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        os.makedirs(self.root, exist_ok=True)
+
+        # id → 메타 (디스크 기준, 사용 순서대로)
+        self._meta: "OrderedDict[str, Dict]" = OrderedDict()
+        # id → PreparedImage (메모리 LRU)
+        self._memory: "OrderedDict[str, PreparedImage]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self.created = 0
+        self.hits = 0
+        self.disk_loads = 0
+        self.expired = 0
+        self.evictions = 0
+        self._load()
+
+    def create(self, data: bytes) -> PersonSession:
+        """ 사진 전처리 후 새 세션 등록 (등록할 때 만료된 세션도 같이 정리) """
+        self.sweep()
+        prepared = self.prepare(data)
+        session_id = secrets.token_urlsafe(16)
+        now = time.time()
+        meta = {
+            "digest": sha256_bytes(data),
+            "ext": prepared.ext,
+            "original_size": list(prepared.original_size),
+            "original_bytes": prepared.original_bytes,
+            "size": len(prepared.data),
+            "last_used": now,
+        }
+        self._write(session_id, prepared.data, meta)
+
+        with self._lock:
+            self._meta[session_id] = meta
+            self.disk_bytes += meta["size"]
+            self.created += 1
+            self._remember(session_id, prepared)
+            self._enforce_disk_limit()
+        return PersonSession(session_id, meta["digest"], prepared, now + self.ttl)
+
+    def get(self, session_id: str) -> PersonSession:
+        """ 세션 조회 (사용할 때마다 만료 시간 연장), 없거나 만료면 SessionNotFoundError """
+        now = time.time()
+        with self._lock:
+            meta = self._meta.get(session_id)
+        if meta is None:
+            # 다른 워커가 만든 세션일 수 있음 → 디스크에서 메타 읽기
+            meta = self._load_meta(session_id)
+            if meta is None:
+                raise SessionNotFoundError(session_id)
+        with self._lock:
+            if session_id not in self._meta:
+                self._meta[session_id] = meta
+                self.disk_bytes += meta["size"]
+            meta = self._meta[session_id]
+            if now - self._last_used(session_id, meta) > self.ttl:
+                self._drop(session_id)
+                self.expired += 1
+                raise SessionNotFoundError(session_id)
+            meta["last_used"] = now
+            self._persist_use(session_id, now)
+            self._meta.move_to_end(session_id)
+            prepared = self._memory.get(session_id)
+            if prepared is not None:
+                self._memory.move_to_end(session_id)
+                self.hits += 1
+
+        if prepared is None:
+            prepared = self._read(session_id, meta)
+            with self._lock:
+                self.disk_loads += 1
+                if session_id in self._meta:
+                    self._remember(session_id, prepared)
+        return PersonSession(session_id, meta["digest"], prepared, now + self.ttl)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            if session_id not in self._meta:
+                return False
+            self._drop(session_id)
+            return True
+
+    def sweep(self) -> int:
+        """ 만료된 세션 삭제 → 삭제한 개수 """
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [sid for sid, meta in self._meta.items()
+                       if meta["last_used"] < cutoff and self._last_used(sid, meta) < cutoff]
+            for session_id in expired:
+                self._drop(session_id)
+            self.expired += len(expired)
+        return len(expired)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self._meta),
+                "in_memory": len(self._memory),
+                "memory_bytes": self.memory_bytes,
+                "disk_bytes": self.disk_bytes,
+                "created": self.created,
+                "hits": self.hits,
+                "disk_loads": self.disk_loads,
+                "expired": self.expired,
+                "evictions": self.evictions,
+            }
+
+    # --- 내부 (잠금 안에서 호출) ---
+    @staticmethod
+    def _memory_cost(prepared: PreparedImage) -> int:
+        width, height = prepared.image.size
+        return len(prepared.data) + width * height * len(prepared.image.getbands())
+
+    def _remember(self, session_id: str, prepared: PreparedImage):
+        if session_id in self._memory:
+            return
+        self._memory[session_id] = prepared
+        self.memory_bytes += self._memory_cost(prepared)
+        while len(self._memory) > 1 and self.memory_bytes > self.max_memory_bytes:
+            # 메모리에서만 내림 (디스크에는 남아 있음)
+            _, old = self._memory.popitem(last=False)
+            self.memory_bytes -= self._memory_cost(old)
+
+    def _last_used(self, session_id: str, meta: Dict) -> float:
+        """ 이 워커가 본 마지막 사용 시각과 메타 파일 mtime(다른 워커의 사용) 중 최근 """
+        try:
+            return max(meta["last_used"], os.stat(self._meta_path(session_id)).st_mtime)
+        except OSError:
+            return meta["last_used"]
+
+    def _enforce_disk_limit(self):
+        while len(self._meta) > 1 and self.disk_bytes > self.max_disk_bytes:
+            old_id = next(iter(self._meta))
+            self._drop(old_id)
+            self.evictions += 1
+
+    def _drop(self, session_id: str):
+        meta = self._meta.pop(session_id)
+        self.disk_bytes -= meta["size"]
+        prepared = self._memory.pop(session_id, None)
+        if prepared is not None:
+            self.memory_bytes -= self._memory_cost(prepared)
+        for path in (self._data_path(session_id, meta["ext"]), self._meta_path(session_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    # --- 디스크 ---
+    def _data_path(self, session_id: str, ext: str) -> str:
+        return os.path.join(self.root, f"{session_id}.{ext}")
+
+    def _meta_path(self, session_id: str) -> str:
+        return os.path.join(self.root, f"{session_id}.json")
+
+    def _write(self, session_id: str, data: bytes, meta: Dict):
+        # 데이터 먼저, 메타는 마지막에 rename → 메타가 있으면 데이터도 완전함
+        for path, payload in ((self._data_path(session_id, meta["ext"]), data),
+                              (self._meta_path(session_id), json.dumps(meta).encode())):
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+
+    def _load_meta(self, session_id: str):
+        if not _SESSION_ID.fullmatch(session_id):
+            return None  # 경로로 쓰이므로 형식이 맞는 ID 만
+        try:
+            with open(self._meta_path(session_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _persist_use(self, session_id: str, now: float):
+        """ 사용 시각을 메타 파일 mtime 에 기록 (워커 간 공유) """
+        try:
+            os.utime(self._meta_path(session_id), (now, now))
+        except OSError:
+            pass
+
+    def _read(self, session_id: str, meta: Dict) -> PreparedImage:
+        try:
+            with open(self._data_path(session_id, meta["ext"]), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                if session_id in self._meta:
+                    self._drop(session_id)
+            raise SessionNotFoundError(session_id)
+        # 복원한 세션은 동시 피팅(배치 병렬 등)이 같이 쓰므로 여기서 디코딩까지 끝냄
+        # (지연 디코딩은 ImageFile / BytesIO 를 여러 스레드가 동시에 읽게 됨 → main._prepare_person 과 같은 이유)
+        image = Image.open(io.BytesIO(data))
+        image.load()
+        return PreparedImage(image, data, meta["ext"], tuple(meta["original_size"]), meta["original_bytes"])
+
+    def _load(self):
+        """ 서버 시작 시: 디스크에 남은 세션 복원 (만료된 것과 짝이 안 맞는 파일은 정리) """
+        cutoff = time.time() - self.ttl
+        found = []
+        for name in os.listdir(self.root):
+            if not name.endswith(".json"):
+                continue
+            session_id = name[:-len(".json")]
+            try:
+                with open(self._meta_path(session_id)) as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            meta["last_used"] = max(meta["last_used"], os.stat(self._meta_path(session_id)).st_mtime)
+            found.append((meta["last_used"], session_id, meta))
+
+        for last_used, session_id, meta in sorted(found, key=lambda item: item[0]):
+            self._meta[session_id] = meta
+            self.disk_bytes += meta["size"]
+            if last_used < cutoff or not os.path.exists(self._data_path(session_id, meta["ext"])):
+                self._drop(session_id)
+
+        # 메타 없이 남은 데이터 / 임시 파일 정리 (다른 워커가 지금 쓰고 있을 수 있는 최근 파일은 제외)
+        known = {self._meta_path(sid) for sid in self._meta}
+        known |= {self._data_path(sid, meta["ext"]) for sid, meta in self._meta.items()}
+        recent = time.time() - 60
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            try:
+                if path not in known and os.path.isfile(path) and os.path.getmtime(path) < recent:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._enforce_disk_limit()
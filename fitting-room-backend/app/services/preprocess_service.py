@@ -0,0 +1,100 @@
+import io
+import threading
+import time
+from dataclasses import dataclass
+from typing import Tuple
+from PIL import Image, ImageOps
+
+# EXIF Orientation 값 중 가로/세로가 바뀌는 것 (90도 회전 계열)
+_ROTATED_ORIENTATIONS = (5, 6, 7, 8)
+_EXIF_ORIENTATION = 0x0112
+
+# 전송 형식별 저장 옵션
+TRANSFER_FORMATS = {
+    "jpeg": ("JPEG", "jpg"),
+    "webp": ("WEBP", "webp"),
+    "png": ("PNG", "png"),
+}
+
+
+@dataclass
+class PreparedImage:
+    """ 모델 입력 크기로 맞추고 전송용으로 인코딩까지 끝난 사람 사진 """
+    image: Image.Image
+    data: bytes
+    ext: str
+    original_size: Tuple[int, int]
+    original_bytes: int
+
+
+class PersonPreprocessor:
+    """
+    사람 사진 전처리: 원격 GPU에 보내기 전에 모델 해상도(768x1024)로 맞춤
+    1. JPEG은 draft 모드로 필요한 해상도 근처까지만 디코딩 (폰 사진 12MP를 다 풀지 않음)
+    2. EXIF 회전 정보 적용
+    3. 비율 유지 리사이즈 + 여백 채우기
+    4. 작은 전송 형식(JPEG 등)으로 인코딩
+    """
+
+    def __init__(self, target_size: Tuple[int, int] = (768, 1024), transfer_format: str = "jpeg",
+                 quality: int = 90, pad_color=(255, 255, 255)):
+        if transfer_format not in TRANSFER_FORMATS:
+            raise ValueError(f"Unsupported transfer format: {transfer_format}")
+        self.target_size = target_size
+        self.transfer_format = transfer_format
+        self.quality = quality
+        self.pad_color = pad_color
+
+        self._lock = threading.Lock()
+        self.count = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.pixels_in = 0
+        self.seconds = 0.0
+
+    def prepare(self, data: bytes) -> PreparedImage:
+        t0 = time.perf_counter()
+        image = Image.open(io.BytesIO(data))
+        original_size = image.size
+
+        # 회전 후 기준으로 필요한 크기 → draft 요청 크기도 회전 전 기준으로 맞춤
+        target_w, target_h = self.target_size
+        if image.getexif().get(_EXIF_ORIENTATION) in _ROTATED_ORIENTATIONS:
+            target_w, target_h = target_h, target_w
+        image.draft("RGB", (target_w, target_h))
+
+        image = ImageOps.exif_transpose(image)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        fitted = ImageOps.pad(image, self.target_size, method=Image.Resampling.LANCZOS, color=self.pad_color)
+
+        pil_format, ext = TRANSFER_FORMATS[self.transfer_format]
+        buffer = io.BytesIO()
+        if pil_format == "PNG":
+            fitted.save(buffer, format=pil_format, compress_level=1)
+        else:
+            fitted.save(buffer, format=pil_format, quality=self.quality)
+        encoded = buffer.getvalue()
+
+        with self._lock:
+            self.count += 1
+            self.bytes_in += len(data)
+            self.bytes_out += len(encoded)
+            self.pixels_in += original_size[0] * original_size[1]
+            self.seconds += time.perf_counter() - t0
+
+        return PreparedImage(fitted, encoded, ext, original_size, len(data))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "count": self.count,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "avg_bytes_in": self.bytes_in / self.count if self.count else None,
+                "avg_bytes_out": self.bytes_out / self.count if self.count else None,
+                "avg_megapixels_in": self.pixels_in / self.count / 1e6 if self.count else None,
+                "avg_seconds": self.seconds / self.count if self.count else None,
+                "target_size": list(self.target_size),
+                "transfer_format": self.transfer_format,
+            }
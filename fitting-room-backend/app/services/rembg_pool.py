@@ -0,0 +1,112 @@
+import queue
+import time
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+from PIL import Image
+
+# 우선순위대로 시도할 ONNX Runtime 실행 장치 (check_gpu.py 에서 확인 가능)
+PREFERRED_PROVIDERS = ["CUDAExecutionProvider", "CPUExecutionProvider"]
+
+
+def select_providers(requested: Optional[List[str]] = None) -> List[str]:
+    """ 요청한(없으면 기본) provider 중 이 머신에서 실제 사용 가능한 것만 순서대로 반환 """
+    import onnxruntime as ort
+    available = ort.get_available_providers()
+    chosen = [p for p in (requested or PREFERRED_PROVIDERS) if p in available]
+    return chosen or ["CPUExecutionProvider"]
+
+
+def _new_session(model_name: str, providers: List[str], intra_op_threads: int):
+    """
+    rembg 세션 생성
+    - rembg.new_session 은 스레드 수를 OMP_NUM_THREADS 환경변수로만 받음 → 프로세스 전체(다른 ONNX / torch)에 영향
+      스레드 수를 지정하면 new_session 과 같은 방식으로 세션 클래스를 직접 만들고 SessionOptions 로만 전달
+    """
+    from rembg import new_session
+    if not intra_op_threads:
+        return new_session(model_name, providers=providers)
+
+    import onnxruntime as ort
+    from rembg.sessions import sessions_class
+    session_class = next((sc for sc in sessions_class if sc.name() == model_name), None)
+    if session_class is None:
+        raise ValueError(f"Unknown rembg model: {model_name}")
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = intra_op_threads
+    return session_class(model_name, options, providers)
+
+
+class RembgSessionPool:
+    """
+    rembg(ONNX) 세션 풀
+    - 서버 시작 시 세션을 미리 만들고 워밍업 추론까지 끝내 둠 → 첫 요청이 모델 로딩을 기다리지 않음
+    - 세션 여러 개를 돌려 쓰므로 동시 요청이 세션 하나에 줄 서지 않음
+    """
+
+    def __init__(self, model_name: str = "u2net", size: int = 2,
+                 providers: Optional[List[str]] = None, intra_op_threads: int = 0,
+                 session_factory: Optional[Callable] = None, remove_fn: Optional[Callable] = None):
+        self.model_name = model_name
+        self.size = max(1, size)
+        self.requested_providers = providers
+        self.providers: List[str] = []
+        self.intra_op_threads = intra_op_threads
+        self._session_factory = session_factory or _new_session
+        self._remove_fn = remove_fn
+        self._sessions: "queue.Queue" = queue.Queue()
+        self.started = False
+        self.warmup_seconds: Optional[float] = None
+
+    def start(self):
+        """
+        세션 생성 + 워밍업 (블로킹)
+        모두 성공했을 때만 풀에 넣음 → 도중에 실패해도 반쯤 찬 풀이 남지 않고 다시 호출(재시도)할 수 있음
+        """
+        if self.started:
+            return
+        t0 = time.perf_counter()
+        providers = select_providers(self.requested_providers)
+        print(f"🧠 rembg 세션 풀 준비 중: 모델={self.model_name}, 세션 {self.size}개, providers={providers}")
+
+        warmup_image = Image.new("RGB", (64, 64), color="white")
+        sessions = []
+        for _ in range(self.size):
+            session = self._session_factory(self.model_name, providers, self.intra_op_threads)
+            # 워밍업 추론: 그래프 최적화/메모리 할당을 요청 전에 끝내기
+            self._remove(warmup_image, session)
+            sessions.append(session)
+
+        self.providers = providers
+        for session in sessions:
+            self._sessions.put(session)
+        self.started = True
+        self.warmup_seconds = time.perf_counter() - t0
+        print(f"   ✅ rembg 세션 풀 준비 완료 ({self.warmup_seconds:.1f}초)")
+
+    @contextmanager
+    def session(self):
+        """ 세션 하나를 빌려 쓰고 반납 (모두 사용 중이면 반납될 때까지 대기) """
+        session = self._sessions.get()
+        try:
+            yield session
+        finally:
+            self._sessions.put(session)
+
+    def remove(self, image: Image.Image) -> Image.Image:
+        with self.session() as session:
+            return self._remove(image, session)
+
+    def stats(self):
+        return {
+            "model": self.model_name,
+            "sessions": self.size,
+            "idle_sessions": self._sessions.qsize(),
+            "providers": self.providers,
+            "warmup_seconds": self.warmup_seconds,
+        }
+
+    def _remove(self, image: Image.Image, session) -> Image.Image:
+        if self._remove_fn is None:
+            from rembg import remove
+            self._remove_fn = remove
+        return self._remove_fn(image, session=session)
@@ -0,0 +1,145 @@
+import os
+import sqlite3
+import threading
+from typing import Callable, Dict, List, Optional
+
+from app.services.content_hash import FileHashIndex, sha256_bytes
+
+
+class TryOnResultCache:
+    """
+    피팅 결과 캐시: IDM-VTON은 (사람 사진, 옷, 카테고리, steps, seed)가 같으면 결과도 같으므로
+    같은 입력이 다시 오면 원격 GPU를 호출하지 않고 저장된 static/results 경로를 바로 돌려준다.
+    - 인덱스는 SQLite (WAL) → uvicorn 워커 여러 개가 같은 캐시를 공유, 재시작해도 유지
+    - 사용 순서는 공유 카운터(last_used)로 기록, 항목 수 / 총 바이트 수 한도를 넘으면 가장 오래 안 쓴 결과부터 삭제
+    - hits / misses / evictions 는 프로세스별 집계
+    """
+
+    def __init__(self, index_path: str = "cache/result_index.sqlite3",
+                 max_entries: int = 1000, max_bytes: int = 2 * 1024 ** 3,
+                 remove_file: Optional[Callable[[str], None]] = None):
+        self.index_path = index_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # 결과 파일 삭제 방법 (결과 저장소가 있으면 저장소 인덱스/파생 이미지까지 같이 정리)
+        self._remove_file = remove_file
+        os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+
+        self.hash_index = FileHashIndex()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # 다른 워커가 쓰는 중이면 timeout 초까지 기다림
+        self._conn = sqlite3.connect(index_path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS results (
+                key        TEXT PRIMARY KEY,
+                url        TEXT NOT NULL,
+                file       TEXT NOT NULL,
+                size       INTEGER NOT NULL,
+                last_used  INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_results_lru ON results (last_used);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            INSERT OR IGNORE INTO meta (key, value) VALUES ('clock', 0);
+        """)
+
+    def make_key(self, person_bytes: Optional[bytes], cloth_path: str, vton_desc: str, steps: int, seed: int,
+                 person_hash: Optional[str] = None, output_format: Optional[str] = None,
+                 backend: Optional[str] = None) -> str:
+        """
+        person_hash: 이미 계산된 사람 사진 해시 (사람 세션) → person_bytes 대신 사용
+        output_format: 결과 저장 형식 (webp/jpeg/png), 형식마다 다른 결과 파일
+        backend: 추론 백엔드 / 모델 식별자 (InferenceBackend.identity), 인덱스가 재시작 후에도 남으므로
+                 스텁 / 다른 모델로 만든 결과를 실제 결과로 돌려주지 않도록 키에 포함
+        """
+        if person_hash is None:
+            person_hash = sha256_bytes(person_bytes)
+        cloth_hash = self.hash_index.digest(cloth_path)
+        key = f"{person_hash}:{cloth_hash}:{vton_desc}:{steps}:{seed}"
+        if output_format is not None:
+            key += f":{output_format}"
+        if backend is not None:
+            key += f":{backend}"
+        return sha256_bytes(key.encode())
+
+    def lookup(self, key: str) -> Optional[str]:
+        """ 캐시된 결과의 웹 경로 반환 (없거나 파일이 지워졌으면 None) """
+        with self._lock:
+            row = self._conn.execute("SELECT url, file FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            url, file_path = row
+            self._conn.execute("BEGIN IMMEDIATE")
+            if os.path.exists(file_path):
+                self._conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (self._tick(), key))
+            else:
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                url = None
+            self._conn.execute("COMMIT")
+            if url is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return url
+
+    def put(self, key: str, url_path: str, file_path: str):
+        """ 새로 만든 결과 등록 후 한도를 넘으면 LRU 삭제 """
+        size = os.path.getsize(file_path)
+        removed: List[str] = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO results (key, url, file, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                    (key, url_path, file_path, size, self._tick()),
+                )
+                count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+                over = count > self.max_entries or total > self.max_bytes
+                oldest = self._conn.execute("SELECT key, file, size FROM results ORDER BY last_used") if over else []
+                for old_key, old_file, old_size in oldest:
+                    if count <= self.max_entries and total <= self.max_bytes:
+                        break
+                    self._conn.execute("DELETE FROM results WHERE key = ?", (old_key,))
+                    count -= 1
+                    total -= old_size
+                    self.evictions += 1
+                    removed.append(old_file)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        for path in removed:
+            self._delete_file(path)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": total,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _delete_file(self, path: str):
+        if self._remove_file is not None:
+            self._remove_file(path)
+            return
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _tick(self) -> int:
+        """ 워커 간 공유 사용 순서 카운터 (트랜잭션 안에서 호출) """
+        self._conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'clock'")
+        return self._conn.execute("SELECT value FROM meta WHERE key = 'clock'").fetchone()[0]
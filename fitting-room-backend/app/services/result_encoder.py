@@ -0,0 +1,104 @@
+import asyncio
+import io
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Optional
+from PIL import Image, features
+
+from app.services.http_headers import parse_accept
+
+# 형식 → (PIL 형식, 확장자, MIME)
+FORMATS = {
+    "webp": ("WEBP", "webp", "image/webp"),
+    "jpeg": ("JPEG", "jpg", "image/jpeg"),
+    "png": ("PNG", "png", "image/png"),
+}
+MEDIA_TYPES = {media_type: fmt for fmt, (_, _, media_type) in FORMATS.items()}
+MEDIA_TYPES["image/jpg"] = "jpeg"
+EXTENSION_MEDIA_TYPES = {ext: media_type for _, ext, media_type in FORMATS.values()}
+
+
+@dataclass
+class EncodedImage:
+    data: bytes
+    format: str
+    ext: str
+    media_type: str
+
+
+class ResultEncoder:
+    """
+    피팅 결과 인코딩 (설정한 형식/품질로, 기본은 기존과 같은 PNG)
+    - WebP / JPEG(quality), PNG(compress_level) 중 선택, 사진 결과에는 WebP/JPEG 이 훨씬 작고 빠름
+    - 클라이언트 Accept 헤더로 형식 협상 (명시적인 image/* 타입만, 없으면 기본 형식)
+    - 전용 스레드 풀에서 인코딩 → CPU 를 많이 쓰는 인코딩 동시 실행 수를 제한
+    """
+
+    def __init__(self, default_format: str = "png", formats: Iterable[str] = ("webp", "jpeg", "png"),
+                 quality: int = 90, webp_method: int = 4, png_compress_level: int = 3, workers: int = 2):
+        self.formats = [f for f in formats if f in FORMATS and (f != "webp" or features.check("webp"))]
+        if default_format not in self.formats:
+            print(f"   ⚠️ 결과 형식 '{default_format}' 을(를) 쓸 수 없어 png 로 저장합니다")
+            default_format = "png"
+            if "png" not in self.formats:
+                self.formats.append("png")
+        self.default_format = default_format
+        self.quality = quality
+        self.webp_method = webp_method
+        self.png_compress_level = png_compress_level
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="result-encode")
+
+    def negotiate(self, accept: Optional[str] = None, requested: Optional[str] = None) -> str:
+        """ 요청한 형식(폼 값) > Accept 헤더의 명시적 이미지 타입 > 기본 형식 """
+        if requested:
+            requested = MEDIA_TYPES.get(requested.lower(), requested.lower())
+            if requested in self.formats:
+                return requested
+        if not accept:
+            return self.default_format
+
+        explicit = {}
+        for media_type, q in parse_accept(accept):
+            fmt = MEDIA_TYPES.get(media_type)
+            if fmt in self.formats:
+                explicit[fmt] = q
+        candidates = [f for f in self.formats if explicit.get(f, 0) > 0]
+        if candidates:
+            # q 값이 높은 것, 같으면 서버 선호 순서 (기본 형식 우선)
+            order = [self.default_format] + [f for f in self.formats if f != self.default_format]
+            return max(candidates, key=lambda f: (explicit[f], -order.index(f)))
+        if explicit.get(self.default_format) == 0:
+            # 기본 형식만 명시적으로 거부됨 → 거부되지 않은 다음 형식
+            for fmt in self.formats:
+                if explicit.get(fmt) != 0:
+                    return fmt
+        return self.default_format
+
+    def encode(self, image: Image.Image, fmt: Optional[str] = None) -> EncodedImage:
+        """ 인코딩 (블로킹, 호출한 스레드에서 바로 실행) """
+        fmt = fmt if fmt in self.formats else self.default_format
+        pil_format, ext, media_type = FORMATS[fmt]
+        if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA", "L", "LA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+        buffer = io.BytesIO()
+        if fmt == "png":
+            image.save(buffer, format=pil_format, compress_level=self.png_compress_level)
+        elif fmt == "webp":
+            image.save(buffer, format=pil_format, quality=self.quality, method=self.webp_method)
+        else:
+            image.save(buffer, format=pil_format, quality=self.quality)
+        return EncodedImage(buffer.getvalue(), fmt, ext, media_type)
+
+    def encode_in_pool(self, image: Image.Image, fmt: Optional[str] = None) -> EncodedImage:
+        """ 전용 풀에서 인코딩하고 결과를 기다림 (다른 작업 스레드에서 호출할 때 동시 인코딩 수 제한용) """
+        return self._executor.submit(self.encode, image, fmt).result()
+
+    async def encode_async(self, image: Image.Image, fmt: Optional[str] = None) -> EncodedImage:
+        """ 이벤트 루프에서 호출: 전용 풀에서 인코딩 """
+        return await asyncio.wrap_future(self._executor.submit(self.encode, image, fmt))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
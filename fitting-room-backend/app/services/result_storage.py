@@ -0,0 +1,270 @@
+import asyncio
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 파생 이미지 이름(abc_256.webp, abc_full.avif)에서 원본 이름(abc) 추출
+_DERIVED_SUFFIX = re.compile(r"_(\d+|full)$")
+_RESULT_NAME = re.compile(r"[0-9a-f]{32}")   # allocate() 가 만드는 이름
+
+
+def result_key(web_path: str) -> str:
+    """ /static/results/ab/abcd.png, /static/derived/results/ab/abcd_256.webp → "abcd" """
+    stem = os.path.splitext(web_path.rstrip("/").rsplit("/", 1)[-1])[0]
+    return _DERIVED_SUFFIX.sub("", stem)
+
+
+class ResultStorage:
+    """
+    피팅 결과 이미지 저장소 (static/results)
+    - 파일명 앞 글자로 하위 폴더 분산 (results/ab/abcd....png) → 한 폴더에 파일이 몰리지 않음
+    - 총 용량(max_bytes)을 넘으면 가장 오래 안 본 결과부터 삭제 (LRU)
+    - 마지막 접근 후 ttl 초가 지나면 삭제 (백그라운드 스위퍼가 주기적으로 정리)
+    - 접근 시각은 /static 라우트에서 touch() 로 갱신, 파일 atime 에도 기록해서 재시작 후에도 유지
+    - 여러 워커가 같은 폴더를 쓰면(shared) 정리 전에 디스크를 다시 읽어 다른 워커의 결과/접근 기록까지 반영
+    """
+
+    def __init__(self, root: str = "static/results", web_prefix: str = "/static/results",
+                 max_bytes: int = 5 * 1024 ** 3, ttl: float = 7 * 24 * 3600, shard_depth: int = 1,
+                 sweep_interval: float = 300.0, persist_interval: float = 60.0,
+                 on_evict: Optional[Callable[[str, str], None]] = None, shared: bool = False):
+        self.root = root
+        self.web_prefix = web_prefix
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.shard_depth = shard_depth
+        self.sweep_interval = sweep_interval
+        self.persist_interval = persist_interval   # atime 기록 최소 간격 (요청마다 utime 하지 않도록)
+        self.on_evict = on_evict                   # (web_path, file_path) → 파생 이미지 등 정리
+        self.shared = shared
+
+        # key → [file_path, web_path, size, last_access, persisted_access] (접근 순서대로)
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.total_bytes = 0
+        self.evicted = 0
+        self.expired = 0
+        self.evicted_bytes = 0
+        self.last_sweep: Optional[float] = None
+
+    # --- 저장 ---
+    def allocate(self, ext: str = "png") -> Tuple[str, str]:
+        """ 새 결과 파일 경로 (file_path, web_path), 분산 폴더는 미리 생성 """
+        name = uuid.uuid4().hex
+        shards = [name[i * 2:i * 2 + 2] for i in range(self.shard_depth)]
+        directory = os.path.join(self.root, *shards)
+        os.makedirs(directory, exist_ok=True)
+        relative = "/".join(shards + [f"{name}.{ext}"])
+        return os.path.join(directory, f"{name}.{ext}"), f"{self.web_prefix}/{relative}"
+
+    def register(self, file_path: str, web_path: str):
+        """ 저장이 끝난 결과 등록, 용량을 넘으면 바로 LRU 정리 """
+        size = os.path.getsize(file_path)
+        now = time.time()
+        key = result_key(web_path)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[2]
+            self._entries[key] = [file_path, web_path, size, now, now]
+            self.total_bytes += size
+            victims = self._over_quota(keep=key)
+        self._remove_files(victims)
+
+    def touch(self, web_path: str):
+        """ 결과(또는 그 파생 이미지)가 조회됨 → 최근 사용으로 갱신 """
+        key = result_key(web_path)
+        now = time.time()
+        with self._lock:
+            known = key in self._entries
+        # 다른 워커가 저장한 결과 → 디스크에서 찾아 인덱스에 추가 (접근 기록이 대표 워커 정리에 반영되도록)
+        if not known and not (self.shared and self._adopt(key)):
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry[3] = now
+            self._entries.move_to_end(key)
+            persist = now - entry[4] >= self.persist_interval
+            if persist:
+                entry[4] = now
+            file_path = entry[0]
+        if persist:
+            try:
+                # mtime 은 그대로 (정적 파일 ETag/Last-Modified 가 바뀌지 않도록) atime 만 기록
+                os.utime(file_path, (now, os.stat(file_path).st_mtime))
+            except OSError:
+                pass
+
+    def delete(self, file_path: str):
+        """ 다른 곳(결과 캐시 LRU 등)에서 결과를 지울 때: 인덱스 + 파일 + 파생 이미지 함께 정리 """
+        key = result_key(os.path.basename(file_path))
+        with self._lock:
+            entry = self._entries.get(key)
+            victim = self._drop(key) if entry is not None and entry[0] == file_path else (file_path, None)
+        self._remove_files([victim])
+
+    def flush(self):
+        """ persist_interval 때문에 아직 atime 에 안 쓴 접근 기록을 파일에 기록 (재스캔 전에 호출) """
+        pending = []
+        with self._lock:
+            for entry in self._entries.values():
+                if entry[3] > entry[4]:
+                    entry[4] = entry[3]
+                    pending.append((entry[0], entry[3]))
+        for file_path, last_access in pending:
+            try:
+                os.utime(file_path, (last_access, os.stat(file_path).st_mtime))
+            except OSError:
+                pass
+
+    # --- 정리 ---
+    def scan(self, verbose: bool = True):
+        """
+        서버 시작 시: 디스크의 결과 파일로 인덱스 재구성 (마지막 접근 = 파일 atime)
+        - 공유 모드에서 주기적으로 다시 읽을 때는 이 워커의 최근 접근을 먼저 기록해서 잃지 않음
+        """
+        self.flush()
+        found = []
+        for directory, _, names in os.walk(self.root):
+            relative_dir = os.path.relpath(directory, self.root).replace(os.sep, "/")
+            for name in names:
+                path = os.path.join(directory, name)
+                if name.startswith(".") or name.endswith(".tmp"):
+                    continue
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                relative = name if relative_dir == "." else f"{relative_dir}/{name}"
+                last_access = max(st.st_atime, st.st_mtime)
+                found.append((last_access, path, f"{self.web_prefix}/{relative}", st.st_size))
+
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+            for last_access, path, web_path, size in sorted(found):
+                self._entries[result_key(web_path)] = [path, web_path, size, last_access, last_access]
+                self.total_bytes += size
+        if verbose:
+            print(f"   🗂️ 결과 저장소: {len(found)}개, {self.total_bytes / 1024 ** 2:.1f}MB")
+
+    def sweep(self) -> Dict[str, int]:
+        """ TTL 지난 결과 삭제 후 용량 초과분을 LRU 순서로 삭제 (블로킹) """
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            victims = []
+            for key, entry in self._entries.items():
+                if entry[3] >= cutoff:
+                    break  # 접근 순서로 정렬되어 있으므로 여기부터는 모두 최근
+                victims.append(key)
+            expired = [self._drop(key) for key in victims]
+            self.expired += len(expired)
+            evicted = self._over_quota()
+            self.last_sweep = time.time()
+        self._remove_files(expired + evicted)
+        return {"expired": len(expired), "evicted": len(evicted)}
+
+    async def start(self, sweeper: bool = True):
+        """
+        lifespan 에서 호출: 기존 파일 인덱싱 후, sweeper 면 1회 정리 + 주기적으로 스위퍼 실행
+        (여러 워커가 폴더를 공유할 때는 대표 워커 하나만 sweeper=True)
+        """
+        await asyncio.to_thread(self.scan)
+        if not sweeper:
+            return
+        await asyncio.to_thread(self.sweep)
+        self._task = asyncio.create_task(self._sweeper())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "files": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "expired": self.expired,
+                "evicted": self.evicted,
+                "evicted_bytes": self.evicted_bytes,
+                "last_sweep": self.last_sweep,
+            }
+
+    async def _sweeper(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                if self.shared:
+                    await asyncio.to_thread(self.scan, False)
+                result = await asyncio.to_thread(self.sweep)
+                if result["expired"] or result["evicted"]:
+                    print(f"   🧹 결과 정리: 만료 {result['expired']}개, 용량 초과 {result['evicted']}개")
+            except Exception as e:
+                print(f"   ⚠️ 결과 정리 실패: {e}")
+
+    def _adopt(self, key: str) -> bool:
+        """ 결과 이름(key)으로 분산 폴더에서 원본 파일을 찾아 인덱스에 추가 (못 찾으면 False) """
+        if not _RESULT_NAME.fullmatch(key):
+            return False
+        directory = os.path.join(self.root, *[key[i * 2:i * 2 + 2] for i in range(self.shard_depth)])
+        try:
+            with os.scandir(directory) as entries:
+                for item in entries:
+                    if os.path.splitext(item.name)[0] == key and item.is_file():
+                        st = item.stat()
+                        relative = os.path.relpath(item.path, self.root).replace(os.sep, "/")
+                        last_access = max(st.st_atime, st.st_mtime)
+                        with self._lock:
+                            if key not in self._entries:
+                                # persisted_access 를 0 으로 → 첫 접근 때 바로 atime 기록
+                                self._entries[key] = [item.path, f"{self.web_prefix}/{relative}",
+                                                      st.st_size, last_access, 0.0]
+                                self._entries.move_to_end(key, last=False)
+                                self.total_bytes += st.st_size
+                        return True
+        except FileNotFoundError:
+            pass
+        return False
+
+    # --- 내부 (잠금 안에서 호출) ---
+    def _over_quota(self, keep: Optional[str] = None) -> List[Tuple[str, Optional[str]]]:
+        victims = []
+        for key in list(self._entries):
+            if self.total_bytes <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            size = self._entries[key][2]
+            victims.append(self._drop(key))
+            self.evicted += 1
+            self.evicted_bytes += size
+        return victims
+
+    def _drop(self, key: str) -> Tuple[str, Optional[str]]:
+        file_path, web_path, size, _, _ = self._entries.pop(key)
+        self.total_bytes -= size
+        return file_path, web_path
+
+    def _remove_files(self, victims: List[Tuple[str, Optional[str]]]):
+        """ 파일 삭제는 잠금 밖에서 """
+        for file_path, web_path in victims:
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+            if web_path is not None and self.on_evict is not None:
+                self.on_evict(web_path, file_path)
@@ -0,0 +1,201 @@
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.services import metrics
+
+# 대기열 종류: 사용자가 화면 앞에서 기다리는 요청 > 배치 / 비동기 작업
+INTERACTIVE = "interactive"
+BULK = "bulk"
+LANES = (INTERACTIVE, BULK)
+
+
+class RateLimitedError(Exception):
+    """ 클라이언트별 요청 한도 초과 → API 429 """
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limit exceeded, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class WaitCancelledError(Exception):
+    """ 추론 차례를 기다리던 중 취소됨 (기다리던 요청이 모두 떠남) """
+
+
+class TokenBucket:
+    """ 초당 rate 개씩 채워지고 최대 burst 개까지 쌓이는 토큰 """
+
+    def __init__(self, burst: float, now: float):
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, cost: float, rate: float, burst: float, now: float) -> float:
+        """ 토큰을 쓰면 0, 모자라면 필요한 만큼 채워질 때까지의 시간(초) """
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / rate
+
+
+@dataclass
+class _Waiter:
+    client: str
+    lane: str
+    granted: bool = False
+    cancelled: bool = False
+
+
+class FairScheduler:
+    """
+    추론 호출 앞단의 스케줄러 (원격 GPU 슬롯을 클라이언트끼리 공정하게 나눔)
+    - 접수(admit): 클라이언트(API 키 또는 IP)별 토큰 버킷 → 한 클라이언트가 반복 요청으로 독점하지 못함
+    - 슬롯(slot): 동시에 추론하는 수를 slots 개로 제한, 빈 슬롯은 가중 공정 큐(WFQ) 순서로 배정
+      클라이언트별 가상 종료 시각 = max(현재 가상 시각, 그 클라이언트의 마지막 종료 시각) + 1 / 가중치
+      → 요청을 많이 쌓아둔 클라이언트도 다른 클라이언트와 번갈아 처리됨
+    - 대기열 두 개: interactive 우선, 단 둘 다 기다리면 bulk_every 번째마다 bulk 에 한 번 (굶주림 방지)
+    - 대기 시간은 fitting_scheduler_wait_seconds{lane} 히스토그램으로 기록
+    """
+
+    def __init__(self, slots: int = 2, rate: float = 0.5, burst: float = 10,
+                 weights: Optional[Dict[str, float]] = None, bulk_every: int = 5,
+                 clock: Callable[[], float] = time.monotonic):
+        self.slots = max(1, slots)
+        self.rate = rate                   # 초당 토큰 (0 이하면 요청 한도 없음)
+        self.burst = burst
+        self.weights = weights or {}
+        self.bulk_every = max(1, bulk_every)
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._queues: Dict[str, List[Tuple[float, int, _Waiter]]] = {lane: [] for lane in LANES}
+        self._virtual_time: Dict[str, float] = {lane: 0.0 for lane in LANES}
+        self._finish: Dict[Tuple[str, str], float] = {}
+        self._seq = itertools.count()
+        self._since_bulk = 0
+        self.busy = 0
+        self.waiting = {lane: 0 for lane in LANES}
+        self.dispatched = {lane: 0 for lane in LANES}
+        self.rate_limited = {lane: 0 for lane in LANES}
+
+    # --- 접수 ---
+    def admit(self, client: str, cost: float = 1, lane: str = INTERACTIVE):
+        """ 토큰이 없으면 RateLimitedError (배치는 옷 개수만큼 cost) """
+        if self.rate <= 0:
+            return
+        now = self._clock()
+        with self._cond:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                self._prune_buckets(now)
+                bucket = self._buckets[client] = TokenBucket(self.burst, now)
+            # burst 보다 큰 배치도 언젠가는 통과하도록 한 번에 최대 burst 만큼만 차감
+            wait = bucket.take(min(cost, self.burst), self.rate, self.burst, now)
+            if wait > 0:
+                self.rate_limited[lane] += 1
+        if wait > 0:
+            metrics.RATE_LIMITED.inc(lane=lane)
+            raise RateLimitedError(wait)
+
+    # --- 추론 슬롯 ---
+    @contextmanager
+    def slot(self, client: str, lane: str = INTERACTIVE, cancel: Optional[threading.Event] = None):
+        """ 차례가 올 때까지 기다렸다가 슬롯 하나를 쓰고 반납 (블로킹, 작업 스레드에서 호출) """
+        t0 = time.perf_counter()
+        self._acquire(client, lane, cancel)
+        metrics.SCHEDULER_WAIT_SECONDS.observe(time.perf_counter() - t0, lane=lane)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.busy -= 1
+                self._dispatch()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "slots": self.slots,
+                "busy": self.busy,
+                "waiting": dict(self.waiting),
+                "dispatched": dict(self.dispatched),
+                "rate_limited": dict(self.rate_limited),
+                "clients": len(self._buckets),
+            }
+
+    # --- 내부 ---
+    def _acquire(self, client: str, lane: str, cancel: Optional[threading.Event]):
+        with self._cond:
+            if self.busy < self.slots and not any(self.waiting.values()):
+                self.busy += 1
+                self.dispatched[lane] += 1
+                return
+
+            weight = self.weights.get(client, 1.0)
+            key = (lane, client)
+            tag = max(self._virtual_time[lane], self._finish.get(key, 0.0)) + 1.0 / weight
+            self._finish[key] = tag
+            waiter = _Waiter(client, lane)
+            heapq.heappush(self._queues[lane], (tag, next(self._seq), waiter))
+            self._set_waiting(lane, +1)
+
+            while not waiter.granted:
+                self._cond.wait(timeout=0.5 if cancel is not None else None)
+                if not waiter.granted and cancel is not None and cancel.is_set():
+                    waiter.cancelled = True  # 힙에서는 꺼낼 때 건너뜀
+                    self._set_waiting(lane, -1)
+                    raise WaitCancelledError("Cancelled while waiting for an inference slot")
+
+    def _dispatch(self):
+        """ 빈 슬롯을 대기자에게 배정 (잠금 안에서 호출) """
+        granted = False
+        while self.busy < self.slots:
+            lane = self._next_lane()
+            if lane is None:
+                break
+            tag, _, waiter = heapq.heappop(self._queues[lane])
+            self._virtual_time[lane] = tag
+            waiter.granted = True
+            self.busy += 1
+            self.dispatched[lane] += 1
+            self._set_waiting(lane, -1)
+            granted = True
+        if granted:
+            self._cond.notify_all()
+        if len(self._finish) > 10000:
+            # 가상 시각보다 앞선 종료 시각은 의미 없음 → 정리
+            self._finish = {k: v for k, v in self._finish.items() if v > self._virtual_time[k[0]]}
+
+    def _next_lane(self) -> Optional[str]:
+        for queue in self._queues.values():
+            while queue and queue[0][2].cancelled:
+                heapq.heappop(queue)
+        has_interactive = bool(self._queues[INTERACTIVE])
+        has_bulk = bool(self._queues[BULK])
+        if has_interactive and has_bulk:
+            if self._since_bulk + 1 >= self.bulk_every:
+                self._since_bulk = 0
+                return BULK
+            self._since_bulk += 1
+            return INTERACTIVE
+        if has_interactive:
+            return INTERACTIVE
+        if has_bulk:
+            self._since_bulk = 0
+            return BULK
+        return None
+
+    def _set_waiting(self, lane: str, delta: int):
+        self.waiting[lane] += delta
+        metrics.SCHEDULER_QUEUED.set(self.waiting[lane], lane=lane)
+
+    def _prune_buckets(self, now: float):
+        """ 버킷이 너무 많아지면 이미 가득 찬(오래 쉬고 있는) 클라이언트 버킷 삭제 """
+        if len(self._buckets) < 10000:
+            return
+        full_after = self.burst / self.rate
+        self._buckets = {c: b for c, b in self._buckets.items() if now - b.updated < full_after}
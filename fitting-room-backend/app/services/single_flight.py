@@ -0,0 +1,66 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict
+
+from app.services import metrics
+
+
+class FlightCancelledError(Exception):
+    """ 기다리던 요청이 모두 떠나서 공유 작업을 중단함 (파이프라인 단계 사이에서 확인) """
+
+
+@dataclass
+class _Flight:
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class SingleFlight:
+    """
+    같은 키의 작업이 이미 진행 중이면 새로 시작하지 않고 그 결과를 같이 기다림 (요청 합치기)
+    - 더블탭 / 프론트 재시도로 같은 입력의 피팅이 동시에 들어와도 원격 추론은 한 번
+    - 대기자 하나가 취소되면(클라이언트 끊김) 그 대기만 취소, 마지막 대기자까지 떠나면 작업도 취소
+    - 작업이 끝나면 바로 잊음 (결과 보관은 결과 캐시 담당)
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.started = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.started += 1
+        else:
+            self.coalesced += 1
+            metrics.COALESCED_REQUESTS.inc()
+
+        flight.waiters += 1
+        try:
+            # shield: 이 대기자가 취소되어도 공유 작업은 계속
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # 마지막 대기자가 떠남 → 작업 취소, 새 요청은 처음부터 다시 시작하도록 바로 잊음
+                self._forget(key, flight)
+                flight.task.cancel()
+                self.cancelled += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._flights),
+            "waiters": sum(f.waiters for f in self._flights.values()),
+            "started": self.started,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+        }
+
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
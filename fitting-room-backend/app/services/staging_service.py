@@ -0,0 +1,163 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List
+from PIL import Image
+
+from app.services.file_lock import try_lock
+
+# tmpfs(메모리) 에 스테이징할 때 기본 위치
+SHM_DIR = "/dev/shm"
+# 프로세스별 폴더의 주인 표시: 살아 있는 동안 잠가 둠 (잠글 수 있으면 주인이 종료된 폴더)
+OWNER_LOCK = ".owner"
+
+
+class StagingHandle:
+    """ 요청 하나가 쓰는 스테이징 파일 묶음 (with 블록이 끝나면 반납) """
+
+    def __init__(self, stager: "InputStager"):
+        self.id = uuid.uuid4().hex
+        self._stager = stager
+        self._names: List[str] = []
+
+    def add_bytes(self, data: bytes, ext: str) -> str:
+        """ 이미 인코딩된 바이트를 스테이징 → 파일 경로 """
+        name = f"{hashlib.sha256(data).hexdigest()[:32]}.{ext}"
+        path = self._stager._acquire(name, lambda: data)
+        self._names.append(name)
+        return path
+
+    def add_image(self, image: Image.Image) -> str:
+        """ PIL 이미지를 빠른 PNG 압축으로 스테이징 → 파일 경로 """
+        # 픽셀 내용으로 키를 만들어서 같은 이미지면 인코딩 자체를 건너뜀
+        digest = hashlib.sha256(f"{image.mode}:{image.size}:".encode())
+        digest.update(image.tobytes())
+        name = f"{digest.hexdigest()[:32]}.png"
+
+        def encode():
+            buffer = io.BytesIO()
+            image.save(buffer, format="PNG", compress_level=self._stager.png_compress_level)
+            return buffer.getvalue()
+
+        path = self._stager._acquire(name, encode)
+        self._names.append(name)
+        return path
+
+    def release(self):
+        for name in self._names:
+            self._stager._release(name)
+        self._names = []
+
+
+class InputStager:
+    """
+    원격 추론 입력 파일 스테이징
+    - 요청마다 고유한 핸들 → 동시 요청끼리 파일을 덮어쓰지 않음
+    - 파일명 = 내용 해시, 참조 카운트로 관리 → 같은 내용은 다시 쓰지 않고 재사용
+    - with 블록이 끝나고 아무도 안 쓰면 즉시 삭제 (폴더가 계속 커지지 않음)
+    - backing="tmpfs" 이면 /dev/shm (메모리) 에 저장해서 디스크 I/O 제거
+    - 참조 카운트는 프로세스 안에만 있으므로 프로세스(워커)마다 root/<pid>-<id> 폴더를 따로 씀
+      → 다른 워커가 같은 내용을 올리는 중에 지우지 않음, purge 는 주인이 종료된 폴더만 정리
+    """
+
+    def __init__(self, root: str = "temp_uploads", backing: str = "disk", png_compress_level: int = 1):
+        if backing in ("tmpfs", "memory"):
+            base = SHM_DIR if os.path.isdir(SHM_DIR) else tempfile.gettempdir()
+            root = os.path.join(base, "fitting-room-staging")
+        self.base = root
+        self.root = os.path.join(root, f"{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        self.backing = backing
+        self.png_compress_level = png_compress_level
+        os.makedirs(self.root, exist_ok=True)
+        self._owner = try_lock(os.path.join(self.root, OWNER_LOCK))
+
+        self._refcounts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.reused = 0
+        self.written = 0
+
+    @contextmanager
+    def open(self):
+        handle = StagingHandle(self)
+        try:
+            yield handle
+        finally:
+            handle.release()
+
+    def purge(self):
+        """ 서버 시작 시: 이전 실행에서 남은 파일 정리 (살아 있는 다른 워커의 폴더는 건드리지 않음) """
+        for name in os.listdir(self.base):
+            path = os.path.join(self.base, name)
+            if path == self.root:
+                continue
+            if not os.path.isdir(path):
+                os.remove(path)  # 프로세스별 폴더 이전 방식으로 남은 파일
+                continue
+            owner = try_lock(os.path.join(path, OWNER_LOCK))
+            if owner is None:
+                continue  # 주인이 아직 실행 중
+            owner.close()
+            shutil.rmtree(path, ignore_errors=True)
+        with self._lock:
+            for name in os.listdir(self.root):
+                path = os.path.join(self.root, name)
+                if name != OWNER_LOCK and name not in self._refcounts and os.path.isfile(path):
+                    os.remove(path)
+
+    def close(self):
+        """ 종료 시: 이 프로세스의 폴더 삭제 """
+        shutil.rmtree(self.root, ignore_errors=True)
+        if self._owner is not None:
+            self._owner.close()
+            self._owner = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backing": self.backing,
+                "root": self.root,
+                "staged_files": len(self._refcounts),
+                "written": self.written,
+                "reused": self.reused,
+            }
+
+    def _acquire(self, name: str, produce) -> str:
+        path = os.path.join(self.root, name)
+        with self._lock:
+            if name in self._refcounts:
+                self._refcounts[name] += 1
+                self.reused += 1
+                return path
+
+        # 인코딩/쓰기는 잠금 밖에서 (다른 요청을 막지 않도록), 끝난 뒤 rename
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(produce())
+
+        with self._lock:
+            if name in self._refcounts:
+                # 그 사이 다른 요청이 같은 내용을 먼저 올림
+                os.remove(tmp_path)
+                self._refcounts[name] += 1
+                self.reused += 1
+            else:
+                os.replace(tmp_path, path)
+                self._refcounts[name] = 1
+                self.written += 1
+        return path
+
+    def _release(self, name: str):
+        with self._lock:
+            self._refcounts[name] -= 1
+            if self._refcounts[name] > 0:
+                return
+            del self._refcounts[name]
+            try:
+                os.remove(os.path.join(self.root, name))
+            except FileNotFoundError:
+                pass
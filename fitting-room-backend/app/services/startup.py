@@ -0,0 +1,124 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.services import metrics
+
+# 구성 요소 상태
+PENDING = "pending"      # 의존하는 구성 요소를 기다리는 중
+STARTING = "starting"
+READY = "ready"
+FAILED = "failed"        # retry_interval 이 있으면 잠시 후 재시도
+
+
+@dataclass
+class Component:
+    name: str
+    init: Callable[[], Any]
+    depends_on: Tuple[str, ...] = ()
+    retry_interval: Optional[float] = None
+    state: str = PENDING
+    error: Optional[str] = None
+    attempts: int = 0
+    seconds: Optional[float] = None          # 마지막 시도(성공한 시도)의 소요 시간
+    ready_at: Optional[float] = None         # 서버 시작부터 준비 완료까지(초)
+    event: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class StartupRegistry:
+    """
+    서버 시작 시 무거운 초기화(모델 로딩, 원격 연결, 폴더 스캔, 워밍업)를 백그라운드에서 동시에 실행
+    - lifespan 은 작업만 걸어두고 바로 끝남 → 포트가 즉시 열리고 /healthz 는 바로 200
+    - depends_on 의 구성 요소가 준비된 뒤에 시작, 실패하면 retry_interval 초마다 재시도
+    - 구성 요소별 상태 / 소요 시간 → /readyz, fitting_component_ready / fitting_startup_seconds 지표
+    init 은 일반 함수(스레드에서 실행) 또는 async 함수
+    """
+
+    def __init__(self):
+        self._components: Dict[str, Component] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.started_at: Optional[float] = None
+        self.ready_seconds: Optional[float] = None
+
+    def add(self, name: str, init: Callable[[], Any], depends_on: Tuple[str, ...] = (),
+            retry_interval: Optional[float] = None):
+        self._components[name] = Component(name, init, tuple(depends_on), retry_interval)
+        metrics.COMPONENT_READY.set(0, component=name)
+
+    def start(self):
+        self.started_at = time.monotonic()
+        for component in self._components.values():
+            self._tasks.append(asyncio.create_task(self._run(component), name=f"startup:{component.name}"))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def wait(self, *names: str):
+        """ 구성 요소가 준비될 때까지 대기 (테스트 / 스크립트용) """
+        for name in names or tuple(self._components):
+            await self._components[name].event.wait()
+
+    def is_ready(self, *names: str) -> bool:
+        """ 주어진(없으면 전체) 구성 요소가 모두 준비됨, 등록되지 않은 이름은 무시 """
+        targets = [self._components[n] for n in names if n in self._components] if names \
+            else list(self._components.values())
+        return all(c.state == READY for c in targets)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "ready": self.is_ready(),
+            "startup_seconds": self.ready_seconds,
+            "components": {
+                c.name: {
+                    "state": c.state,
+                    "seconds": c.seconds,
+                    "ready_at": c.ready_at,
+                    "attempts": c.attempts,
+                    "depends_on": list(c.depends_on),
+                    "error": c.error,
+                }
+                for c in self._components.values()
+            },
+        }
+
+    async def _run(self, component: Component):
+        for name in component.depends_on:
+            await self._components[name].event.wait()
+        while True:
+            component.state = STARTING
+            component.attempts += 1
+            t0 = time.perf_counter()
+            try:
+                if asyncio.iscoroutinefunction(component.init):
+                    await component.init()
+                else:
+                    await asyncio.to_thread(component.init)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                component.seconds = time.perf_counter() - t0
+                component.state = FAILED
+                component.error = f"{type(e).__name__}: {e}"
+                print(f"   ❌ 초기화 실패 [{component.name}] ({component.attempts}회째): {component.error}")
+                if component.retry_interval is None:
+                    return
+                await asyncio.sleep(component.retry_interval)
+                continue
+
+            component.seconds = time.perf_counter() - t0
+            component.ready_at = time.monotonic() - self.started_at
+            component.state = READY
+            component.error = None
+            component.event.set()
+            metrics.COMPONENT_READY.set(1, component=component.name)
+            metrics.STARTUP_SECONDS.set(component.seconds, component=component.name)
+            print(f"   ✅ 초기화 완료 [{component.name}] {component.seconds:.2f}초")
+            if self.ready_seconds is None and self.is_ready():
+                self.ready_seconds = time.monotonic() - self.started_at
+                breakdown = ", ".join(f"{c.name} {c.seconds:.2f}s" for c in self._components.values())
+                print(f"🚦 서버 준비 완료 ({self.ready_seconds:.2f}초): {breakdown}")
+            return
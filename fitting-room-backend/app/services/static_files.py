@@ -0,0 +1,157 @@
+import hashlib
+import os
+import stat
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from mimetypes import guess_type
+from typing import Callable, Iterable, Optional, Tuple
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Scope
+
+from app.services.content_hash import FileHashIndex
+from app.services.http_headers import accepted
+from app.services.derivative_service import derived_relative
+
+# 이미지 형식 → (MIME, 확장자) : 미리 만들어 둔 원본 크기 변환본(derived/..._full.{확장자})
+IMAGE_VARIANTS = {"avif": ("image/avif", "avif"), "webp": ("image/webp", "webp")}
+# 미리 압축해 둔 파일 (app.js → app.js.br / app.js.gz), 선호 순서
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+COMPRESSIBLE_TYPES = ("application/json", "application/javascript", "image/svg+xml")
+
+
+def _compressible(media_type: str) -> bool:
+    return media_type.startswith("text/") or media_type in COMPRESSIBLE_TYPES
+
+
+@dataclass
+class _Resolved:
+    full_path: str
+    stat_result: os.stat_result
+    media_type: str
+    etag: str
+    cache_control: str
+    vary: Optional[str] = None
+    encoding: Optional[str] = None
+
+
+class TrackedStaticFiles(StaticFiles):
+    """
+    /static 서빙 + HTTP 캐싱 + 접근 기록
+    - 한 번 쓰면 바뀌지 않는 경로(immutable_prefixes: uuid/해시 이름의 옷, 결과, 파생 이미지)는
+      Cache-Control: immutable + 이름/크기/수정시각 기반 강한 ETag (파일을 읽지 않음), stat 결과도 잠깐 캐시
+    - 그 밖의 파일은 no-cache + 내용 SHA-256 강한 ETag (FileHashIndex: 크기/수정시각이 같으면 재사용)
+    - If-None-Match / If-Modified-Since → 304, Range / If-Range 는 FileResponse 가 처리
+    - Accept 에 AVIF/WebP 가 있고 더 작은 원본 크기 변환본이 있으면 그걸 보냄 (Vary: Accept)
+    - 텍스트류는 미리 압축된 .br / .gz 가 있으면 그걸 보냄 (Vary: Accept-Encoding)
+    - 파일을 성공적으로 내보낼 때마다 on_access("results/ab/abcd.png" 같은 요청 경로) 호출
+      → 결과 저장소가 최근 접근 시각을 갱신 (LRU/TTL 정리 기준)
+    """
+
+    def __init__(self, *args, on_access: Optional[Callable[[str], None]] = None,
+                 immutable_prefixes: Iterable[str] = ("clothes/", "results/", "derived/"),
+                 max_age: int = 31536000, stat_ttl: float = 1.0, stat_cache_size: int = 10000,
+                 variant_formats: Iterable[str] = ("avif", "webp"), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.on_access = on_access
+        self.immutable_prefixes = tuple(immutable_prefixes)
+        self.max_age = max_age
+        # 정리(삭제)된 파일을 계속 있다고 믿지 않도록 stat 캐시는 짧게
+        self.stat_ttl = stat_ttl
+        self.stat_cache_size = stat_cache_size
+        self.variant_formats = [f for f in variant_formats if f in IMAGE_VARIANTS]
+        self.hashes = FileHashIndex()
+        # 상대 경로 → (확인 시각, 전체 경로, stat 또는 None)
+        self._stats: "OrderedDict[str, Tuple[float, str, Optional[os.stat_result]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get_response(self, path: str, scope: Scope):
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+        request_headers = Headers(scope=scope)
+        resolved = await anyio.to_thread.run_sync(
+            self.resolve, path.replace("\\", "/"),
+            request_headers.get("accept", ""), request_headers.get("accept-encoding", ""))
+        if resolved is None:
+            # 없는 파일 / 디렉터리 등은 기본 동작 (404, html 모드)
+            response = await super().get_response(path, scope)
+        else:
+            headers = {"cache-control": resolved.cache_control, "etag": resolved.etag}
+            if resolved.vary:
+                headers["vary"] = resolved.vary
+            if resolved.encoding:
+                headers["content-encoding"] = resolved.encoding
+            response = FileResponse(resolved.full_path, stat_result=resolved.stat_result,
+                                    media_type=resolved.media_type, headers=headers)
+            if self.is_not_modified(response.headers, request_headers):
+                response = NotModifiedResponse(response.headers)
+        if self.on_access is not None and response.status_code in (200, 206, 304):
+            self.on_access(path.replace("\\", "/"))
+        return response
+
+    def resolve(self, path: str, accept: str = "", accept_encoding: str = "") -> Optional[_Resolved]:
+        """ 요청 경로 → 실제로 보낼 파일 + 캐시 헤더 (블로킹: stat / 해시) """
+        immutable = path.startswith(self.immutable_prefixes)
+        full_path, st = self._stat(path, immutable)
+        if st is None or not stat.S_ISREG(st.st_mode):
+            return None
+        media_type = guess_type(path)[0] or "application/octet-stream"
+        served_path, served_stat, served_type, vary, encoding = path, st, media_type, None, None
+
+        if media_type.startswith("image/") and path.startswith(("clothes/", "results/")):
+            vary = "Accept"
+            types = accepted(accept)
+            for fmt in self.variant_formats:
+                variant_type, ext = IMAGE_VARIANTS[fmt]
+                if variant_type not in types or variant_type == media_type:
+                    continue
+                variant = "derived/" + derived_relative(path, "full", ext)
+                variant_full, variant_stat = self._stat(variant, immutable)
+                if variant_stat is not None and variant_stat.st_size < served_stat.st_size:
+                    served_path, full_path, served_stat, served_type = variant, variant_full, variant_stat, variant_type
+        elif _compressible(media_type):
+            vary = "Accept-Encoding"
+            codings = accepted(accept_encoding)
+            for coding, suffix in ENCODINGS:
+                if coding not in codings:
+                    continue
+                encoded_full, encoded_stat = self._stat(path + suffix, immutable)
+                if encoded_stat is not None:
+                    served_path, full_path, served_stat, encoding = path + suffix, encoded_full, encoded_stat, coding
+                    break
+
+        if immutable:
+            # 이름이 uuid/해시라 같은 경로의 내용은 바뀌지 않음 → 이름 + 크기 + 수정시각이면 충분
+            raw = f"{served_path}:{served_stat.st_size}:{served_stat.st_mtime_ns}"
+            etag = f'"{hashlib.sha256(raw.encode()).hexdigest()[:32]}"'
+            cache_control = f"public, max-age={self.max_age}, immutable"
+        else:
+            try:
+                etag = f'"{self.hashes.digest(full_path)[:32]}"'
+            except FileNotFoundError:
+                return None
+            cache_control = "no-cache"
+        return _Resolved(full_path, served_stat, served_type, etag, cache_control, vary, encoding)
+
+    def _stat(self, path: str, cache: bool) -> Tuple[str, Optional[os.stat_result]]:
+        """ lookup_path + (바뀌지 않는 경로만) stat_ttl 초 동안 결과 캐시, 없는 파일도 캐시 """
+        if not cache:
+            return self.lookup_path(path)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._stats.get(path)
+            if entry is not None and now - entry[0] < self.stat_ttl:
+                return entry[1], entry[2]
+        full_path, st = self.lookup_path(path)
+        with self._lock:
+            self._stats[path] = (now, full_path, st)
+            self._stats.move_to_end(path)
+            while len(self._stats) > self.stat_cache_size:
+                self._stats.popitem(last=False)
+        return full_path, st
@@ -0,0 +1,43 @@
+import json
+from typing import Dict, Tuple
+
+# multipart 경계 / 필드 헤더 / 다른 폼 필드 여유분
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadLimitMiddleware:
+    """
+    Content-Length 가 한도를 넘는 업로드를 본문을 읽기 전에 413 으로 거절 (순수 ASGI 미들웨어)
+    - FastAPI 는 UploadFile 파라미터를 넘기기 전에 multipart 본문 전체를 임시 파일로 받아 두므로
+      핸들러 안에서 검사하면 이미 다 받은 뒤임 → 라우팅 전에 헤더만 보고 판단
+    - Content-Length 가 없는(chunked) 업로드는 그대로 통과, 저장 단계의 스트리밍 한도(save_cloth_stream)가 막음
+    """
+
+    def __init__(self, app, limits: Dict[Tuple[str, str], int]):
+        self.app = app
+        self.limits = limits   # (메서드, 경로) → 본문 최대 바이트
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            limit = self.limits.get((scope["method"], scope["path"]))
+            if limit is not None and self._content_length(scope) > limit:
+                await self._reject(send)
+                return
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _content_length(scope) -> int:
+        value = dict(scope.get("headers") or []).get(b"content-length", b"")
+        return int(value) if value.isdigit() else 0
+
+    @staticmethod
+    async def _reject(send):
+        body = json.dumps({"detail": "File too large"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            # 클라이언트가 나머지 본문을 계속 보내지 않도록 연결을 닫음
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                        (b"connection", b"close")],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,20 @@
+import argparse
+from app import config
+from app.services.ai_service import AIEngine
+from app.services.cutout_cache import ClothCutoutCache
+
+# 기존 static/clothes 옷들의 누끼(배경 제거 + 화질 개선) 캐시를 미리 만들어 두는 스크립트
+# 사용법: python backfill_cutouts.py [--cloth-dir static/clothes]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute background-removed garments")
+    parser.add_argument("--cloth-dir", default="static/clothes")
+    parser.add_argument("--cache-dir", default=config.CUTOUT_CACHE_DIR)
+    args = parser.parse_args()
+
+    engine = AIEngine(connect=False)  # 원격 GPU 연결은 필요 없음
+    cache = ClothCutoutCache(engine, cache_dir=args.cache_dir)
+
+    print(f"🧊 누끼 캐시 백필 시작: {args.cloth_dir} → {args.cache_dir}")
+    result = cache.backfill(args.cloth_dir)
+    print(f"🏁 완료: 생성 {result['built']}개, 건너뜀 {result['skipped']}개, 실패 {result['failed']}개")
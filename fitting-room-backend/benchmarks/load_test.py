@@ -0,0 +1,331 @@
+import argparse
+import asyncio
+import io
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+from PIL import Image
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 서비스 전체 부하 테스트: 실제 앱(uvicorn)을 스텁 추론 백엔드 + 채워진 옷 카탈로그로 띄우고 동시 요청
+# - 엔드포인트(시나리오)별 p50/p95/p99 지연, 처리량, 서버 메모리(RSS) 측정
+# - 결과를 JSON 기준값으로 저장하고, 다음 실행에서 비교해서 회귀를 잡음
+# 사용법:
+#   python benchmarks/load_test.py --clothes 500 --requests 300 --concurrency 16 --save baseline.json
+#   python benchmarks/load_test.py --compare baseline.json --tolerance 0.2
+
+SCENARIOS = ["clothes_list", "clothes_page", "clothes_etag", "upload", "try_on", "try_on_cached"]
+
+
+def _jpeg(size, seed: int, quality: int = 85) -> bytes:
+    """ 시드별로 내용이 다른 JPEG (업로드 중복 제거 / 결과 캐시에 걸리지 않도록) """
+    rng = np.random.default_rng(seed)
+    w, h = size
+    base = rng.integers(0, 256, 3, dtype=np.uint8)
+    pixels = np.broadcast_to(base, (h, w, 3)).copy()
+    pixels[h // 4: h - h // 4, w // 4: w - w // 4] = rng.integers(0, 256, 3, dtype=np.uint8)
+    pixels[0, :8] = np.frombuffer(seed.to_bytes(24, "little"), dtype=np.uint8).reshape(8, 3)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels, "RGB").save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _rss_mb(pid: int):
+    """ /proc 기준 서버 프로세스 상주 메모리(MB), 지원 안 되는 OS 면 None """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def _is_success(status: str) -> bool:
+    """ 2xx 와 304(ETag 일치)만 성공 (429 / 5xx / 연결 오류는 실패) """
+    return status.isdigit() and (200 <= int(status) < 300 or status == "304")
+
+
+def _percentile(values, q):
+    return float(np.percentile(values, q)) * 1000 if values else None
+
+
+class Server:
+    """ 임시 작업 폴더에서 앱을 띄움 (static / cache 폴더가 실제 데이터와 섞이지 않도록) """
+
+    def __init__(self, args):
+        self.args = args
+        self.workdir = tempfile.mkdtemp(prefix="fitting-room-load-")
+        self.port = args.port or _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.process = None
+        self.log_path = os.path.join(self.workdir, "server.log")
+
+    def populate(self):
+        cloth_dir = os.path.join(self.workdir, "static", "clothes")
+        os.makedirs(cloth_dir)
+        os.makedirs(os.path.join(self.workdir, "static", "results"))
+        for i in range(self.args.clothes):
+            with open(os.path.join(cloth_dir, f"seed{i:06d}.jpg"), "wb") as f:
+                f.write(_jpeg((self.args.cloth_width, self.args.cloth_width * 4 // 3), i))
+
+    def start(self):
+        env = dict(os.environ)
+        env.update({
+            "PYTHONPATH": BACKEND_DIR + os.pathsep + env.get("PYTHONPATH", ""),
+            "INFERENCE_BACKEND": "stub",
+            "STUB_LATENCY": str(self.args.stub_latency),
+            "STUB_JITTER": str(self.args.stub_jitter),
+            "BACKGROUND_REMOVAL": "none",
+            # 모든 요청이 한 클라이언트(127.0.0.1)에서 오므로 클라이언트당 한도는 끔 (스케줄러 자체는 그대로 측정)
+            "RATE_LIMIT_PER_MINUTE": "0",
+        })
+        cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(self.port),
+               "--log-level", "warning"]
+        log = open(self.log_path, "wb")
+        self.process = subprocess.Popen(cmd, cwd=self.workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+        deadline = time.monotonic() + self.args.startup_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                break
+            try:
+                if httpx.get(f"{self.base_url}/readyz", timeout=1).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        self.stop()
+        with open(self.log_path, errors="replace") as f:
+            print(f.read()[-4000:])
+        raise RuntimeError("server did not become ready")
+
+    def rss_mb(self):
+        return _rss_mb(self.process.pid)
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if not self.args.keep:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def _build_requests(name: str, args, total: int, clothes: list, etag: str):
+    """ 시나리오별 요청 목록 (측정 전에 페이로드를 미리 만들어 둠) """
+    cloth_urls = clothes or ["/static/clothes/seed000000.jpg"]
+    if name == "clothes_list":
+        return [("GET", "/api/v1/clothes", {}) for _ in range(total)]
+    if name == "clothes_page":
+        return [("GET", "/api/v1/clothes", {"params": {"limit": args.page_size}}) for _ in range(total)]
+    if name == "clothes_etag":
+        return [("GET", "/api/v1/clothes", {"params": {"limit": args.page_size},
+                                            "headers": {"If-None-Match": etag}}) for _ in range(total)]
+    if name == "upload":
+        size = (args.cloth_width, args.cloth_width * 4 // 3)
+        return [("POST", "/api/v1/clothes",
+                 {"files": {"file": (f"u{i}.jpg", _jpeg(size, 10 ** 6 + i), "image/jpeg")}})
+                for i in range(total)]
+    if name in ("try_on", "try_on_cached"):
+        person_size = (args.person_width, args.person_width * 4 // 3)
+        cached = name == "try_on_cached"
+        person = _jpeg(person_size, 2 * 10 ** 6)
+        return [("POST", "/api/v1/try-on", {
+            "files": {"person_image": ("person.jpg", person if cached else _jpeg(person_size, 3 * 10 ** 6 + i),
+                                       "image/jpeg")},
+            "data": {"cloth_url": cloth_urls[0] if cached else cloth_urls[i % len(cloth_urls)],
+                     "category": "upper_body"},
+        }) for i in range(total)]
+    raise ValueError(f"Unknown scenario: {name}")
+
+
+async def _drive(client: httpx.AsyncClient, server: Server, requests: list, concurrency: int):
+    """
+    concurrency 개의 작업자가 요청 목록을 나눠서 보냄 → (성공 응답의 지연 목록, 상태 코드별 개수, 걸린 시간, 최대 RSS)
+    실패 응답(빠른 429 등)은 지연에 넣지 않음 → 거절이 늘어 지연이 좋아 보이는 일이 없도록
+    """
+    latencies = []
+    statuses = {}
+    pending = iter(requests)
+    peak_rss = server.rss_mb()
+
+    async def worker():
+        for method, path, kwargs in pending:
+            t0 = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            if _is_success(status):
+                latencies.append(time.perf_counter() - t0)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    async def sample_memory():
+        nonlocal peak_rss
+        while True:
+            rss = server.rss_mb()
+            if rss is not None:
+                peak_rss = max(peak_rss or 0, rss)
+            await asyncio.sleep(0.05)
+
+    sampler = asyncio.create_task(sample_memory())
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    sampler.cancel()
+    return latencies, statuses, elapsed, peak_rss
+
+
+async def run(args, server: Server) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=server.base_url, timeout=args.timeout, limits=limits) as client:
+        response = await client.get("/api/v1/clothes", params={"limit": args.page_size})
+        etag = response.headers.get("ETag", "")
+        clothes = [url.split(server.base_url, 1)[-1] for url in response.json()]
+
+        results = {}
+        for name in args.scenarios:
+            warmup = _build_requests(name, args, args.warmup, clothes, etag)
+            await _drive(client, server, warmup, args.concurrency)
+            rss_before = server.rss_mb()
+            requests = _build_requests(name, args, args.requests, clothes, etag)
+            latencies, statuses, elapsed, peak_rss = await _drive(client, server, requests, args.concurrency)
+            total = sum(statuses.values())
+            results[name] = {
+                "requests": total,
+                "errors": total - len(latencies),
+                "error_rate": (total - len(latencies)) / total if total else 0.0,
+                "concurrency": args.concurrency,
+                "statuses": statuses,
+                "p50_ms": _percentile(latencies, 50),
+                "p95_ms": _percentile(latencies, 95),
+                "p99_ms": _percentile(latencies, 99),
+                "mean_ms": float(np.mean(latencies)) * 1000 if latencies else None,
+                "max_ms": max(latencies) * 1000 if latencies else None,
+                "throughput_rps": len(latencies) / elapsed if elapsed else None,   # 성공 응답 기준
+                "rss_before_mb": rss_before,
+                "rss_peak_mb": peak_rss,
+                "rss_after_mb": server.rss_mb(),
+            }
+            _print_row(name, results[name])
+        return results
+
+
+def _fmt(value, digits=1):
+    return "-" if value is None else f"{value:.{digits}f}"
+
+
+def _print_row(name: str, r: dict):
+    print(f"{name:>14} | {_fmt(r['p50_ms']):>8} | {_fmt(r['p95_ms']):>8} | {_fmt(r['p99_ms']):>8} | "
+          f"{_fmt(r['throughput_rps']):>8} | {_fmt(r['rss_peak_mb']):>8} | {r['statuses']}")
+
+
+# 비교할 지표: (이름, 클수록 나쁜지)
+COMPARED = [("p50_ms", True), ("p95_ms", True), ("p99_ms", True), ("throughput_rps", False), ("rss_peak_mb", True)]
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """ 기준값 대비 tolerance 비율 이상 나빠진 지표 + 실패 응답(2xx / 304 가 아닌 상태)이 있는 시나리오 목록 """
+    regressions = []
+    print(f"\n{'scenario':>14} | {'metric':>14} | {'baseline':>9} | {'current':>9} | change")
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        # 실패가 하나라도 있으면 회귀 (지연 / 처리량은 성공 응답만으로 계산하므로 따로 확인해야 함)
+        failed = {status: count for status, count in result.get("statuses", {}).items() if not _is_success(status)}
+        old_rate = (base or {}).get("error_rate") or 0.0
+        new_rate = result.get("error_rate") or 0.0
+        if failed or new_rate > old_rate:
+            print(f"{name:>14} | {'error_rate':>14} | {old_rate:>9.2%} | {new_rate:>9.2%} | {failed}  ❌ REGRESSION")
+            regressions.append((name, "error_rate", old_rate, new_rate))
+        if base is None:
+            continue
+        for metric, higher_is_worse in COMPARED:
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = change > tolerance if higher_is_worse else change < -tolerance
+            flag = "  ❌ REGRESSION" if worse else ""
+            print(f"{name:>14} | {metric:>14} | {_fmt(old):>9} | {_fmt(new):>9} | {change:+.0%}{flag}")
+            if worse:
+                regressions.append((name, metric, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end load test for the fitting room API")
+    parser.add_argument("--scenarios", nargs="+", default=SCENARIOS, choices=SCENARIOS)
+    parser.add_argument("--clothes", type=int, default=200, help="number of garments in static/clothes")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--cloth-width", type=int, default=600)
+    parser.add_argument("--person-width", type=int, default=1200)
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="simulated remote inference seconds")
+    parser.add_argument("--stub-jitter", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--save", help="write results JSON (baseline) to this path")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression (0.2 = 20%%)")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary working directory")
+    args = parser.parse_args()
+
+    server = Server(args)
+    print(f"📦 카탈로그 생성: 옷 {args.clothes}벌 → {server.workdir}")
+    server.populate()
+    server.start()
+    print(f"🚀 서버 준비 완료: {server.base_url} (RSS {_fmt(server.rss_mb())}MB)\n")
+    print(f"{'scenario':>14} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'req/s':>8} | {'RSS MB':>8} | status")
+    try:
+        results = asyncio.run(run(args, server))
+    finally:
+        server.stop()
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "config": {k: v for k, v in vars(args).items() if k not in ("save", "compare", "keep")},
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 결과 저장: {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("config", {}).get("concurrency") != args.concurrency:
+            print("⚠️ 기준값과 동시성 설정이 다릅니다 (비교 결과가 부정확할 수 있음)")
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ 회귀 {len(regressions)}건 (허용 {args.tolerance:.0%})")
+            sys.exit(1)
+        print("\n✅ 기준값 대비 회귀 없음")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import torch
 import onnxruntime as ort
+from app.services.rembg_pool import select_providers
 
 print(f"🔥 PyTorch Version: {torch.__version__}")
 print(f"🔥 CUDA Available: {torch.cuda.is_available()}")
@@ -9,4 +10,5 @@ else:
     print("   ❌ GPU를 찾을 수 없습니다. (CPU 모드로 동작 중)")
 
 print(f"\n🚀 ONNX Runtime Device: {ort.get_device()}")
-print(f"   👉 Providers: {ort.get_available_providers()}")
\ No newline at end of file
+print(f"   👉 Providers: {ort.get_available_providers()}")
+print(f"   👉 rembg 세션 풀이 사용할 Providers: {select_providers()}")
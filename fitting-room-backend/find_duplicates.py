@@ -0,0 +1,36 @@
+import argparse
+import contextlib
+import json
+import sys
+from app import config
+from app.services.catalog_service import ClothCatalog
+
+# 카탈로그에서 서로 닮은 옷(크기 변경 / 재압축 / 살짝 잘린 재업로드) 묶음을 찾아 보고하는 스크립트
+# 지각 해시가 없는 옷은 먼저 계산해서 카탈로그에 저장 (삭제는 하지 않음)
+# 사용법: python find_duplicates.py [--phash-distance 10] [--dhash-distance 16] [--color-distance 40] [--json]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report near-duplicate garment clusters in the catalog")
+    parser.add_argument("--cloth-dir", default="static/clothes")
+    parser.add_argument("--catalog-db", default=config.CATALOG_DB)
+    parser.add_argument("--phash-distance", type=int, default=config.CLOTH_DEDUPE_PHASH_DISTANCE)
+    parser.add_argument("--dhash-distance", type=int, default=config.CLOTH_DEDUPE_DHASH_DISTANCE)
+    parser.add_argument("--color-distance", type=float, default=config.CLOTH_DEDUPE_COLOR_DISTANCE)
+    parser.add_argument("--json", action="store_true", help="print clusters as JSON")
+    args = parser.parse_args()
+
+    catalog = ClothCatalog(db_path=args.catalog_db, cloth_dir=args.cloth_dir)
+    with contextlib.redirect_stdout(sys.stderr):  # --json 출력에 진행 로그가 섞이지 않도록
+        catalog.rebuild()  # 폴더와 동기화 + 빠진 지각 해시 계산
+    clusters = catalog.duplicate_clusters(args.phash_distance, args.dhash_distance, args.color_distance)
+    catalog.close()
+
+    if args.json:
+        print(json.dumps([{"keep": group[0], "duplicates": group[1:]} for group in clusters], indent=2))
+    else:
+        redundant = sum(len(group) - 1 for group in clusters)
+        print(f"🔍 닮은 옷 묶음 {len(clusters)}개 (중복 {redundant}개)")
+        for group in clusters:
+            print(f"  - {group[0]} (가장 먼저 올림)")
+            for name in group[1:]:
+                print(f"      ↳ {name}")
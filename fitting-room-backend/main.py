@@ -1,27 +1,242 @@
 import uvicorn
 import io
 import os
+import json
+import asyncio
+import functools
+import contextlib
+import math
+import threading
+import time
 from PIL import Image
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
-from fastapi.staticfiles import StaticFiles
+from typing import Optional
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request, BackgroundTasks, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse, Response, PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
-from app.services.local_service import LocalFileService
+from pydantic import BaseModel, ValidationError
+from app import config
+from app.services.local_service import LocalFileService, UploadTooLargeError, UnsupportedImageError, NearDuplicateError
+from app.services.catalog_service import ClothCatalog, InvalidCursorError
 from app.services.ai_service import AIEngine
+from app.services.rembg_pool import RembgSessionPool
+from app.services.inference_client import InferenceError, InferenceUnavailableError
+from app.services.job_service import TryOnJobQueue, QueueFullError, SharedJobStore
+from app.services.cutout_cache import ClothCutoutCache
+from app.services.result_cache import TryOnResultCache
+from app.services.derivative_service import DerivativeGenerator
+from app.services.preprocess_service import PersonPreprocessor
+from app.services.staging_service import InputStager
+from app.services.person_session import PersonSessionStore, SessionNotFoundError
+from app.services import metrics
+from app.services.metrics import MetricsMiddleware, timed
+from app.services.upload_limit import UploadLimitMiddleware, MULTIPART_OVERHEAD
+from app.services.result_storage import ResultStorage
+from app.services.static_files import TrackedStaticFiles
+from app.services.result_encoder import ResultEncoder, EXTENSION_MEDIA_TYPES
+from app.services.http_headers import etag_matches
+from app.services.inference_server import InferenceProxy, parse_address, resolve_authkey, \
+    spawn as spawn_inference_server
+from app.services.file_lock import try_lock
+from app.services.startup import StartupRegistry
+from app.services.single_flight import SingleFlight, FlightCancelledError
+from app.services.content_hash import FileHashIndex, sha256_bytes
+from app.services.scheduler import FairScheduler, RateLimitedError, INTERACTIVE, BULK
 
 local_service = None
+catalog = None
 ai_engine = None
+job_queue = None
+cutout_cache = None
+result_cache = None
+rembg_pool = None
+derivatives = None
+preprocessor = None
+person_sessions = None
+stager = None
+result_storage = None
+result_encoder = None
+inference_proxy = None
+inference_process = None
+primary_lock = None
+startup = None
+flights = None
+scheduler = None
+cloth_hashes = FileHashIndex()
+ENGINE_COMPONENTS = ["inference"]   # 피팅 요청 전에 준비되어야 하는 구성 요소 (lifespan 에서 설정)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global local_service, ai_engine
+    global local_service, catalog, ai_engine, job_queue, cutout_cache, result_cache, rembg_pool, derivatives, \
+        preprocessor, person_sessions, stager, result_storage, result_encoder, inference_proxy, inference_process, \
+        primary_lock, startup, flights, scheduler
     # 서버 시작 시 서비스 초기화
-    local_service = LocalFileService()
-    ai_engine = AIEngine()
+    # 객체 생성(가벼움)만 여기서 하고, 무거운 초기화는 startup 레지스트리가 백그라운드에서 동시에 진행
+    # → 포트가 바로 열리고, 준비 전에는 /readyz 503 + 피팅 요청 503 (Retry-After)
+    t0 = time.perf_counter()
+    startup = StartupRegistry()
+    # 워커가 여러 개면 파일 잠금을 먼저 잡은 워커가 대표 (결과 저장소 정리, 추론 서버 실행)
+    primary_lock = try_lock(config.PRIMARY_LOCK)
+    catalog = ClothCatalog(
+        db_path=config.CATALOG_DB,
+        phash_distance=config.CLOTH_DEDUPE_PHASH_DISTANCE,
+        dhash_distance=config.CLOTH_DEDUPE_DHASH_DISTANCE,
+        color_distance=config.CLOTH_DEDUPE_COLOR_DISTANCE,
+    )
+    derivatives = DerivativeGenerator(
+        sizes=config.DERIVATIVE_SIZES,
+        formats=config.DERIVATIVE_FORMATS,
+        quality=config.DERIVATIVE_QUALITY,
+        workers=config.DERIVATIVE_WORKERS,
+        full_formats=config.DERIVATIVE_FULL_FORMATS,
+    )
+    result_storage = ResultStorage(
+        max_bytes=config.RESULT_STORAGE_MAX_BYTES,
+        ttl=config.RESULT_STORAGE_TTL,
+        shard_depth=config.RESULT_STORAGE_SHARD_DEPTH,
+        sweep_interval=config.RESULT_STORAGE_SWEEP_INTERVAL,
+        on_evict=lambda web_path, _: derivatives.remove(web_path),
+        shared=config.WORKERS > 1,
+    )
+    local_service = LocalFileService(catalog=catalog, derivatives=derivatives, results=result_storage)
+    result_encoder = ResultEncoder(
+        default_format=config.RESULT_FORMAT,
+        formats=config.RESULT_FORMATS,
+        quality=config.RESULT_QUALITY,
+        webp_method=config.RESULT_WEBP_METHOD,
+        png_compress_level=config.RESULT_PNG_COMPRESS_LEVEL,
+        workers=config.RESULT_ENCODE_WORKERS,
+    )
+    preprocessor = PersonPreprocessor(
+        target_size=config.PERSON_TARGET_SIZE,
+        transfer_format=config.PERSON_TRANSFER_FORMAT,
+        quality=config.PERSON_TRANSFER_QUALITY,
+    )
+    person_sessions = PersonSessionStore(
+        prepare=preprocessor.prepare,
+        root=config.PERSON_SESSION_DIR,
+        ttl=config.PERSON_SESSION_TTL,
+        max_memory_bytes=config.PERSON_SESSION_MAX_MEMORY,
+        max_disk_bytes=config.PERSON_SESSION_MAX_DISK,
+    )
+
+    engine_components = ["inference"]
+    if config.INFERENCE_SERVER:
+        # 멀티 워커: 모델은 추론 전용 프로세스 하나에만, 워커는 IPC 프록시로 요청
+        authkey = resolve_authkey(config.INFERENCE_SERVER, config.INFERENCE_SERVER_AUTHKEY,
+                                  config.INFERENCE_SERVER_AUTHKEY_FILE)
+        inference_proxy = InferenceProxy(
+            parse_address(config.INFERENCE_SERVER),
+            authkey,
+            max_connections=config.INFERENCE_SERVER_CONNECTIONS,
+            connect_timeout=config.INFERENCE_SERVER_TIMEOUT,
+        )
+        ai_engine = AIEngine(connect=False, rembg_pool=inference_proxy, backend=inference_proxy)
+
+        def connect_inference():
+            global inference_process
+            autostart = primary_lock is not None and config.INFERENCE_SERVER_AUTOSTART
+            if autostart and inference_process is None and not _inference_server_alive():
+                inference_process = spawn_inference_server(config.INFERENCE_SERVER, authkey)
+            # 서버가 모델 로딩을 끝낼 때까지 기다림
+            inference_proxy.connect()
+    else:
+        if config.BACKGROUND_REMOVAL == "rembg":
+            rembg_pool = RembgSessionPool(
+                model_name=config.REMBG_MODEL,
+                size=config.REMBG_SESSIONS,
+                providers=config.REMBG_PROVIDERS,
+                intra_op_threads=config.REMBG_THREADS,
+            )
+            # 모델 로딩 + 워밍업 추론 → 첫 요청이 기다리지 않음 (가중치 다운로드 실패 등은 재시도)
+            startup.add("rembg", rembg_pool.start, retry_interval=config.STARTUP_RETRY_INTERVAL)
+            engine_components.append("rembg")
+        stager = InputStager(
+            root=config.STAGING_DIR,
+            backing=config.STAGING_BACKING,
+            png_compress_level=config.STAGING_PNG_COMPRESS_LEVEL,
+        )
+        stager.purge()  # 이전 실행에서 남은 임시 입력 파일 정리
+        ai_engine = AIEngine(connect=False, rembg_pool=rembg_pool, stager=stager)
+
+        def connect_inference():
+            print(f"🤖 AI Engine: IDM-VTON (Warping Mode) 초기화 중... (backend={ai_engine.backend.name})")
+            ai_engine.backend.connect()
+    startup.add("inference", connect_inference, retry_interval=config.STARTUP_RETRY_INTERVAL)
+    if config.STARTUP_WARMUP:
+        startup.add("warmup", ai_engine.warmup, depends_on=tuple(engine_components),
+                    retry_interval=config.STARTUP_RETRY_INTERVAL)
+        engine_components.append("warmup")
+    ENGINE_COMPONENTS[:] = engine_components
+
+    cutout_cache = ClothCutoutCache(ai_engine, cache_dir=config.CUTOUT_CACHE_DIR)
+    result_cache = TryOnResultCache(
+        index_path=config.RESULT_CACHE_INDEX,
+        max_entries=config.RESULT_CACHE_MAX_ENTRIES,
+        max_bytes=config.RESULT_CACHE_MAX_BYTES,
+        remove_file=result_storage.delete,  # 캐시에서 밀려난 결과는 저장소 인덱스/파생 이미지까지 정리
+    )
+    job_queue = TryOnJobQueue(
+        workers=config.TRYON_WORKERS,
+        max_queue=config.TRYON_QUEUE_MAX,
+        job_ttl=config.TRYON_JOB_TTL,
+        default_retry_after=config.TRYON_RETRY_AFTER,
+        # 워커가 여러 개면 상태 조회가 다른 워커로 갈 수 있음 → 상태를 SQLite 로 공유
+        shared=SharedJobStore(config.TRYON_JOB_DB) if config.WORKERS > 1 else None,
+    )
+    await job_queue.start()
+    # 같은 입력의 동시 피팅 요청 합치기
+    flights = SingleFlight() if config.COALESCE_TRY_ON else None
+    # 추론 앞단 공정 스케줄러: 클라이언트별 요청 한도 + 가중 공정 큐 + interactive 우선
+    if config.SCHEDULER_ENABLED:
+        scheduler = FairScheduler(
+            slots=config.SCHEDULER_SLOTS,
+            rate=config.RATE_LIMIT_PER_MINUTE / 60,
+            burst=config.RATE_LIMIT_BURST,
+            weights={f"key:{key}": weight for key, weight in config.CLIENT_WEIGHTS.items()},
+            bulk_every=config.SCHEDULER_BULK_EVERY,
+        )
+
+    # 옷 폴더 ↔ 카탈로그 동기화 (그동안은 지난번 인덱스로 목록 응답)
+    startup.add("catalog", catalog.rebuild)
+    # 기존 결과 파일 인덱싱 (+ 대표 워커는 한 번 정리한 뒤 백그라운드 스위퍼 시작)
+    startup.add("result_storage", functools.partial(result_storage.start, sweeper=primary_lock is not None))
+    startup.start()
+    print(f"🚪 서버 시작: 요청 받을 준비 {(time.perf_counter() - t0) * 1000:.0f}ms, 나머지 초기화는 백그라운드 진행")
     yield
+    await startup.stop()
+    await job_queue.stop()
+    await result_storage.stop()
+    result_cache.close()
+    catalog.close()
+    if stager is not None:
+        stager.close()
+    derivatives.shutdown()
+    result_encoder.shutdown()
+    if inference_proxy is not None:
+        inference_proxy.close()
+    if inference_process is not None:
+        inference_process.terminate()
+        await asyncio.to_thread(inference_process.wait, 10)
+    if primary_lock is not None:
+        primary_lock.close()
+
+
+def _inference_server_alive() -> bool:
+    """ 이미 떠 있는 추론 서버가 있는지 (대표 워커가 재시작된 경우 중복 실행 방지) """
+    try:
+        inference_proxy.call("ping")
+        return True
+    except InferenceError:
+        return False
 
 app = FastAPI(lifespan=lifespan)
 
+# 한도를 넘는 옷 업로드는 본문을 받기 전에 거절 (CORS 안쪽 → 413 에도 CORS 헤더가 붙음)
+app.add_middleware(UploadLimitMiddleware, limits={
+    ("POST", "/api/v1/clothes"): config.MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD,
+})
 # CORS 설정
 app.add_middleware(
     CORSMiddleware,
@@ -29,69 +244,617 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[metrics.TRACE_HEADER, "Server-Timing", "X-Next-Cursor", "Retry-After"],
 )
+# 요청별 추적 ID (X-Trace-Id), 지연 히스토그램, 진행 중 요청 수 → /metrics
+app.add_middleware(MetricsMiddleware)
 
 # 정적 파일 서빙
-app.mount("/static", StaticFiles(directory="static"), name="static")
+def _on_static_access(path: str):
+    """ 정적 파일 조회 → 결과 이미지(또는 그 파생 이미지)면 최근 접근으로 기록 """
+    if result_storage is not None and (path.startswith("results/") or path.startswith("derived/results/")):
+        result_storage.touch(path)
+
+
+app.mount("/static", TrackedStaticFiles(
+    directory="static",
+    on_access=_on_static_access,
+    immutable_prefixes=config.STATIC_IMMUTABLE_PREFIXES,
+    max_age=config.STATIC_MAX_AGE,
+    stat_ttl=config.STATIC_STAT_TTL,
+    variant_formats=config.STATIC_VARIANT_FORMATS,
+), name="static")
+
+def _variant_urls(base_url: str, web_path: str, variants: dict = None) -> dict:
+    """ 파생 이미지(썸네일/WebP) 웹 경로에 서버 주소 붙이기 """
+    if variants is None:
+        variants = derivatives.variants(web_path) if derivatives else {}
+    return {
+        fmt: {width: f"{base_url}{path}" for width, path in by_width.items()}
+        for fmt, by_width in variants.items()
+    }
+
+
+def _cloth_items(base_url: str, paths: list, with_variants: bool) -> list:
+    if not with_variants:
+        return [f"{base_url}{p}" for p in paths]
+    return [{"url": f"{base_url}{p}", "variants": _variant_urls(base_url, p)} for p in paths]
+
 
 @app.get("/api/v1/clothes")
-def get_clothes(request: Request):
-    """ 저장된 옷 목록 반환 """
-    paths = local_service.get_cloth_list()
+def get_clothes(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    category: Optional[str] = None,
+    variants: bool = False,
+):
+    """
+    저장된 옷 목록 반환 (최신순)
+    - limit/cursor: 페이지 단위 조회, 다음 페이지는 X-Next-Cursor / Link 헤더로 전달
+    - variants=true: 각 항목을 {"url", "variants"(썸네일/WebP URL)} 객체로 반환
+    - If-None-Match 목록에 현재 ETag 가 있거나(약한 비교) "*" 이면 304
+    """
     base_url = str(request.base_url).rstrip("/")
-    return [f"{base_url}{p}" for p in paths]
+    if catalog is None:
+        paths = local_service.get_cloth_list()
+        return _cloth_items(base_url, paths, variants)
+
+    etag = catalog.etag(base_url, limit, cursor, category, variants)
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    try:
+        names, next_cursor = catalog.list_page(limit=limit, cursor=cursor, category=category)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if next_cursor:
+        next_url = request.url.include_query_params(cursor=next_cursor)
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{next_url}>; rel="next"'
+    paths = [f"/static/clothes/{name}" for name in names]
+    return JSONResponse(_cloth_items(base_url, paths, variants), headers=headers)
 
 @app.post("/api/v1/clothes")
-async def upload_cloth(request: Request, file: UploadFile = File(...)):
-    """ 옷 업로드 및 저장 """
-    path = local_service.save_cloth(file)
+async def upload_cloth(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    category: Optional[str] = Form(None),
+    dedupe: bool = Form(False),   # true 면 닮은 옷(크기 변경 / 재압축 / 살짝 잘림)이 있을 때 그 옷을 반환
+):
+    """
+    옷 업로드 및 저장 (스트리밍 저장 + 크기 제한 + 내용 기반 형식 검사)
+    - Content-Length 가 한도를 넘으면 UploadLimitMiddleware 가 본문을 받기 전에 413
+    - 같은 내용의 옷이 이미 있으면 새로 저장하지 않고 category 만 갱신
+    """
+    try:
+        path = await local_service.save_cloth_stream(file, category=category, max_bytes=config.MAX_UPLOAD_BYTES,
+                                                     dedupe=dedupe)
+    except NearDuplicateError as e:
+        # 새로 저장하지 않았으므로 누끼 / 파생 이미지도 기존 것을 그대로 사용
+        base_url = str(request.base_url).rstrip("/")
+        return {"url": f"{base_url}{e.path}", "duplicate": True, "distance": e.distance}
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnsupportedImageError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    if cutout_cache is not None:
+        # 응답을 보낸 뒤 배경 제거 + 화질 개선을 미리 해둠 → 피팅 시엔 로드만
+        background_tasks.add_task(cutout_cache.warm, local_service.get_absolute_path(path))
     base_url = str(request.base_url).rstrip("/")
     return {"url": f"{base_url}{path}"}
 
+def _resolve_cloth_path(cloth_url: str) -> str:
+    """ 옷 URL → 실제 파일 경로 (없으면 404) """
+    relative_path = "/static" + cloth_url.split("/static")[-1]
+    real_cloth_path = local_service.get_absolute_path(relative_path)
+
+    if not os.path.exists(real_cloth_path):
+        raise HTTPException(status_code=404, detail="Cloth image not found")
+    return real_cloth_path
+
+
+def _prepare_person(person_bytes: bytes):
+    """ 내 사진 읽기 (전처리: EXIF 회전, 모델 해상도로 축소/여백, 전송용 인코딩) """
+    with timed("person_preprocess"):
+        if preprocessor is not None:
+            return preprocessor.prepare(person_bytes)
+        person_img = Image.open(io.BytesIO(person_bytes))
+        person_img.load()  # 여러 스레드가 같이 쓸 수 있으므로 미리 디코딩
+        return person_img
+
+
+async def _person_input(person_image: Optional[UploadFile], person_session_id: Optional[str],
+                        prepare: bool = False):
+    """
+    사람 사진 입력: 업로드 파일 또는 사람 세션 ID 중 하나
+    반환값: (person_bytes, person_img, person_hash)
+    - 업로드: 원본 바이트 (prepare=True 면 여기서 미리 전처리)
+    - 세션: 이미 전처리된 사진 + 원본 해시 (바이트 없음)
+    """
+    if person_session_id:
+        if person_sessions is None:
+            raise HTTPException(status_code=503, detail="Person sessions are not available")
+        try:
+            session = await run_in_threadpool(person_sessions.get, person_session_id)
+        except SessionNotFoundError:
+            raise HTTPException(status_code=404, detail="Person session not found or expired")
+        return None, session.prepared, session.digest
+
+    if person_image is None:
+        raise HTTPException(status_code=422, detail="person_image or person_session_id is required")
+    person_bytes = await person_image.read()
+    if not prepare:
+        return person_bytes, None, None
+    try:
+        person_img = await run_in_threadpool(_prepare_person, person_bytes)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid person image: {e}")
+    return person_bytes, person_img, None
+
+
+def _result_format(request: Request, requested: Optional[str] = None) -> Optional[str]:
+    """ 결과 저장 형식: result_format 폼 값 > Accept 헤더의 이미지 타입 > 설정 기본값 """
+    if result_encoder is None:
+        return None
+    return result_encoder.negotiate(request.headers.get("accept"), requested)
+
+
+def _run_try_on(person_bytes: Optional[bytes], real_cloth_path: str, category: str, person_img=None,
+                person_hash: Optional[str] = None, result_format: Optional[str] = None,
+                cancel: Optional[threading.Event] = None, client: Optional[str] = None,
+                lane: str = INTERACTIVE) -> str:
+    """
+    피팅 파이프라인 (블로킹): 이벤트 루프가 아닌 스레드에서 실행할 것
+    person_img: 이미 전처리된 사람 사진 (배치 요청 / 사람 세션에서 준비해 둔 것)
+    person_hash: 사람 사진 해시 (사람 세션 / 요청 합치기에서 이미 계산한 것, 결과 캐시 키로 사용)
+    result_format: 결과 저장 형식 (webp/jpeg/png, 없으면 PNG 기본 저장)
+    cancel: 설정되면 다음 단계로 넘어가기 전에 중단 (기다리는 요청이 모두 떠남)
+    client / lane: 공정 스케줄러에서 추론 차례를 기다릴 때의 클라이언트 / 대기열
+    반환값: 결과 이미지 웹 경로
+    """
+    def checkpoint():
+        if cancel is not None and cancel.is_set():
+            raise FlightCancelledError("All waiting requests left")
+
+    # 0. 같은 (사람, 옷, 카테고리) 결과가 있으면 원격 GPU 호출 없이 바로 반환
+    cache_key = None
+    if result_cache is not None:
+        vton_desc = ai_engine.map_category(category)
+        cache_key = result_cache.make_key(person_bytes, real_cloth_path, vton_desc, ai_engine.STEPS, ai_engine.SEED,
+                                          person_hash=person_hash, output_format=result_format,
+                                          backend=ai_engine.backend.identity())
+        with timed("result_cache_lookup"):
+            cached_url = result_cache.lookup(cache_key)
+        if cached_url is not None:
+            print(f"   ⚡ 피팅 결과 캐시 적중: {cached_url}")
+            return cached_url
+
+    # 1. 내 사진 읽기
+    checkpoint()
+    if person_img is None:
+        person_img = _prepare_person(person_bytes)
+
+    # 2~3. 옷 배경 제거: 누끼 캐시가 있으면 (업로드 때 만들어 둔) 결과를 바로 로드
+    with timed("cloth_cutout"):
+        if cutout_cache is not None:
+            processed_cloth = cutout_cache.get_or_build(real_cloth_path)
+            enhanced = True
+        else:
+            cloth_img = Image.open(real_cloth_path)
+            processed_cloth = ai_engine.remove_background(cloth_img)
+            enhanced = False
+
+    # 4. 피팅 실행 (카테고리 전달!)
+    # 👇 [핵심] 여기에 category를 꼭 넣어줘야 에러가 안 남!
+    checkpoint()  # 원격 GPU 에 보내기 전 마지막 확인 (추론이 끝난 결과는 캐시에 남기려고 끝까지 저장)
+    with _inference_slot(client, lane, cancel), timed("virtual_try_on"):
+        final_image = ai_engine.virtual_try_on(processed_cloth, person_img, category, enhanced=enhanced)
+
+    # 5. 결과 인코딩 (전용 풀, 설정한 형식/품질) + 저장
+    if result_encoder is not None and result_format is not None:
+        with timed("encode_result"):
+            encoded = result_encoder.encode_in_pool(final_image, result_format)
+        result_url_path = local_service.save_result_bytes(encoded.data, encoded.ext)
+    else:
+        result_url_path = local_service.save_image_from_bytes(final_image)
+
+    if cache_key is not None:
+        with timed("result_cache_put"):
+            result_cache.put(cache_key, result_url_path, local_service.get_absolute_path(result_url_path))
+    return result_url_path
+
+
+def _inference_slot(client: Optional[str], lane: str, cancel: Optional[threading.Event] = None):
+    """ 공정 스케줄러의 추론 슬롯 (스케줄러가 꺼져 있으면 바로 통과) """
+    if scheduler is None:
+        return contextlib.nullcontext()
+    return scheduler.slot(client or "anonymous", lane, cancel)
+
+
+def _client_id(request: Request) -> str:
+    """
+    요청 한도 / 공정 큐의 클라이언트: 등록된 API 키면 "key:<키>", 아니면 "ip:<접속 IP>"
+    등록되지 않은 키를 그대로 쓰면 요청마다 새 키로 한도를 피하거나 남의 IP 버킷을 소진시킬 수 있음
+    """
+    api_key = request.headers.get(config.API_KEY_HEADER)
+    if api_key and api_key in config.API_KEYS:
+        return f"key:{api_key}"
+    if config.TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for", "").split(",")[0].strip()
+        if forwarded:
+            return f"ip:{forwarded}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def _admit(request: Request, lane: str = INTERACTIVE, cost: int = 1) -> str:
+    """ 클라이언트별 요청 한도 확인 → 초과면 429 + Retry-After, 통과하면 클라이언트 ID 반환 """
+    client = _client_id(request)
+    if scheduler is not None:
+        try:
+            scheduler.admit(client, cost, lane)
+        except RateLimitedError as e:
+            raise HTTPException(status_code=429, detail=str(e),
+                                headers={"Retry-After": str(math.ceil(e.retry_after))})
+    return client
+
+
+def _flight_key(person_bytes: Optional[bytes], person_hash: Optional[str], real_cloth_path: str, category: str,
+                result_format: Optional[str]):
+    """ 요청 합치기 키: 사람 사진 해시 + 옷 파일 내용 해시 + IDM-VTON 옷 설명 + 결과 형식 → (키, 사람 사진 해시) """
+    if person_hash is None:
+        person_hash = sha256_bytes(person_bytes)
+    cloth_hash = cloth_hashes.digest(real_cloth_path)
+    raw = f"{person_hash}:{cloth_hash}:{ai_engine.map_category(category)}:{result_format}"
+    return sha256_bytes(raw.encode()), person_hash
+
+
+async def _coalesced_try_on(person_bytes: Optional[bytes], real_cloth_path: str, category: str, person_img=None,
+                            person_hash: Optional[str] = None, result_format: Optional[str] = None,
+                            request: Optional[Request] = None, client: Optional[str] = None,
+                            lane: str = INTERACTIVE) -> str:
+    """
+    _run_try_on 을 스레드풀에서 실행하되, 같은 입력의 피팅이 이미 진행 중이면 그 결과를 같이 기다림
+    request 를 주면 클라이언트 연결 끊김을 감시 → 이 요청의 대기만 취소 (마지막 대기자면 작업도 중단)
+    합쳐진 요청은 처음 시작한 요청의 client / lane 으로 스케줄링
+    """
+    if flights is None:
+        return await run_in_threadpool(_run_try_on, person_bytes, real_cloth_path, category, person_img,
+                                       person_hash, result_format, None, client, lane)
+
+    key, person_hash = await run_in_threadpool(_flight_key, person_bytes, person_hash, real_cloth_path,
+                                               category, result_format)
+    cancel = threading.Event()
+
+    async def work():
+        try:
+            return await run_in_threadpool(_run_try_on, person_bytes, real_cloth_path, category, person_img,
+                                           person_hash, result_format, cancel, client, lane)
+        except asyncio.CancelledError:
+            cancel.set()  # 스레드는 강제로 멈출 수 없음 → 다음 단계 전에 스스로 중단
+            raise
+
+    if request is None:
+        return await flights.do(key, work)
+
+    waiting = asyncio.ensure_future(flights.do(key, work))
+    watcher = asyncio.ensure_future(_wait_disconnect(request))
+    try:
+        await asyncio.wait({waiting, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        if waiting.done():
+            return waiting.result()
+        raise HTTPException(status_code=499, detail="Client disconnected")
+    finally:
+        watcher.cancel()
+        waiting.cancel()
+
+
+async def _wait_disconnect(request: Request):
+    while not await request.is_disconnected():
+        await asyncio.sleep(config.DISCONNECT_POLL_INTERVAL)
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
 @app.post("/api/v1/try-on")
 async def try_on(
     request: Request,
-    person_image: UploadFile = File(...),
+    person_image: Optional[UploadFile] = File(None),
     cloth_url: str = Form(...),
-    category: str = Form("upper_body") # 👈 [핵심] 프론트에서 보낸 카테고리 받기
+    category: str = Form("upper_body"), # 👈 [핵심] 프론트에서 보낸 카테고리 받기
+    person_session_id: Optional[str] = Form(None),  # 사진 대신 사람 세션 ID (POST /api/v1/person-sessions)
+    result_format: Optional[str] = Form(None),      # webp | jpeg | png (없으면 Accept 헤더 / 기본값)
+    inline: bool = Form(False),                     # true 면 JSON 대신 결과 이미지 바이트를 바로 응답
 ):
+    _require_engine()
+    client = _admit(request, INTERACTIVE)
     try:
-        # 1. 내 사진 읽기
-        person_bytes = await person_image.read()
-        person_img = Image.open(io.BytesIO(person_bytes))
-        
-        # 2. 선택한 옷 이미지 경로 찾기
-        relative_path = "/static" + cloth_url.split("/static")[-1]
-        real_cloth_path = local_service.get_absolute_path(relative_path)
-        
-        if not os.path.exists(real_cloth_path):
-            raise HTTPException(status_code=404, detail="Cloth image not found")
-            
-        cloth_img = Image.open(real_cloth_path)
-
-        # 3. 옷 배경 제거
-        processed_cloth = ai_engine.remove_background(cloth_img)
-        
-        # 4. 피팅 실행 (카테고리 전달!)
-        # 👇 [핵심] 여기에 category를 꼭 넣어줘야 에러가 안 남!
-        final_image = ai_engine.virtual_try_on(processed_cloth, person_img, category)
-        
-        # 5. 결과 저장
-        result_url_path = local_service.save_image_from_bytes(final_image)
+        person_bytes, person_img, person_hash = await _person_input(person_image, person_session_id)
+        real_cloth_path = _resolve_cloth_path(cloth_url)
+        output_format = _result_format(request, result_format)
+
+        # 블로킹 작업(rembg, 원격 GPU, 저장)은 스레드풀에서 → 다른 요청이 멈추지 않음
+        # 같은 입력이 이미 처리 중이면(더블탭, 재시도) 그 결과를 같이 기다림
+        result_url_path = await _coalesced_try_on(
+            person_bytes, real_cloth_path, category, person_img, person_hash, output_format, request=request,
+            client=client, lane=INTERACTIVE,
+        )
         base_url = str(request.base_url).rstrip("/")
-        
-        return {
+
+        if inline:
+            # /static/results 로 다시 요청하지 않도록 결과 이미지를 바로 전송 (저장된 URL 은 헤더로)
+            data = await run_in_threadpool(_read_file, local_service.get_absolute_path(result_url_path))
+            ext = result_url_path.rsplit(".", 1)[-1]
+            return Response(
+                content=data,
+                media_type=EXTENSION_MEDIA_TYPES.get(ext, "application/octet-stream"),
+                headers={"X-Result-Image-Url": f"{base_url}{result_url_path}", "Content-Location": result_url_path},
+            )
+
+        response = {
             "status": "success",
             "result_image_url": f"{base_url}{result_url_path}"
         }
+        if derivatives is not None:
+            # 썸네일/WebP 는 백그라운드에서 생성 중 → 잠깐만 기다려보고 준비된 것만 포함
+            ready = await derivatives.variants_when_ready(result_url_path, config.DERIVATIVE_WAIT)
+            response["variants"] = _variant_urls(base_url, result_url_path, ready)
+        return response
 
     except HTTPException:
         # Re-raise HTTPException (like 404) without wrapping in 500
         raise
+    except InferenceUnavailableError as e:
+        # 회로 차단 중: 원격 GPU를 기다리지 않고 바로 실패
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except InferenceError as e:
+        raise HTTPException(status_code=502, detail=str(e))
     except Exception as e:
         print(f"Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+
+# === 사람 사진 세션: 사진을 한 번만 올리고 이후 피팅은 세션 ID 로 ===
+@app.post("/api/v1/person-sessions", status_code=201)
+async def create_person_session(person_image: UploadFile = File(...)):
+    """ 사람 사진 등록 → 전처리된 사진을 보관하고 세션 ID 반환 """
+    if person_sessions is None:
+        raise HTTPException(status_code=503, detail="Person sessions are not available")
+    person_bytes = await person_image.read()
+    try:
+        session = await run_in_threadpool(person_sessions.create, person_bytes)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid person image: {e}")
+    return {
+        "person_session_id": session.id,
+        "expires_in": person_sessions.ttl,
+        "size": list(session.prepared.image.size),
+    }
+
+
+@app.delete("/api/v1/person-sessions/{session_id}", status_code=204)
+def delete_person_session(session_id: str):
+    if person_sessions is None or not person_sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Person session not found")
+    return Response(status_code=204)
+
+
+class BatchItem(BaseModel):
+    cloth_url: str
+    category: str = "upper_body"
+
+
+def _require_engine():
+    """ 백그라운드 초기화(모델 로딩, 원격 연결, 워밍업)가 끝나기 전의 피팅 요청 → 503 + Retry-After """
+    if startup is not None and not startup.is_ready(*ENGINE_COMPONENTS):
+        raise HTTPException(status_code=503, detail="Try-on engine is still starting up",
+                            headers={"Retry-After": str(config.STARTUP_RETRY_AFTER)})
+
+
+def _error_status(e: Exception) -> int:
+    """ 피팅 실패 원인 → HTTP 상태 코드 """
+    if isinstance(e, HTTPException):
+        return e.status_code
+    if isinstance(e, InferenceUnavailableError):
+        return 503
+    if isinstance(e, InferenceError):
+        return 502
+    return 500
+
+
+@app.post("/api/v1/try-on/batch")
+async def try_on_batch(
+    request: Request,
+    person_image: Optional[UploadFile] = File(None),
+    items: str = Form(...),  # JSON: [{"cloth_url": "...", "category": "upper_body"}, ...]
+    person_session_id: Optional[str] = Form(None),
+    result_format: Optional[str] = Form(None),
+):
+    """
+    사람 사진 1장 × 옷 여러 벌 피팅
+    - 사람 사진은 한 번만 디코딩/전처리해서 모든 옷에 공유
+    - 옷들은 동시에 처리 (최대 BATCH_MAX_PARALLEL 개)
+    - 끝나는 순서대로 한 줄씩(NDJSON) 결과 전송, 옷별 성공/실패를 따로 보고
+    """
+    _require_engine()
+    try:
+        batch = [BatchItem(**item) for item in json.loads(items)]
+    except (ValueError, TypeError, ValidationError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid items: {e}")
+    if not batch:
+        raise HTTPException(status_code=422, detail="Invalid items: empty list")
+    if len(batch) > config.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=422, detail=f"Too many items (max {config.BATCH_MAX_ITEMS})")
+    # 배치는 옷 개수만큼 한도를 쓰고, 대화형 피팅보다 뒤에 스케줄링
+    client = _admit(request, BULK, cost=len(batch))
+
+    person_bytes, person_img, person_hash = await _person_input(person_image, person_session_id, prepare=True)
+
+    base_url = str(request.base_url).rstrip("/")
+    output_format = _result_format(request, result_format)
+    semaphore = asyncio.Semaphore(config.BATCH_MAX_PARALLEL)
+
+    async def run_item(index: int, item: BatchItem) -> dict:
+        outcome = {"index": index, "cloth_url": item.cloth_url, "category": item.category}
+        try:
+            real_cloth_path = _resolve_cloth_path(item.cloth_url)
+            async with semaphore:
+                result_url_path = await _coalesced_try_on(
+                    person_bytes, real_cloth_path, item.category, person_img, person_hash, output_format,
+                    client=client, lane=BULK,
+                )
+            outcome.update({
+                "status": "success",
+                "result_image_url": f"{base_url}{result_url_path}",
+                "variants": _variant_urls(base_url, result_url_path),
+            })
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            print(f"   💥 배치 피팅 실패 [{index}] {item.cloth_url}: {detail}")
+            outcome.update({"status": "error", "status_code": _error_status(e), "error": detail})
+        return outcome
+
+    async def result_stream():
+        tasks = [asyncio.create_task(run_item(i, item)) for i, item in enumerate(batch)]
+        succeeded = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                outcome = await next_done
+                succeeded += outcome["status"] == "success"
+                yield json.dumps(outcome) + "\n"
+            yield json.dumps({"done": True, "total": len(batch), "succeeded": succeeded,
+                              "failed": len(batch) - succeeded}) + "\n"
+        finally:
+            # 클라이언트가 끊으면 남은 작업 취소
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
+
+
+@app.get("/api/v1/stats")
+def get_stats():
+    """ 캐시 적중률, 작업 큐 상태 등 운영 지표 """
+    return {
+        "result_cache": result_cache.stats() if result_cache else None,
+        "coalescing": flights.stats() if flights else None,
+        "scheduler": scheduler.stats() if scheduler else None,
+        "cutout_cache": cutout_cache.stats() if cutout_cache else None,
+        "jobs": job_queue.stats() if job_queue else None,
+        "rembg": rembg_pool.stats() if rembg_pool else None,
+        "inference": ai_engine.backend.stats() if ai_engine else None,
+        "preprocess": preprocessor.stats() if preprocessor else None,
+        "staging": stager.stats() if stager else None,
+        "person_sessions": person_sessions.stats() if person_sessions else None,
+        "result_storage": result_storage.stats() if result_storage else None,
+    }
+
+
+@app.get("/metrics")
+def get_metrics():
+    """ Prometheus 스크레이프용: 단계별 소요 시간 히스토그램, 요청 지연, 진행 중 요청/추론 수 """
+    if job_queue is not None:
+        metrics.JOB_QUEUE_DEPTH.set(job_queue.stats()["queue_depth"])
+    if ai_engine is not None:
+        in_flight = ai_engine.backend.stats().get("in_flight")
+        if isinstance(in_flight, (int, float)):  # 진행 중 수를 보고하지 않는 백엔드도 있음
+            metrics.INFERENCE_IN_FLIGHT.set(in_flight)
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/healthz")
+async def healthz():
+    """ 라이브니스: 이벤트 루프가 응답하면 200 (초기화 중이어도) → 재시작 판단용 """
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    """ 레디니스: 모든 구성 요소가 준비되면 200, 아니면 503 + 구성 요소별 상태 / 시작 소요 시간 """
+    if startup is None:
+        return {"ready": True, "startup_seconds": None, "components": {}}
+    report = startup.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+
+# === 비동기 피팅 작업 (Job) 모드 ===
+@app.post("/api/v1/try-on/jobs", status_code=202)
+async def submit_try_on_job(
+    request: Request,
+    person_image: Optional[UploadFile] = File(None),
+    cloth_url: str = Form(...),
+    category: str = Form("upper_body"),
+    person_session_id: Optional[str] = Form(None),
+    result_format: Optional[str] = Form(None),
+):
+    """ 피팅 작업을 대기열에 넣고 작업 ID를 바로 반환 """
+    _require_engine()
+    client = _admit(request, BULK)
+    person_bytes, person_img, person_hash = await _person_input(person_image, person_session_id)
+    real_cloth_path = _resolve_cloth_path(cloth_url)
+    base_url = str(request.base_url).rstrip("/")
+    output_format = _result_format(request, result_format)
+
+    def run_job():
+        result_url_path = _run_try_on(person_bytes, real_cloth_path, category, person_img, person_hash,
+                                      output_format, client=client, lane=BULK)
+        return {
+            "result_image_url": f"{base_url}{result_url_path}",
+            "variants": _variant_urls(base_url, result_url_path),
+        }
+
+    try:
+        job = job_queue.submit(run_job)
+    except QueueFullError as e:
+        # 백프레셔: 대기열이 가득 차면 429 + Retry-After
+        return JSONResponse(
+            status_code=429,
+            content={"detail": str(e)},
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"{base_url}/api/v1/try-on/jobs/{job.id}",
+        "events_url": f"{base_url}/api/v1/try-on/jobs/{job.id}/events",
+    }
+
+
+@app.get("/api/v1/try-on/jobs/{job_id}")
+def get_try_on_job(job_id: str):
+    """ 피팅 작업 상태 조회 (폴링용) """
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.get("/api/v1/try-on/jobs/{job_id}/events")
+async def stream_try_on_job(job_id: str):
+    """ 피팅 작업 상태를 SSE(Server-Sent Events)로 전달 """
+    if job_queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        async for snapshot in job_queue.events(job_id):
+            if snapshot is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {snapshot['status']}\ndata: {json.dumps(snapshot)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 if __name__ == "__main__":
     # 포트 8001번 사용
     uvicorn.run("main:app", host="0.0.0.0", port=8001, reload=True)
\ No newline at end of file
@@ -0,0 +1,78 @@
+import os
+import pytest
+from unittest.mock import Mock, patch
+from PIL import Image
+
+from app.services.ai_service import AIEngine
+from app.services.staging_service import InputStager
+
+
+class TestAIEngine:
+    """Test suite for AIEngine class."""
+
+    @pytest.fixture
+    def engine(self, temp_dir):
+        inference = Mock()
+        result_path = os.path.join(temp_dir, "result.png")
+        Image.new("RGB", (4, 4), "white").save(result_path)
+        inference.predict.return_value = [result_path]
+        stager = InputStager(root=os.path.join(temp_dir, "staging"))
+        with patch('app.services.ai_service.config.INFERENCE_BACKEND', "gradio"):
+            return AIEngine(connect=False, inference=inference, stager=stager)
+
+    @pytest.mark.parametrize("category, expected", [
+        ("upper_body", "shirt"),
+        ("lower_body", "trousers"),
+        ("dresses", "dress"),
+        ("outer", "dress"),
+        ("unknown", "short sleeve shirt"),
+    ])
+    def test_map_category(self, engine, category, expected):
+        """Test the frontend category to IDM-VTON description mapping."""
+        assert engine.map_category(category) == expected
+
+    def test_virtual_try_on_calls_remote_and_cleans_up_inputs(self, engine):
+        """Test that staged inputs are sent to the backend and removed afterwards."""
+        with patch('app.services.inference_backend.handle_file', side_effect=lambda p: {"path": p}):
+            result = engine.virtual_try_on(Image.new("RGBA", (4, 4)), Image.new("RGB", (4, 4)), "lower_body",
+                                           enhanced=True)
+
+        args = engine.backend.inference.predict.call_args
+        person_path = args.args[0]["background"]["path"]
+        assert args.args[2] == "trousers"
+        assert (args.args[4], args.args[5]) == (AIEngine.STEPS, AIEngine.SEED)
+        assert args.kwargs["api_name"] == "/tryon"
+        assert not os.path.exists(person_path)
+        assert os.listdir(engine.backend.stager.root) == [".owner"]
+        assert result.size == (4, 4)
+
+    def test_virtual_try_on_raises_on_empty_response(self, engine):
+        """Test that an empty remote response is an error, not a silent fallback."""
+        from app.services.inference_client import InferenceError
+        engine.backend.inference.predict.return_value = None
+
+        with patch('app.services.inference_backend.handle_file', side_effect=lambda p: p):
+            with pytest.raises(InferenceError):
+                engine.virtual_try_on(Image.new("RGBA", (4, 4)), Image.new("RGB", (4, 4)), "upper_body")
+
+    def test_virtual_try_on_uses_configured_backend(self):
+        """Test that enhancement and category mapping happen before the backend call."""
+        backend = Mock()
+        backend.try_on.return_value = Image.new("RGB", (8, 8))
+        engine = AIEngine(connect=False, backend=backend)
+        person = Image.new("RGB", (4, 4))
+
+        engine.virtual_try_on(Image.new("RGBA", (4, 4)), person, "dresses", enhanced=True)
+
+        args = backend.try_on.call_args.args
+        assert args[0] is person
+        assert args[2:] == ("dress", AIEngine.STEPS, AIEngine.SEED)
+
+    def test_remove_background_can_be_disabled(self):
+        """Test that BACKGROUND_REMOVAL=none skips rembg and keeps the garment as RGBA."""
+        engine = AIEngine(connect=False, backend=Mock(), background_removal="none")
+
+        result = engine.remove_background(Image.new("RGB", (4, 4), "red"))
+
+        assert result.mode == "RGBA"
+        assert result.getpixel((0, 0)) == (255, 0, 0, 255)
@@ -53,7 +53,7 @@ class TestAPIEndpoints:
         """Test POST /api/v1/clothes uploads and returns URL."""
         # Setup mock
         mock_file_path = "/static/clothes/test-uuid.jpg"
-        client.mock_local_service.save_cloth.return_value = mock_file_path
+        client.mock_local_service.save_cloth_stream = AsyncMock(return_value=mock_file_path)
         
         # Create a test file
         test_file = ("test.jpg", b"fake image data", "image/jpeg")
@@ -69,10 +69,42 @@ class TestAPIEndpoints:
         assert response.json() == {"url": "http://testserver/static/clothes/test-uuid.jpg"}
         
         # Verify service was called with file object
-        client.mock_local_service.save_cloth.assert_called_once()
-        call_arg = client.mock_local_service.save_cloth.call_args[0][0]
+        client.mock_local_service.save_cloth_stream.assert_called_once()
+        call_arg = client.mock_local_service.save_cloth_stream.call_args[0][0]
         assert call_arg.filename == "test.jpg"
     
+    def test_upload_cloth_dedupe_returns_existing_item(self, client):
+        """Test POST /api/v1/clothes with dedupe=true returns the existing near-duplicate garment."""
+        from app.services.local_service import NearDuplicateError
+        client.mock_local_service.save_cloth_stream = AsyncMock(
+            side_effect=NearDuplicateError("/static/clothes/original.jpg", 3))
+        
+        response = client.post("/api/v1/clothes", files={"file": ("copy.jpg", b"fake image data", "image/jpeg")},
+                               data={"dedupe": "true"})
+        
+        assert response.status_code == 200
+        assert response.json() == {"url": "http://testserver/static/clothes/original.jpg",
+                                   "duplicate": True, "distance": 3}
+        assert client.mock_local_service.save_cloth_stream.call_args.kwargs["dedupe"] is True
+    
+    def test_upload_cloth_rejects_non_image(self, client):
+        """Test POST /api/v1/clothes returns 415 when the content is not an image."""
+        from app.services.local_service import UnsupportedImageError
+        client.mock_local_service.save_cloth_stream = AsyncMock(side_effect=UnsupportedImageError("Unsupported image format"))
+        
+        response = client.post("/api/v1/clothes", files={"file": ("evil.jpg", b"<?php", "image/jpeg")})
+        
+        assert response.status_code == 415
+    
+    def test_upload_cloth_rejects_oversized_file(self, client):
+        """Test POST /api/v1/clothes returns 413 when the upload exceeds the size limit."""
+        from app.services.local_service import UploadTooLargeError
+        client.mock_local_service.save_cloth_stream = AsyncMock(side_effect=UploadTooLargeError("too large"))
+        
+        response = client.post("/api/v1/clothes", files={"file": ("big.jpg", b"x" * 10, "image/jpeg")})
+        
+        assert response.status_code == 413
+    
     def test_try_on_endpoint_success(self, client):
         """Test POST /api/v1/try-on performs virtual try-on successfully."""
         # Setup mocks
@@ -209,4 +241,306 @@ class TestAPIEndpoints:
                     
                     # The virtual_try_on should be called with the category
                     # (Note: actual mapping happens inside virtual_try_on method)
-                    client.mock_ai_engine.virtual_try_on.assert_called_once()
\ No newline at end of file
+                    client.mock_ai_engine.virtual_try_on.assert_called_once()
+    
+    def test_submit_try_on_job_returns_job_id(self, client):
+        """Test POST /api/v1/try-on/jobs queues a job and returns 202 with its id."""
+        mock_job = Mock(id="job-123", status="queued")
+        client.mock_local_service.get_absolute_path.return_value = "/absolute/path/to/cloth.jpg"
+        
+        with patch('main.job_queue') as mock_job_queue, \
+             patch('main.os.path.exists', return_value=True):
+            mock_job_queue.submit.return_value = mock_job
+            
+            person_file = ("person.jpg", b"fake person image", "image/jpeg")
+            response = client.post(
+                "/api/v1/try-on/jobs",
+                files={"person_image": person_file},
+                data={"cloth_url": "http://testserver/static/clothes/shirt1.jpg"}
+            )
+            
+            assert response.status_code == 202
+            assert response.json()["job_id"] == "job-123"
+            assert response.json()["status_url"] == "http://testserver/api/v1/try-on/jobs/job-123"
+            mock_job_queue.submit.assert_called_once()
+    
+    def test_submit_try_on_job_queue_full_returns_429(self, client):
+        """Test POST /api/v1/try-on/jobs returns 429 with Retry-After when the queue is full."""
+        from app.services.job_service import QueueFullError
+        client.mock_local_service.get_absolute_path.return_value = "/absolute/path/to/cloth.jpg"
+        
+        with patch('main.job_queue') as mock_job_queue, \
+             patch('main.os.path.exists', return_value=True):
+            mock_job_queue.submit.side_effect = QueueFullError(retry_after=12)
+            
+            person_file = ("person.jpg", b"fake person image", "image/jpeg")
+            response = client.post(
+                "/api/v1/try-on/jobs",
+                files={"person_image": person_file},
+                data={"cloth_url": "http://testserver/static/clothes/shirt1.jpg"}
+            )
+            
+            assert response.status_code == 429
+            assert response.headers["Retry-After"] == "12"
+    
+    def test_get_try_on_job_not_found(self, client):
+        """Test GET /api/v1/try-on/jobs/{id} returns 404 for unknown jobs."""
+        with patch('main.job_queue') as mock_job_queue:
+            mock_job_queue.get.return_value = None
+            
+            response = client.get("/api/v1/try-on/jobs/unknown")
+            
+            assert response.status_code == 404
+    
+    def test_try_on_endpoint_inference_unavailable(self, client):
+        """Test POST /api/v1/try-on returns 503 with Retry-After while the circuit breaker is open."""
+        from app.services.inference_client import InferenceUnavailableError
+        client.mock_local_service.get_absolute_path.return_value = "/absolute/path/to/cloth.jpg"
+        client.mock_ai_engine.virtual_try_on.side_effect = InferenceUnavailableError(retry_after=20)
+        
+        with patch('main.os.path.exists', return_value=True), \
+             patch('main.Image.open', return_value=Mock(spec=Image.Image)):
+            person_file = ("person.jpg", b"fake person image", "image/jpeg")
+            response = client.post(
+                "/api/v1/try-on",
+                files={"person_image": person_file},
+                data={"cloth_url": "http://testserver/static/clothes/shirt1.jpg"}
+            )
+            
+            assert response.status_code == 503
+            assert response.headers["Retry-After"] == "20"
+    
+    def test_get_clothes_paginated_with_etag(self, client, temp_dir):
+        """Test GET /api/v1/clothes pages through the catalog index and honours If-None-Match."""
+        from app.services.catalog_service import ClothCatalog
+        cloth_dir = os.path.join(temp_dir, "clothes")
+        catalog = ClothCatalog(db_path=os.path.join(temp_dir, "catalog.sqlite3"), cloth_dir=cloth_dir)
+        for i in range(3):
+            path = os.path.join(cloth_dir, f"{i}.jpg")
+            with open(path, "wb") as f:
+                f.write(b"x")
+            os.utime(path, (100 + i, 100 + i))
+        catalog.rebuild()
+        
+        with patch('main.catalog', catalog):
+            response = client.get("/api/v1/clothes", params={"limit": 2})
+            assert response.status_code == 200
+            assert response.json() == [
+                "http://testserver/static/clothes/2.jpg",
+                "http://testserver/static/clothes/1.jpg",
+            ]
+            next_cursor = response.headers["X-Next-Cursor"]
+            etag = response.headers["ETag"]
+            
+            response = client.get("/api/v1/clothes", params={"limit": 2, "cursor": next_cursor})
+            assert response.json() == ["http://testserver/static/clothes/0.jpg"]
+            assert "X-Next-Cursor" not in response.headers
+            
+            response = client.get("/api/v1/clothes", params={"limit": 2}, headers={"If-None-Match": etag})
+            assert response.status_code == 304
+            # 캐시가 여러 태그를 보내거나 W/ 를 떼고 보내도 같은 결과 (약한 비교)
+            for if_none_match in (f'"stale", {etag}', etag.replace("W/", ""), "*"):
+                response = client.get("/api/v1/clothes", params={"limit": 2},
+                                      headers={"If-None-Match": if_none_match})
+                assert response.status_code == 304
+            response = client.get("/api/v1/clothes", params={"limit": 2}, headers={"If-None-Match": '"stale"'})
+            assert response.status_code == 200
+        catalog.close()
+    
+    def test_try_on_batch_streams_per_item_results(self, client):
+        """Test POST /api/v1/try-on/batch prepares the person once and reports each garment separately."""
+        import json
+        client.mock_local_service.get_absolute_path.side_effect = lambda p: "/abs" + p
+        client.mock_ai_engine.remove_background.return_value = Mock(spec=Image.Image)
+        client.mock_ai_engine.virtual_try_on.return_value = Mock(spec=Image.Image)
+        client.mock_local_service.save_image_from_bytes.return_value = "/static/results/r.png"
+        
+        items = [
+            {"cloth_url": "http://testserver/static/clothes/a.jpg", "category": "upper_body"},
+            {"cloth_url": "http://testserver/static/clothes/missing.jpg"},
+            {"cloth_url": "http://testserver/static/clothes/b.jpg", "category": "lower_body"},
+        ]
+        with patch('main.os.path.exists', side_effect=lambda p: "missing" not in p), \
+             patch('main.Image.open', return_value=Mock(spec=Image.Image)) as mock_image_open:
+            response = client.post(
+                "/api/v1/try-on/batch",
+                files={"person_image": ("person.jpg", b"fake person image", "image/jpeg")},
+                data={"items": json.dumps(items)}
+            )
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        results = {line["index"]: line for line in lines[:-1]}
+        assert results[0]["status"] == "success"
+        assert results[0]["result_image_url"] == "http://testserver/static/results/r.png"
+        assert results[1]["status"] == "error"
+        assert results[1]["status_code"] == 404
+        assert results[2]["status"] == "success"
+        assert lines[-1] == {"done": True, "total": 3, "succeeded": 2, "failed": 1}
+        # 사람 사진 1번 + 옷 2벌
+        assert mock_image_open.call_count == 3
+        assert client.mock_ai_engine.virtual_try_on.call_count == 2
+    
+    def test_try_on_batch_rejects_invalid_items(self, client):
+        """Test POST /api/v1/try-on/batch returns 422 for malformed or oversized item lists."""
+        person_file = ("person.jpg", b"fake person image", "image/jpeg")
+        
+        response = client.post("/api/v1/try-on/batch", files={"person_image": person_file}, data={"items": "not json"})
+        assert response.status_code == 422
+        
+        response = client.post("/api/v1/try-on/batch", files={"person_image": person_file}, data={"items": "[]"})
+        assert response.status_code == 422
+        
+        with patch('main.config.BATCH_MAX_ITEMS', 1):
+            response = client.post(
+                "/api/v1/try-on/batch",
+                files={"person_image": person_file},
+                data={"items": '[{"cloth_url": "/static/clothes/a.jpg"}, {"cloth_url": "/static/clothes/b.jpg"}]'}
+            )
+        assert response.status_code == 422
+    
+    def test_try_on_with_person_session(self, client, temp_dir):
+        """Test that /api/v1/try-on accepts a person session id instead of an upload."""
+        from app.services.person_session import PersonSessionStore
+        from app.services.preprocess_service import PersonPreprocessor
+        store = PersonSessionStore(prepare=PersonPreprocessor(target_size=(96, 128)).prepare,
+                                   root=os.path.join(temp_dir, "sessions"))
+        buffer = io.BytesIO()
+        Image.new("RGB", (300, 400), color="green").save(buffer, format="JPEG")
+        
+        client.mock_local_service.get_absolute_path.return_value = "/absolute/path/to/cloth.jpg"
+        client.mock_ai_engine.remove_background.return_value = Mock(spec=Image.Image)
+        client.mock_ai_engine.virtual_try_on.return_value = Mock(spec=Image.Image)
+        client.mock_local_service.save_image_from_bytes.return_value = "/static/results/r.png"
+        
+        with patch('main.person_sessions', store):
+            response = client.post(
+                "/api/v1/person-sessions",
+                files={"person_image": ("person.jpg", buffer.getvalue(), "image/jpeg")}
+            )
+            assert response.status_code == 201
+            session_id = response.json()["person_session_id"]
+            assert response.json()["size"] == [96, 128]
+            
+            with patch('main.os.path.exists', return_value=True), \
+                 patch('main.Image.open', return_value=Mock(spec=Image.Image)):
+                response = client.post(
+                    "/api/v1/try-on",
+                    data={"person_session_id": session_id, "cloth_url": "http://testserver/static/clothes/shirt1.jpg"}
+                )
+            
+            assert response.status_code == 200
+            person_arg = client.mock_ai_engine.virtual_try_on.call_args[0][1]
+            assert person_arg.image.size == (96, 128)
+            
+            response = client.post(
+                "/api/v1/try-on",
+                data={"person_session_id": "unknown", "cloth_url": "http://testserver/static/clothes/shirt1.jpg"}
+            )
+            assert response.status_code == 404
+    
+    def test_try_on_requires_person_input(self, client):
+        """Test that /api/v1/try-on returns 422 when neither a photo nor a session id is sent."""
+        response = client.post("/api/v1/try-on", data={"cloth_url": "http://testserver/static/clothes/shirt1.jpg"})
+        
+        assert response.status_code == 422
+    
+    def test_metrics_endpoint(self, client):
+        """Test GET /metrics exposes request histograms in Prometheus text format."""
+        client.mock_local_service.get_cloth_list.return_value = []
+        client.get("/api/v1/clothes")
+        
+        response = client.get("/metrics")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'fitting_http_request_seconds_count{method="GET",route="/api/v1/clothes",status="200"}' in response.text
+        assert "X-Trace-Id" in response.headers
+    
+    def test_try_on_inline_returns_negotiated_image(self, client, temp_dir):
+        """Test that inline=true returns the encoded result bytes in the negotiated format."""
+        from app.services.result_encoder import ResultEncoder
+        encoder = ResultEncoder(default_format="webp")
+        result_path = os.path.join(temp_dir, "result.jpg")
+        
+        def save_result_bytes(data, ext):
+            with open(result_path, "wb") as f:
+                f.write(data)
+            return f"/static/results/result.{ext}"
+        
+        client.mock_local_service.get_absolute_path.return_value = result_path
+        client.mock_local_service.save_result_bytes.side_effect = save_result_bytes
+        client.mock_ai_engine.virtual_try_on.return_value = Image.new("RGB", (16, 16), "red")
+        
+        with patch('main.result_encoder', encoder), \
+             patch('main.os.path.exists', return_value=True), \
+             patch('main.Image.open', return_value=Mock(spec=Image.Image)):
+            response = client.post(
+                "/api/v1/try-on",
+                files={"person_image": ("person.jpg", b"fake person image", "image/jpeg")},
+                data={"cloth_url": "http://testserver/static/clothes/shirt1.jpg", "inline": "true"},
+                headers={"Accept": "image/jpeg"}
+            )
+        encoder.shutdown()
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/jpeg"
+        assert response.headers["X-Result-Image-Url"] == "http://testserver/static/results/result.jpg"
+        assert Image.open(io.BytesIO(response.content)).format == "JPEG"
+        client.mock_local_service.save_image_from_bytes.assert_not_called()
+    
+    def test_health_and_readiness_probes(self, client):
+        """Test that /healthz is always 200 and /readyz reports component state."""
+        registry = Mock()
+        registry.report.return_value = {"ready": False, "startup_seconds": None,
+                                        "components": {"inference": {"state": "starting"}}}
+        
+        with patch('main.startup', registry):
+            assert client.get("/healthz").status_code == 200
+            response = client.get("/readyz")
+        
+        assert response.status_code == 503
+        assert response.json()["components"]["inference"]["state"] == "starting"
+    
+    def test_try_on_while_starting_returns_503(self, client):
+        """Test that try-on requests are rejected with Retry-After until the engine is ready."""
+        registry = Mock()
+        registry.is_ready.return_value = False
+        
+        with patch('main.startup', registry):
+            response = client.post(
+                "/api/v1/try-on",
+                files={"person_image": ("person.jpg", b"fake person image", "image/jpeg")},
+                data={"cloth_url": "http://testserver/static/clothes/shirt1.jpg"}
+            )
+        
+        assert response.status_code == 503
+        assert "Retry-After" in response.headers
+        client.mock_ai_engine.virtual_try_on.assert_not_called()
+
+    def test_try_on_rate_limited_per_client(self, client):
+        """Test that a client over its rate limit gets 429 while another API key is still served."""
+        from app.services.scheduler import FairScheduler
+        scheduler = FairScheduler(rate=0.01, burst=1)
+
+        with patch('main.scheduler', scheduler), patch('main.config.API_KEYS', {"alice", "bob"}):
+            responses = [
+                client.post(
+                    "/api/v1/try-on",
+                    files={"person_image": ("person.jpg", b"fake person image", "image/jpeg")},
+                    data={"cloth_url": "http://testserver/static/clothes/shirt1.jpg"},
+                    headers={"X-API-Key": key},
+                )
+                for key in ("alice", "alice", "bob", "random-1", "random-2", "ip:testclient")
+            ]
+
+        assert responses[0].status_code != 429
+        assert responses[1].status_code == 429
+        assert int(responses[1].headers["Retry-After"]) >= 1
+        assert responses[2].status_code != 429
+        # 등록되지 않은 키는 IP 로 묶임 → 키를 바꿔도 같은 버킷, "ip:" 키로 남의 버킷을 쓸 수도 없음
+        assert responses[3].status_code != 429
+        assert responses[4].status_code == 429
+        assert responses[5].status_code == 429
+        assert set(scheduler._buckets) == {"key:alice", "key:bob", "ip:testclient"}
@@ -0,0 +1,162 @@
+import os
+import pytest
+
+from app.services.catalog_service import ClothCatalog, InvalidCursorError
+
+
+class TestClothCatalog:
+    """Test suite for ClothCatalog class."""
+
+    @pytest.fixture
+    def cloth_dir(self, temp_dir):
+        path = os.path.join(temp_dir, "clothes")
+        os.makedirs(path)
+        return path
+
+    @pytest.fixture
+    def catalog(self, temp_dir, cloth_dir):
+        catalog = ClothCatalog(db_path=os.path.join(temp_dir, "catalog.sqlite3"), cloth_dir=cloth_dir)
+        yield catalog
+        catalog.close()
+
+    def _write(self, cloth_dir, name, mtime):
+        path = os.path.join(cloth_dir, name)
+        with open(path, "wb") as f:
+            f.write(name.encode())
+        os.utime(path, (mtime, mtime))
+        return name
+
+    def test_rebuild_indexes_existing_files_newest_first(self, catalog, cloth_dir):
+        """Test that rebuild picks up files on disk and lists them by mtime, newest first."""
+        self._write(cloth_dir, "old.jpg", 100)
+        self._write(cloth_dir, "new.jpg", 300)
+        self._write(cloth_dir, "mid.jpg", 200)
+
+        assert catalog.rebuild() == 3
+        assert catalog.list_page() == (["new.jpg", "mid.jpg", "old.jpg"], None)
+        assert catalog.rebuild() == 0
+
+    def test_rebuild_drops_deleted_files(self, catalog, cloth_dir):
+        """Test that files removed from disk disappear from the index."""
+        self._write(cloth_dir, "a.jpg", 100)
+        catalog.rebuild()
+        os.remove(os.path.join(cloth_dir, "a.jpg"))
+
+        catalog.rebuild()
+
+        assert catalog.list_page() == ([], None)
+
+    def test_cursor_pagination_walks_all_items(self, catalog, cloth_dir):
+        """Test that following next cursors returns every item exactly once."""
+        for i in range(5):
+            self._write(cloth_dir, f"{i}.jpg", 100 + i)
+        catalog.rebuild()
+
+        seen, cursor = [], None
+        while True:
+            names, cursor = catalog.list_page(limit=2, cursor=cursor)
+            seen += names
+            if cursor is None:
+                break
+
+        assert seen == ["4.jpg", "3.jpg", "2.jpg", "1.jpg", "0.jpg"]
+
+    def test_category_filter(self, catalog, cloth_dir):
+        """Test that add() stores the category and list_page filters on it."""
+        catalog.add(self._write(cloth_dir, "pants.jpg", 100), category="lower_body")
+        catalog.add(self._write(cloth_dir, "shirt.jpg", 200), category="upper_body")
+
+        assert catalog.list_page(category="lower_body") == (["pants.jpg"], None)
+
+    def test_set_category_moves_existing_item(self, catalog, cloth_dir):
+        """Test that set_category re-files an item and bumps the version only when it changes."""
+        catalog.add(self._write(cloth_dir, "shirt.jpg", 100))
+        version = catalog.version()
+
+        assert catalog.set_category("shirt.jpg", "upper_body") is True
+        assert catalog.set_category("shirt.jpg", "upper_body") is False
+        assert catalog.set_category("missing.jpg", "upper_body") is False
+
+        assert catalog.list_page(category="upper_body") == (["shirt.jpg"], None)
+        assert catalog.version() == version + 1
+
+    def test_etag_changes_only_on_write(self, catalog, cloth_dir):
+        """Test that the ETag is stable until the catalog changes."""
+        first = catalog.etag("base", None)
+        assert catalog.etag("base", None) == first
+        assert catalog.etag("base", 10) != first
+
+        catalog.add(self._write(cloth_dir, "a.jpg", 100))
+
+        assert catalog.etag("base", None) != first
+        second = catalog.etag("base", None)
+        catalog.mark_changed()  # 파생 이미지 완성
+        assert catalog.etag("base", None) != second
+
+    def test_rebuild_hashes_images_and_clusters_near_duplicates(self, catalog, cloth_dir):
+        """Test that rebuild stores perceptual hashes and re-uploads of one garment form a cluster."""
+        from tests.unit.test_perceptual_hash import make_garment
+        make_garment(os.path.join(cloth_dir, "a.jpg"), seed=1)
+        make_garment(os.path.join(cloth_dir, "a_copy.webp"), seed=1, size=(200, 260), fmt="WEBP")
+        make_garment(os.path.join(cloth_dir, "b.jpg"), seed=2)
+        self._write(cloth_dir, "broken.jpg", 100)
+        for name, mtime in (("a.jpg", 100), ("a_copy.webp", 200), ("b.jpg", 300)):
+            os.utime(os.path.join(cloth_dir, name), (mtime, mtime))
+
+        catalog.rebuild()
+
+        assert catalog.hash_missing() == (0, 1)
+        assert catalog.duplicate_clusters() == [["a.jpg", "a_copy.webp"]]
+
+    def test_colorways_are_not_clustered(self, catalog, cloth_dir):
+        """Test that the same design in another colour is not reported as a duplicate."""
+        from tests.unit.test_perceptual_hash import make_colorway
+        make_colorway(os.path.join(cloth_dir, "red.jpg"), (200, 30, 30))
+        make_colorway(os.path.join(cloth_dir, "red_small.jpg"), (200, 30, 30), size=(200, 260))
+        make_colorway(os.path.join(cloth_dir, "navy.jpg"), (30, 40, 120))
+        make_colorway(os.path.join(cloth_dir, "green.jpg"), (40, 140, 60))
+        catalog.rebuild()
+
+        assert [sorted(group) for group in catalog.duplicate_clusters()] == [["red.jpg", "red_small.jpg"]]
+
+    def test_local_writes_update_tree_in_place(self, catalog, cloth_dir, temp_dir):
+        """Test that adds, removals and category/ETag bumps reuse the tree; only another worker's hashes rebuild it."""
+        from app.services.perceptual_hash import image_hashes
+        from tests.unit.test_perceptual_hash import make_garment
+        a = image_hashes(make_garment(os.path.join(cloth_dir, "a.jpg"), seed=1))
+        b = image_hashes(make_garment(os.path.join(cloth_dir, "b.jpg"), seed=2))
+        catalog.add("a.jpg", hashes=a)
+        assert catalog.find_similar(a) == [("a.jpg", 0)]
+        tree = catalog._tree
+
+        catalog.add("b.jpg", hashes=b)
+        catalog.set_category("a.jpg", "upper_body")
+        catalog.mark_changed()
+        assert catalog.find_similar(b) == [("b.jpg", 0)]
+        catalog.remove("a.jpg")
+        assert catalog.find_similar(a) == []
+        assert catalog._tree is tree
+
+        other = ClothCatalog(db_path=os.path.join(temp_dir, "catalog.sqlite3"), cloth_dir=cloth_dir)
+        other.add("a.jpg", hashes=a)  # 다른 워커
+        other.close()
+        assert catalog.find_similar(a) == [("a.jpg", 0)]
+        assert catalog._tree is not tree
+
+    def test_find_similar_sees_items_added_later(self, catalog, cloth_dir):
+        """Test that the in-memory BK-tree is rebuilt when the catalog changes."""
+        from app.services.perceptual_hash import image_hashes
+        from tests.unit.test_perceptual_hash import make_garment
+        hashes = image_hashes(make_garment(os.path.join(cloth_dir, "a.jpg"), seed=1))
+        assert catalog.find_similar(hashes) == []
+
+        catalog.add("a.jpg", hashes=hashes)
+
+        assert catalog.find_similar(hashes) == [("a.jpg", 0)]
+        catalog.remove("a.jpg")
+        assert catalog.find_similar(hashes) == []
+
+    def test_invalid_cursor_raises(self, catalog):
+        """Test that malformed cursors raise InvalidCursorError."""
+        with pytest.raises(InvalidCursorError):
+            catalog.list_page(limit=2, cursor="not-a-cursor")
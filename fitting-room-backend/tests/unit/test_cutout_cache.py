@@ -0,0 +1,67 @@
+import os
+import pytest
+from unittest.mock import Mock
+from PIL import Image
+
+from app.services.cutout_cache import ClothCutoutCache
+
+
+class TestClothCutoutCache:
+    """Test suite for ClothCutoutCache class."""
+
+    @pytest.fixture
+    def engine(self):
+        """Fake AI engine that records background removal calls."""
+        engine = Mock()
+        engine.remove_background.side_effect = lambda img: img.convert("RGBA")
+        engine.enhance_cloth.side_effect = lambda img: img
+        return engine
+
+    @pytest.fixture
+    def cloth_path(self, temp_dir):
+        path = os.path.join(temp_dir, "shirt.png")
+        Image.new("RGB", (8, 8), color="blue").save(path)
+        return path
+
+    def test_get_or_build_runs_rembg_once(self, engine, cloth_path, temp_dir):
+        """Test that repeated lookups reuse the cached cutout instead of calling rembg again."""
+        cache = ClothCutoutCache(engine, cache_dir=os.path.join(temp_dir, "cutouts"))
+
+        first = cache.get_or_build(cloth_path)
+        second = cache.get_or_build(cloth_path)
+
+        assert engine.remove_background.call_count == 1
+        assert engine.enhance_cloth.call_count == 1
+        assert first.size == second.size == (8, 8)
+        assert cache.stats() == {"hits": 1, "misses": 1}
+
+    def test_cache_is_keyed_by_content(self, engine, cloth_path, temp_dir):
+        """Test that identical files under different names share one cache entry."""
+        cache = ClothCutoutCache(engine, cache_dir=os.path.join(temp_dir, "cutouts"))
+        copy_path = os.path.join(temp_dir, "copy.png")
+        with open(cloth_path, "rb") as src, open(copy_path, "wb") as dst:
+            dst.write(src.read())
+
+        cache.build(cloth_path)
+        assert cache.load(copy_path) is not None
+        assert engine.remove_background.call_count == 1
+
+    def test_backfill_builds_missing_entries(self, engine, temp_dir):
+        """Test that backfill builds cutouts for every garment and skips existing ones."""
+        cloth_dir = os.path.join(temp_dir, "clothes")
+        os.makedirs(cloth_dir)
+        for i, color in enumerate(["red", "green"]):
+            Image.new("RGB", (4, 4), color=color).save(os.path.join(cloth_dir, f"{i}.png"))
+        cache = ClothCutoutCache(engine, cache_dir=os.path.join(temp_dir, "cutouts"))
+
+        assert cache.backfill(cloth_dir) == {"built": 2, "skipped": 0, "failed": 0}
+        assert cache.backfill(cloth_dir) == {"built": 0, "skipped": 2, "failed": 0}
+
+    def test_warm_swallows_errors(self, engine, cloth_path, temp_dir):
+        """Test that background warming never raises."""
+        engine.remove_background.side_effect = RuntimeError("rembg failed")
+        cache = ClothCutoutCache(engine, cache_dir=os.path.join(temp_dir, "cutouts"))
+
+        cache.warm(cloth_path)
+
+        assert cache.load(cloth_path) is None
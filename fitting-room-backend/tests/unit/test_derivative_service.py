@@ -0,0 +1,99 @@
+import os
+import pytest
+from PIL import Image
+
+from app.services.derivative_service import DerivativeGenerator
+
+
+class TestDerivativeGenerator:
+    """Test suite for DerivativeGenerator class."""
+
+    @pytest.fixture
+    def source(self, temp_dir):
+        path = os.path.join(temp_dir, "abc.jpg")
+        Image.new("RGB", (1200, 1600), color="navy").save(path, format="JPEG")
+        return path
+
+    @pytest.fixture
+    def generator(self, temp_dir):
+        generator = DerivativeGenerator(root=os.path.join(temp_dir, "derived"), sizes=(128, 256), formats=("webp",))
+        yield generator
+        generator.shutdown()
+
+    def test_generate_writes_every_size_and_format(self, generator, source, temp_dir):
+        """Test that each configured width is produced with the original aspect ratio."""
+        generator.submit(source, "/static/clothes/abc.jpg").result(timeout=10)
+
+        for width in (128, 256):
+            path = os.path.join(temp_dir, "derived", "clothes", f"abc_{width}.webp")
+            with Image.open(path) as image:
+                assert image.format == "WEBP"
+                assert image.size == (width, width * 4 // 3)
+
+    def test_variants_empty_until_generated(self, generator, source):
+        """Test that variants() only advertises files that exist."""
+        assert generator.variants("/static/clothes/abc.jpg") == {}
+
+        generator.submit(source, "/static/clothes/abc.jpg").result(timeout=10)
+
+        assert generator.variants("/static/clothes/abc.jpg") == {
+            "webp": {
+                "128": "/static/derived/clothes/abc_128.webp",
+                "256": "/static/derived/clothes/abc_256.webp",
+            }
+        }
+
+    def test_small_images_are_not_upscaled(self, generator, temp_dir):
+        """Test that sources smaller than a target width keep their size."""
+        path = os.path.join(temp_dir, "tiny.png")
+        Image.new("RGBA", (100, 50)).save(path)
+
+        generator.submit(path, "/static/results/tiny.png").result(timeout=10)
+
+        with Image.open(os.path.join(temp_dir, "derived", "results", "tiny_256.webp")) as image:
+            assert image.size == (100, 50)
+
+    def test_unsupported_formats_are_skipped(self, temp_dir):
+        """Test that unknown formats are dropped at construction time."""
+        generator = DerivativeGenerator(root=temp_dir, formats=("webp", "bogus"))
+        assert generator.formats == ["webp"]
+        generator.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_variants_when_ready_waits_for_pending_job(self, generator, source):
+        """Test that the async helper waits for an in-flight generation."""
+        generator.submit(source, "/static/clothes/abc.jpg")
+
+        variants = await generator.variants_when_ready("/static/clothes/abc.jpg", timeout=10)
+
+        assert "webp" in variants
+
+    def test_remove_deletes_files(self, generator, source, temp_dir):
+        """Test that remove() cleans up every derivative."""
+        generator.submit(source, "/static/clothes/abc.jpg").result(timeout=10)
+
+        generator.remove("/static/clothes/abc.jpg")
+
+        assert os.listdir(os.path.join(temp_dir, "derived", "clothes")) == []
+
+    def test_full_size_variant_only_when_smaller(self, temp_dir):
+        """Test that full-size variants are kept only if they beat the original size."""
+        generator = DerivativeGenerator(root=os.path.join(temp_dir, "derived"), sizes=(128,), formats=("webp",),
+                                        full_formats=("webp",))
+        big = os.path.join(temp_dir, "big.png")
+        Image.effect_noise((400, 400), 64).convert("RGB").save(big, format="PNG")
+        webp = os.path.join(temp_dir, "same.webp")
+        Image.new("RGB", (64, 64), color="red").save(webp, format="WEBP")
+
+        generator.submit(big, "/static/clothes/big.png").result(timeout=10)
+        generator.submit(webp, "/static/clothes/same.webp").result(timeout=10)
+
+        full = os.path.join(temp_dir, "derived", "clothes", "big_full.webp")
+        assert os.path.getsize(full) < os.path.getsize(big)
+        with Image.open(full) as image:
+            assert image.size == (400, 400)
+        assert not os.path.exists(os.path.join(temp_dir, "derived", "clothes", "same_full.webp"))
+
+        generator.remove("/static/clothes/big.png")
+        assert not os.path.exists(full)
+        generator.shutdown()
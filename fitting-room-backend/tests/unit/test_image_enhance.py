@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.services.image_enhance import enhance_fused, enhance_reference
+
+# 허용 오차: 채널 값 차이 (0~255)
+TOLERANCE = 1
+
+
+def _random_image(mode, size, seed=0):
+    rng = np.random.default_rng(seed)
+    channels = len(mode)
+    return Image.fromarray(rng.integers(0, 256, (size[1], size[0], channels), dtype=np.uint8), mode)
+
+
+def _gradient_image(mode, size):
+    w, h = size
+    xs = np.linspace(0, 255, w, dtype=np.float32)
+    ys = np.linspace(0, 255, h, dtype=np.float32)[:, None]
+    planes = [np.broadcast_to(xs, (h, w)), np.broadcast_to(ys, (h, w)), (xs + ys) / 2]
+    if mode == "RGBA":
+        planes.append(np.broadcast_to(ys, (h, w)))
+    return Image.fromarray(np.stack(planes, axis=-1).astype(np.uint8), mode)
+
+
+class TestEnhanceFused:
+    """Test suite for the fused NumPy garment enhancement."""
+
+    @pytest.mark.parametrize("mode", ["RGB", "RGBA"])
+    @pytest.mark.parametrize("size", [(1, 1), (2, 5), (3, 3), (29, 37), (64, 65), (257, 130)])
+    def test_matches_pil_chain_on_noise(self, mode, size):
+        """Test that the fused output matches the chained PIL ImageEnhance result within tolerance."""
+        image = _random_image(mode, size)
+
+        expected = np.asarray(enhance_reference(image, 1.2, 1.1, 1.1)).astype(int)
+        actual = np.asarray(enhance_fused(image, 1.2, 1.1, 1.1)).astype(int)
+
+        assert actual.shape == expected.shape
+        assert np.abs(actual - expected).max() <= TOLERANCE
+
+    @pytest.mark.parametrize("tile_rows", [1, 7, 32, 1000])
+    def test_tile_size_does_not_change_result(self, tile_rows):
+        """Test that the row tiling is an implementation detail."""
+        image = _gradient_image("RGBA", (96, 80))
+
+        expected = np.asarray(enhance_reference(image, 1.2, 1.1, 1.1)).astype(int)
+        actual = np.asarray(enhance_fused(image, 1.2, 1.1, 1.1, tile_rows=tile_rows)).astype(int)
+
+        assert np.abs(actual - expected).max() <= TOLERANCE
+
+    def test_alpha_channel_is_preserved(self):
+        """Test that the rembg alpha mask passes through untouched."""
+        image = _random_image("RGBA", (40, 30), seed=3)
+
+        result = enhance_fused(image, 1.2, 1.1, 1.1)
+
+        assert result.mode == "RGBA"
+        assert np.array_equal(np.asarray(result)[..., 3], np.asarray(image)[..., 3])
+
+    def test_other_modes_fall_back_to_pil(self):
+        """Test that unusual modes are handled by the reference implementation."""
+        image = Image.new("L", (8, 8), 100)
+
+        result = enhance_fused(image, 1.2, 1.1, 1.1)
+
+        assert result.mode == "L"
+        assert np.array_equal(np.asarray(result), np.asarray(enhance_reference(image, 1.2, 1.1, 1.1)))
@@ -0,0 +1,76 @@
+import pytest
+from unittest.mock import Mock, patch
+from PIL import Image
+
+from app.services.inference_backend import (
+    GradioBackend, OnnxBackend, StubBackend, create_backend,
+)
+from app.services.preprocess_service import PreparedImage
+
+
+class TestStubBackend:
+    """Test suite for StubBackend class."""
+
+    def test_output_is_deterministic_and_sized(self):
+        """Test that the stub returns the same image for the same inputs at the configured size."""
+        backend = StubBackend(output_size=(60, 80))
+        person = Image.new("RGB", (300, 400), "green")
+        cloth = Image.new("RGBA", (50, 50), (255, 0, 0, 255))
+
+        first = backend.try_on(person, cloth, "shirt", 30, 30)
+        second = backend.try_on(person, cloth, "shirt", 30, 30)
+
+        assert first.size == (60, 80)
+        assert first.tobytes() == second.tobytes()
+        assert first.getpixel((30, 30)) == (255, 0, 0)
+        assert backend.stats()["calls"] == 2
+
+    def test_accepts_prepared_image(self):
+        """Test that preprocessed person images are used as-is."""
+        backend = StubBackend(output_size=(30, 40))
+        prepared = PreparedImage(Image.new("RGB", (30, 40), "blue"), b"", "jpg", (30, 40), 0)
+
+        result = backend.try_on(prepared, Image.new("RGBA", (10, 10)), "trousers", 30, 30)
+
+        assert result.getpixel((0, 0)) == (0, 0, 255)
+
+    def test_latency_is_simulated(self):
+        """Test that the configured latency is spent inside try_on."""
+        backend = StubBackend(latency=0.5, output_size=(8, 8))
+
+        with patch("app.services.inference_backend.time.sleep") as sleep:
+            backend.try_on(Image.new("RGB", (8, 8)), Image.new("RGBA", (4, 4)), "shirt", 30, 30)
+
+        sleep.assert_called_once_with(0.5)
+
+
+class TestCreateBackend:
+    """Test suite for create_backend()."""
+
+    def test_selects_backend_by_name(self):
+        """Test that each configured name maps to its implementation."""
+        assert isinstance(create_backend("stub"), StubBackend)
+        assert isinstance(create_backend("onnx"), OnnxBackend)
+        assert isinstance(create_backend("gradio", stager=Mock(), inference=Mock()), GradioBackend)
+
+    def test_identity_names_backend_and_model(self, temp_dir):
+        """Test that backends (and ONNX model files) get distinct identities for the result cache."""
+        import os
+        inference = Mock()
+        inference.endpoints = [Mock(src="yisol/IDM-VTON")]
+        model_path = os.path.join(temp_dir, "tryon.onnx")
+        with open(model_path, "wb") as f:
+            f.write(b"model-v1")
+        onnx = OnnxBackend(model_path)
+        before = onnx.identity()
+        with open(model_path, "wb") as f:
+            f.write(b"model-v2-bigger")
+
+        assert StubBackend(output_size=(60, 80)).identity() == "stub:60x80"
+        assert GradioBackend(inference, Mock()).identity() == "gradio:yisol/IDM-VTON:/tryon"
+        assert before.startswith("onnx:") and onnx.identity() != before
+
+    def test_unknown_backend_raises(self):
+        """Test that a typo in INFERENCE_BACKEND fails loudly."""
+        with pytest.raises(ValueError):
+            create_backend("bogus")
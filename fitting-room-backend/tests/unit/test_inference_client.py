@@ -0,0 +1,198 @@
+import threading
+import time
+import pytest
+from unittest.mock import patch
+
+from app.services.inference_client import (
+    RemoteInferenceClient, CircuitBreaker, InferenceError, InferenceRejectedError, InferenceUnavailableError,
+    OPEN, HALF_OPEN, CLOSED,
+)
+
+
+class FakeJob:
+    def __init__(self, outcome, delay=0.0):
+        self.outcome = outcome
+        self.delay = delay
+        self.cancelled = False
+
+    def result(self, timeout=None):
+        if timeout is not None and self.delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError()
+        time.sleep(self.delay)
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return self.outcome
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class FakeGradioClient:
+    """Stands in for gradio_client.Client: returns queued outcomes from submit()."""
+
+    def __init__(self, outcomes, delay=0.0):
+        self.outcomes = list(outcomes)
+        self.delay = delay
+        self.calls = []
+        self.jobs = []
+
+    def submit(self, *args, api_name=None):
+        self.calls.append((args, api_name))
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        job = FakeJob(outcome, self.delay)
+        self.jobs.append(job)
+        return job
+
+
+def make_client(fakes, **kwargs):
+    kwargs.setdefault("backoff_base", 0.0)
+    kwargs.setdefault("backoff_max", 0.0)
+    return RemoteInferenceClient(endpoints=list(fakes), client_factory=lambda src: fakes[src], **kwargs)
+
+
+class TestCircuitBreaker:
+    """Test suite for CircuitBreaker class."""
+
+    def test_opens_after_threshold_and_half_opens_after_timeout(self):
+        """Test the closed -> open -> half-open -> closed cycle."""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert breaker.allow() is False
+
+        time.sleep(0.06)
+        assert breaker.allow() is True       # single trial call
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow() is False      # no second trial while the first is running
+
+        breaker.record_success()
+        assert breaker.state == CLOSED
+
+
+class TestRemoteInferenceClient:
+    """Test suite for RemoteInferenceClient class."""
+
+    def test_predict_returns_result(self):
+        """Test that a successful call returns the remote result and records latency."""
+        fake = FakeGradioClient(["/tmp/result.png"])
+        client = make_client({"space-a": fake})
+
+        assert client.predict("x", api_name="/tryon") == "/tmp/result.png"
+        assert fake.calls == [(("x",), "/tryon")]
+        stats = client.stats()["endpoints"]["space-a"]
+        assert stats["calls"] == 1
+        assert stats["errors"] == 0
+        assert stats["latency_p50"] is not None
+
+    def test_retries_then_succeeds(self):
+        """Test that transient failures are retried."""
+        fake = FakeGradioClient([ConnectionError("busy"), "/tmp/result.png"])
+        client = make_client({"space-a": fake}, retries=2)
+
+        assert client.predict(api_name="/tryon") == "/tmp/result.png"
+        assert client.stats()["endpoints"]["space-a"]["errors"] == 1
+
+    def test_raises_inference_error_after_retries(self):
+        """Test that persistent failures surface as InferenceError instead of a silent fallback."""
+        fake = FakeGradioClient([ConnectionError("down")])
+        client = make_client({"space-a": fake}, retries=1, failure_threshold=10)
+
+        with pytest.raises(InferenceError):
+            client.predict(api_name="/tryon")
+        assert len(fake.calls) == 2
+
+    def test_timeout_cancels_job(self):
+        """Test that a call exceeding the timeout is cancelled and counted."""
+        fake = FakeGradioClient(["/tmp/late.png"], delay=0.2)
+        client = make_client({"space-a": fake}, retries=0, timeout=0.01)
+
+        with pytest.raises(InferenceError):
+            client.predict(api_name="/tryon")
+        assert fake.jobs[0].cancelled is True
+        assert client.stats()["endpoints"]["space-a"]["timeouts"] == 1
+
+    def test_open_circuit_fails_fast(self):
+        """Test that an open breaker rejects calls without touching the backend."""
+        fake = FakeGradioClient([ConnectionError("down")])
+        client = make_client({"space-a": fake}, retries=0, failure_threshold=1, reset_timeout=30)
+
+        with pytest.raises(InferenceError):
+            client.predict(api_name="/tryon")
+        with pytest.raises(InferenceUnavailableError) as exc_info:
+            client.predict(api_name="/tryon")
+
+        assert len(fake.calls) == 1
+        assert exc_info.value.retry_after > 0
+
+    def test_fails_over_to_healthy_endpoint(self):
+        """Test that retries move on to another endpoint."""
+        bad = FakeGradioClient([ConnectionError("down")])
+        good = FakeGradioClient(["/tmp/result.png"])
+        client = make_client({"space-a": bad, "space-b": good}, retries=1)
+
+        assert client.predict(api_name="/tryon") == "/tmp/result.png"
+        assert len(bad.calls) == 1
+        assert len(good.calls) == 1
+
+    def test_bad_request_is_not_retried_and_keeps_circuit_closed(self):
+        """Test that a non-transient error is raised at once and does not trip the breaker."""
+        fake = FakeGradioClient([ValueError("invalid category")])
+        client = make_client({"space-a": fake}, retries=2, failure_threshold=1)
+
+        with pytest.raises(InferenceRejectedError, match="invalid category"):
+            client.predict(api_name="/tryon")
+
+        assert len(fake.calls) == 1
+        assert client.endpoints[0].breaker.state == CLOSED
+
+    def test_server_errors_are_transient(self):
+        """Test that 5xx responses are retried while 4xx responses are not."""
+        from app.services.inference_client import is_transient
+
+        class StatusError(Exception):
+            def __init__(self, status):
+                self.response = type("Response", (), {"status_code": status})()
+
+        assert is_transient(StatusError(503)) and is_transient(StatusError(429))
+        assert not is_transient(StatusError(422))
+        assert is_transient(TimeoutError()) and not is_transient(RuntimeError("bad input"))
+
+    def test_backoff_releases_in_flight_slot(self):
+        """Test that a request sleeping between retries does not hold a concurrency slot."""
+        flaky = FakeGradioClient([ConnectionError("busy"), "/tmp/result.png"])
+        client = make_client({"space-a": flaky}, max_in_flight=1, retries=1, backoff_base=0.3, backoff_max=0.3)
+        with patch("app.services.inference_client.random.uniform", return_value=0.3):
+            slow = threading.Thread(target=client.predict, kwargs={"api_name": "/tryon"})
+            slow.start()
+            time.sleep(0.1)  # 첫 시도 실패 후 대기 중
+            t0 = time.perf_counter()
+            assert client._semaphore.acquire(timeout=0.1)
+            client._semaphore.release()
+            assert time.perf_counter() - t0 < 0.1
+            slow.join()
+
+    def test_in_flight_predictions_are_bounded(self):
+        """Test that no more than max_in_flight predictions run at once."""
+        fake = FakeGradioClient(["/tmp/result.png"], delay=0.05)
+        client = make_client({"space-a": fake}, max_in_flight=2)
+        peak = []
+
+        def call():
+            client.predict(api_name="/tryon")
+
+        def watch():
+            for _ in range(20):
+                peak.append(client.in_flight)
+                time.sleep(0.005)
+
+        threads = [threading.Thread(target=call) for _ in range(5)] + [threading.Thread(target=watch)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert max(peak) <= 2
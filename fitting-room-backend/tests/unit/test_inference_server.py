@@ -0,0 +1,160 @@
+import os
+import threading
+import pytest
+from unittest.mock import Mock, patch
+from PIL import Image
+
+from app.services.inference_backend import StubBackend
+from app.services.inference_client import InferenceError, InferenceRejectedError, InferenceUnavailableError
+from app.services.inference_server import InferenceProxy, InferenceServer, parse_address, resolve_authkey
+
+AUTHKEY = b"test-key"
+
+
+class FailingBackend(StubBackend):
+    def try_on(self, person, cloth, vton_desc, steps, seed):
+        raise InferenceUnavailableError(7)
+
+
+class TestInferenceServer:
+    """Test suite for the shared inference process and its IPC proxy."""
+
+    @pytest.fixture
+    def engine(self):
+        engine = Mock()
+        engine.backend = StubBackend(output_size=(60, 80))
+        engine.rembg_pool = None
+        engine.remove_background.side_effect = lambda image: image.convert("RGBA")
+        return engine
+
+    @pytest.fixture
+    def address(self, temp_dir):
+        return os.path.join(temp_dir, "inference.sock")
+
+    def _serve(self, engine, address):
+        server = InferenceServer(engine, address, AUTHKEY)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def test_parse_address(self):
+        """Test that host:port becomes a TCP address and anything else a socket path."""
+        assert parse_address("127.0.0.1:7100") == ("127.0.0.1", 7100)
+        assert parse_address(":7100") == ("127.0.0.1", 7100)
+        assert parse_address("data/inference.sock") == "data/inference.sock"
+
+    def test_tcp_address_requires_explicit_authkey(self, temp_dir):
+        """Test that a TCP address is refused without a configured key and uses it when given."""
+        key_file = os.path.join(temp_dir, "inference.key")
+        with pytest.raises(ValueError):
+            resolve_authkey("127.0.0.1:7100", "", key_file)
+        assert resolve_authkey("127.0.0.1:7100", "s3cret", key_file) == b"s3cret"
+        assert not os.path.exists(key_file)
+
+    def test_socket_authkey_is_random_and_shared_through_private_file(self, temp_dir):
+        """Test that a generated key is stored 0600 and every caller reads the same key."""
+        key_file = os.path.join(temp_dir, "inference.key")
+
+        first = resolve_authkey("data/inference.sock", "", key_file)
+        second = resolve_authkey("data/inference.sock", "", key_file)
+
+        assert first == second and len(first) == 64
+        assert os.stat(key_file).st_mode & 0o777 == 0o600
+
+    def test_socket_is_private(self, engine, address):
+        """Test that the server's unix socket is only accessible to its owner."""
+        server = self._serve(engine, address)
+        proxy = InferenceProxy(address, AUTHKEY, connect_timeout=5)
+        try:
+            proxy.connect()
+            assert os.stat(address).st_mode & 0o777 == 0o600
+        finally:
+            proxy.close()
+            server.close()
+
+    def test_proxy_round_trip(self, engine, address):
+        """Test that try-on and background removal run in the server and images come back."""
+        server = self._serve(engine, address)
+        proxy = InferenceProxy(address, AUTHKEY, connect_timeout=5)
+        try:
+            proxy.connect()
+            result = proxy.try_on(Image.new("RGB", (30, 40), "white"), Image.new("RGB", (10, 10), "red"),
+                                  "shirt", 30, 30)
+            cutout = proxy.remove(Image.new("RGB", (8, 8), "blue"))
+
+            assert result.size == (60, 80)
+            assert cutout.mode == "RGBA"
+            assert proxy.identity() == "stub:60x80"
+            assert engine.backend.calls == 1
+            assert proxy.stats()["server"]["requests"] >= 3
+            assert proxy.stats()["idle_connections"] == 1
+        finally:
+            proxy.close()
+            server.close()
+
+    def test_errors_keep_their_type(self, engine, address):
+        """Test that inference errors raised in the server surface as the same type."""
+        engine.backend = FailingBackend()
+        server = self._serve(engine, address)
+        proxy = InferenceProxy(address, AUTHKEY, connect_timeout=5)
+        try:
+            proxy.connect()
+            with pytest.raises(InferenceUnavailableError) as exc:
+                proxy.try_on(Image.new("RGB", (4, 4)), Image.new("RGB", (4, 4)), "shirt", 30, 30)
+            assert exc.value.retry_after == 7
+            with pytest.raises(InferenceRejectedError):
+                InferenceProxy._unwrap(("error", "InferenceRejectedError", "invalid category", None))
+        finally:
+            proxy.close()
+            server.close()
+
+    def test_failed_call_closes_connection_and_is_not_resent(self, address):
+        """Test that a connection failing after send is closed and the request is not sent twice."""
+        proxy = InferenceProxy(address, AUTHKEY)
+        conn = Mock()
+        conn.poll.return_value = False
+        conn.recv.side_effect = EOFError()
+        proxy._idle.append(conn)
+
+        with patch("app.services.inference_server.Client") as client:
+            with pytest.raises(InferenceUnavailableError):
+                proxy.call("try_on")
+        conn.send.assert_called_once()
+        conn.close.assert_called_once()
+        client.assert_not_called()
+        assert proxy._idle == []
+
+    def test_unpicklable_arguments_do_not_leak_connection(self, address):
+        """Test that a non-transport error during send closes the connection instead of leaking it."""
+        proxy = InferenceProxy(address, AUTHKEY)
+        conn = Mock()
+        conn.poll.return_value = False
+        conn.send.side_effect = TypeError("cannot pickle '_thread.lock' object")
+        proxy._idle.append(conn)
+
+        with pytest.raises(TypeError):
+            proxy.call("try_on", threading.Lock())
+        conn.close.assert_called_once()
+        assert proxy._idle == []
+
+    def test_stale_idle_connection_is_replaced_before_sending(self, address):
+        """Test that an idle connection closed by the server is dropped before the request goes out."""
+        proxy = InferenceProxy(address, AUTHKEY)
+        stale, fresh = Mock(), Mock()
+        stale.poll.return_value = True  # 서버가 닫음 → EOF 가 읽힘
+        fresh.recv.return_value = ("ok", "pong")
+        proxy._idle.append(stale)
+
+        with patch("app.services.inference_server.Client", return_value=fresh):
+            assert proxy.call("ping") == "pong"
+        stale.send.assert_not_called()
+        stale.close.assert_called_once()
+        assert proxy._idle == [fresh]
+        assert proxy.reconnects == 1
+
+    def test_unreachable_server_is_unavailable(self, address):
+        """Test that a missing server maps to InferenceUnavailableError (HTTP 503)."""
+        proxy = InferenceProxy(address, AUTHKEY, connect_timeout=0)
+
+        with pytest.raises(InferenceUnavailableError):
+            proxy.connect()
+        assert isinstance(InferenceUnavailableError(1), InferenceError)
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import pytest
+
+from app.services.job_service import TryOnJobQueue, QueueFullError, SUCCEEDED, FAILED
+
+
+class TestTryOnJobQueue:
+    """Test suite for TryOnJobQueue class."""
+
+    @pytest.mark.asyncio
+    async def test_job_runs_in_worker_and_succeeds(self):
+        """Test that a submitted job runs off the event loop and stores its result."""
+        queue = TryOnJobQueue(workers=1, max_queue=4)
+        await queue.start()
+        loop_thread = threading.get_ident()
+
+        job = queue.submit(lambda x: {"thread": threading.get_ident(), "value": x}, 42)
+        snapshots = [s async for s in queue.events(job.id) if s is not None]
+        await queue.stop()
+
+        assert snapshots[-1]["status"] == SUCCEEDED
+        assert job.result["value"] == 42
+        assert job.result["thread"] != loop_thread
+
+    @pytest.mark.asyncio
+    async def test_failed_job_reports_error(self):
+        """Test that exceptions in the handler mark the job as failed."""
+        queue = TryOnJobQueue(workers=1, max_queue=4)
+        await queue.start()
+
+        def boom():
+            raise RuntimeError("remote down")
+
+        job = queue.submit(boom)
+        [s async for s in queue.events(job.id)]
+        await queue.stop()
+
+        assert job.status == FAILED
+        assert job.error == "remote down"
+
+    @pytest.mark.asyncio
+    async def test_submit_raises_when_queue_full(self):
+        """Test that submissions beyond the queue depth raise QueueFullError with retry_after."""
+        queue = TryOnJobQueue(workers=1, max_queue=1, default_retry_after=7)
+        await queue.start()
+        release = threading.Event()
+
+        queue.submit(release.wait)          # picked up by the worker
+        await asyncio.sleep(0.05)
+        queue.submit(release.wait)          # fills the queue
+
+        with pytest.raises(QueueFullError) as exc_info:
+            queue.submit(release.wait)
+        assert exc_info.value.retry_after == 7
+
+        release.set()
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_retry_after_uses_average_duration(self):
+        """Test that retry_after is estimated from observed job durations."""
+        queue = TryOnJobQueue(workers=2, max_queue=4)
+        await queue.start()
+        queue._record_duration(10.0)
+
+        assert queue.retry_after() == 5
+        await queue.stop()
+
+    def test_get_unknown_job_returns_none(self):
+        """Test that unknown job ids return None."""
+        queue = TryOnJobQueue()
+        assert queue.get("missing") is None
+
+    @pytest.mark.asyncio
+    async def test_shared_store_serves_jobs_from_other_workers(self, temp_dir):
+        """Test that a job accepted by one worker can be polled and streamed from another."""
+        import os
+        from app.services.job_service import SharedJobStore, QUEUED
+        db_path = os.path.join(temp_dir, "jobs.sqlite3")
+        worker_a = TryOnJobQueue(workers=1, max_queue=4, shared=SharedJobStore(db_path))
+        worker_b = TryOnJobQueue(workers=1, max_queue=4, shared=SharedJobStore(db_path), poll_interval=0.01)
+        await worker_a.start()
+        await worker_b.start()
+        release = threading.Event()
+
+        job = worker_a.submit(lambda: release.wait(5) and {"result_image_url": "/static/results/r.webp"})
+        assert worker_b.get(job.id).status in (QUEUED, "running")
+
+        release.set()
+        snapshots = [s async for s in worker_b.events(job.id) if s is not None]
+        await worker_a.stop()
+        await worker_b.stop()
+
+        assert snapshots[-1]["status"] == SUCCEEDED
+        assert snapshots[-1]["result"] == {"result_image_url": "/static/results/r.webp"}
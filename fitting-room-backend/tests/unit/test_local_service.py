@@ -25,32 +25,6 @@ class TestLocalFileService:
             assert any('static/results' in str(call) for call in calls)
             assert all(call[1]['exist_ok'] is True for call in calls)
     
-    def test_save_cloth_creates_unique_filename(self, temp_dir):
-        """Test that save_cloth creates files with unique names."""
-        # Mock dependencies
-        mock_file = Mock()
-        mock_file.filename = "test.jpg"
-        mock_file.file = Mock()
-        
-        # Mock uuid to return a predictable value
-        with patch('app.services.local_service.uuid.uuid4', return_value="test-uuid-123"):
-            with patch('app.services.local_service.open', mock_open()) as mock_file_open:
-                with patch('app.services.local_service.shutil.copyfileobj') as mock_copy:
-                    service = LocalFileService()
-                    
-                    # Call the method
-                    result = service.save_cloth(mock_file)
-                    
-                    # Verify the result
-                    assert result == "/static/clothes/test-uuid-123.jpg"
-                    
-                    # Verify file was opened with correct path
-                    expected_path = os.path.join("static/clothes", "test-uuid-123.jpg")
-                    mock_file_open.assert_called_once_with(expected_path, "wb")
-                    
-                    # Verify copy was called
-                    mock_copy.assert_called_once_with(mock_file.file, mock_file_open())
-    
     def test_get_cloth_list_returns_sorted_files(self, temp_dir):
         """Test that get_cloth_list returns files sorted by modification time (newest first)."""
         # Mock glob to return test files
@@ -103,6 +77,31 @@ class TestLocalFileService:
                     # Verify image was saved
                     mock_save.assert_called_once_with("static/results/image-uuid-456.png", format="PNG")
     
+    def test_save_image_from_bytes_uses_result_storage(self, temp_dir):
+        """Test that results go through the storage manager when one is configured."""
+        from app.services.result_storage import ResultStorage
+        results = ResultStorage(root=os.path.join(temp_dir, "results"))
+        service = LocalFileService(results=results)
+        
+        web_path = service.save_image_from_bytes(Image.new('RGB', (10, 10), color='red'))
+        
+        name = web_path.rsplit("/", 1)[-1]
+        assert web_path == f"/static/results/{name[:2]}/{name}"
+        assert os.path.exists(os.path.join(temp_dir, "results", name[:2], name))
+        assert results.stats()["files"] == 1
+    
+    def test_save_result_bytes_keeps_encoded_extension(self, temp_dir):
+        """Test that pre-encoded results are written as-is with their own extension."""
+        from app.services.result_storage import ResultStorage
+        service = LocalFileService(results=ResultStorage(root=os.path.join(temp_dir, "results")))
+        
+        web_path = service.save_result_bytes(b"RIFF0000WEBP", "webp")
+        
+        assert web_path.endswith(".webp")
+        name = web_path.rsplit("/", 1)[-1]
+        with open(os.path.join(temp_dir, "results", name[:2], name), "rb") as f:
+            assert f.read() == b"RIFF0000WEBP"
+    
     def test_get_absolute_path_converts_web_path(self):
         """Test that get_absolute_path converts web path to absolute path."""
         service = LocalFileService()
@@ -132,4 +131,122 @@ class TestLocalFileService:
                 result = service.get_absolute_path("")
                 
                 # Should join cwd with empty string
-                mock_join.assert_called_once_with("/test/cwd", "")
\ No newline at end of file
+                mock_join.assert_called_once_with("/test/cwd", "")
+
+class FakeUpload:
+    """Minimal async UploadFile stand-in that yields data in small chunks."""
+
+    def __init__(self, data: bytes, chunk: int = 7):
+        self._stream = io.BytesIO(data)
+        self._chunk = chunk
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._stream.read(min(size, self._chunk))
+
+
+class TestLocalFileServiceStreamingUpload:
+    """Test suite for LocalFileService.save_cloth_stream."""
+
+    @pytest.fixture
+    def service(self, temp_dir):
+        service = LocalFileService()
+        service.CLOTH_DIR = temp_dir
+        return service
+
+    @pytest.mark.asyncio
+    async def test_saves_under_content_hash_with_sniffed_extension(self, service, temp_dir, sample_image_bytes):
+        """Test that the file name comes from the content hash and the extension from the magic number."""
+        import hashlib
+        path = await service.save_cloth_stream(FakeUpload(sample_image_bytes))
+
+        expected = f"{hashlib.sha256(sample_image_bytes).hexdigest()[:32]}.png"
+        assert path == f"/static/clothes/{expected}"
+        with open(os.path.join(temp_dir, expected), "rb") as f:
+            assert f.read() == sample_image_bytes
+        assert [n for n in os.listdir(temp_dir) if n.endswith(".tmp")] == []
+
+    @pytest.mark.asyncio
+    async def test_identical_uploads_are_deduplicated(self, service, temp_dir, sample_image_bytes):
+        """Test that uploading the same bytes twice stores a single file and registers it once."""
+        service.catalog = Mock()
+
+        first = await service.save_cloth_stream(FakeUpload(sample_image_bytes), category="upper_body")
+        second = await service.save_cloth_stream(FakeUpload(sample_image_bytes))
+
+        assert first == second
+        assert len(os.listdir(temp_dir)) == 1
+        service.catalog.add.assert_called_once()
+        service.catalog.set_category.assert_not_called()
+
+        # 같은 사진을 다른 카테고리로 다시 올리면 카테고리만 갱신
+        await service.save_cloth_stream(FakeUpload(sample_image_bytes), category="dresses")
+        service.catalog.set_category.assert_called_once_with(first.rsplit("/", 1)[-1], "dresses")
+
+    @pytest.mark.asyncio
+    async def test_finished_derivatives_invalidate_catalog_etag(self, service, sample_image_bytes):
+        """Test that the catalog version is bumped once a cloth's thumbnails are ready, not on failure."""
+        from concurrent.futures import Future
+        service.catalog = Mock()
+        service.derivatives = Mock()
+        service.derivatives.submit.side_effect = futures = [Future(), Future()]
+
+        await service.save_cloth_stream(FakeUpload(sample_image_bytes))
+        service.catalog.mark_changed.assert_not_called()
+        futures[0].set_result(None)
+        service.catalog.mark_changed.assert_called_once()
+
+        await service.save_cloth_stream(FakeUpload(sample_image_bytes + b"x"))
+        futures[1].set_exception(OSError("disk full"))
+        service.catalog.mark_changed.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_dedupe_returns_existing_near_duplicate(self, service, temp_dir):
+        """Test that with dedupe a resized re-upload is not stored and points at the existing garment."""
+        from app.services.catalog_service import ClothCatalog
+        from app.services.local_service import NearDuplicateError
+        from tests.unit.test_perceptual_hash import make_garment
+        service.CLOTH_DIR = cloth_dir = os.path.join(temp_dir, "clothes")
+        service.catalog = ClothCatalog(db_path=os.path.join(temp_dir, "catalog.sqlite3"), cloth_dir=cloth_dir)
+        original = make_garment(os.path.join(temp_dir, "a.jpg"), seed=1)
+        copy = make_garment(os.path.join(temp_dir, "a_small.jpg"), seed=1, size=(200, 260), quality=60)
+        try:
+            with open(original, "rb") as f:
+                first = await service.save_cloth_stream(FakeUpload(f.read(), chunk=65536))
+            with open(copy, "rb") as f:
+                data = f.read()
+            with pytest.raises(NearDuplicateError) as exc:
+                await service.save_cloth_stream(FakeUpload(data, chunk=65536), dedupe=True)
+
+            assert exc.value.path == first
+            assert os.listdir(cloth_dir) == [first.rsplit("/", 1)[-1]]
+            # dedupe 없이 올리면 그대로 저장
+            await service.save_cloth_stream(FakeUpload(data, chunk=65536))
+            assert len(service.catalog.list_page()[0]) == 2
+        finally:
+            service.catalog.close()
+
+    @pytest.mark.asyncio
+    async def test_rejects_non_image_content(self, service, temp_dir):
+        """Test that content without an image signature is rejected regardless of file name."""
+        from app.services.local_service import UnsupportedImageError
+        with pytest.raises(UnsupportedImageError):
+            await service.save_cloth_stream(FakeUpload(b"<?php echo 'hi'; ?>"))
+        assert os.listdir(temp_dir) == []
+
+    @pytest.mark.asyncio
+    async def test_rejects_oversized_upload_and_cleans_up(self, service, temp_dir, sample_image_bytes):
+        """Test that exceeding max_bytes aborts the write and removes the temp file."""
+        from app.services.local_service import UploadTooLargeError
+        with pytest.raises(UploadTooLargeError):
+            await service.save_cloth_stream(FakeUpload(sample_image_bytes), max_bytes=10)
+        assert os.listdir(temp_dir) == []
+
+
+def test_sniff_image_format_recognises_common_types():
+    """Test magic-number detection for supported formats."""
+    from app.services.local_service import sniff_image_format
+    assert sniff_image_format(b"\xff\xd8\xff\xe0" + b"\0" * 8) == "jpg"
+    assert sniff_image_format(b"\x89PNG\r\n\x1a\n" + b"\0" * 4) == "png"
+    assert sniff_image_format(b"RIFF\0\0\0\0WEBP") == "webp"
+    assert sniff_image_format(b"GIF89a" + b"\0" * 6) == "gif"
+    assert sniff_image_format(b"hello world!") is None
@@ -0,0 +1,91 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.services.metrics import Counter, Histogram, MetricsMiddleware, Registry, STAGE_SECONDS, timed
+
+
+class TestRegistry:
+    """Test suite for the Prometheus text exposition."""
+
+    def test_histogram_renders_cumulative_buckets(self):
+        """Test that buckets are cumulative and end with +Inf, sum and count."""
+        registry = Registry()
+        histogram = registry.register(Histogram("demo_seconds", "Demo", ["stage"], buckets=(0.1, 1.0)))
+        histogram.observe(0.05, stage="a")
+        histogram.observe(0.5, stage="a")
+        histogram.observe(5.0, stage="a")
+
+        text = registry.render()
+
+        assert "# TYPE demo_seconds histogram" in text
+        assert 'demo_seconds_bucket{stage="a",le="0.1"} 1' in text
+        assert 'demo_seconds_bucket{stage="a",le="1.0"} 2' in text
+        assert 'demo_seconds_bucket{stage="a",le="+Inf"} 3' in text
+        assert 'demo_seconds_count{stage="a"} 3' in text
+
+    def test_label_values_are_escaped(self):
+        """Test that quotes and newlines in label values cannot break the format."""
+        registry = Registry()
+        counter = registry.register(Counter("demo_total", "Demo", ["route"]))
+        counter.inc(route='a"b\nc')
+
+        assert 'demo_total{route="a\\"b\\nc"} 1.0' in registry.render()
+
+
+class TestTimed:
+    """Test suite for timed()."""
+
+    def test_context_manager_and_decorator_record_stage(self):
+        """Test that both usages add an observation to the stage histogram."""
+        before = STAGE_SECONDS.count(stage="unit_test_stage")
+
+        with timed("unit_test_stage"):
+            pass
+
+        @timed("unit_test_stage")
+        def work():
+            return 42
+
+        assert work() == 42
+        assert STAGE_SECONDS.count(stage="unit_test_stage") == before + 2
+
+    def test_failures_are_still_timed(self):
+        """Test that a raising stage is recorded and the exception propagates."""
+        before = STAGE_SECONDS.count(stage="unit_test_failure")
+
+        with pytest.raises(RuntimeError):
+            with timed("unit_test_failure"):
+                raise RuntimeError("boom")
+
+        assert STAGE_SECONDS.count(stage="unit_test_failure") == before + 1
+
+
+class TestMetricsMiddleware:
+    """Test suite for MetricsMiddleware."""
+
+    @pytest.fixture
+    def client(self):
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/work")
+        def work():
+            with timed("unit_test_span"):
+                pass
+            return {"ok": True}
+
+        return TestClient(app)
+
+    def test_trace_id_and_server_timing_headers(self, client):
+        """Test that responses carry a trace id and the spans measured during the request."""
+        response = client.get("/work")
+
+        assert len(response.headers["X-Trace-Id"]) == 32
+        assert response.headers["Server-Timing"].startswith("unit_test_span;dur=")
+
+    def test_incoming_trace_id_is_propagated(self, client):
+        """Test that a caller-supplied trace id is echoed back."""
+        response = client.get("/work", headers={"X-Trace-Id": "abc123"})
+
+        assert response.headers["X-Trace-Id"] == "abc123"
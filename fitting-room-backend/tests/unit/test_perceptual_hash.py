@@ -0,0 +1,88 @@
+import io
+import random
+
+from PIL import Image, ImageDraw
+
+from app.services.perceptual_hash import BKTree, color_distance, hamming, image_hashes
+
+
+def make_garment(path, seed: int, size=(400, 520), fmt="JPEG", quality=90):
+    """Draw a deterministic 'product photo' (shapes on a plain background) and save it."""
+    rng = random.Random(seed)
+    img = Image.new("RGB", (400, 520), (245, 245, 245))
+    draw = ImageDraw.Draw(img)
+    for _ in range(12):
+        x0, y0 = rng.randint(0, 300), rng.randint(0, 420)
+        box = (x0, y0, x0 + rng.randint(40, 160), y0 + rng.randint(40, 160))
+        colour = tuple(rng.randint(0, 255) for _ in range(3))
+        (draw.ellipse if rng.random() < 0.5 else draw.rectangle)(box, fill=colour)
+    if size != img.size:
+        img = img.resize(size, Image.LANCZOS)
+    img.save(path, fmt, **({"quality": quality} if fmt == "JPEG" else {}))
+    return path
+
+
+def make_colorway(path, fill, size=(400, 520)):
+    """Draw the same shirt silhouette in a given colour (colourways of one design)."""
+    img = Image.new("RGB", (400, 520), (255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    draw.polygon([(60, 80), (150, 40), (250, 40), (340, 80), (380, 180), (310, 200),
+                  (300, 480), (100, 480), (90, 200), (20, 180)], fill=fill)
+    draw.ellipse((170, 30, 230, 80), fill=(255, 255, 255))
+    if size != img.size:
+        img = img.resize(size, Image.LANCZOS)
+    img.save(path, "JPEG", quality=90)
+    return path
+
+
+class TestPerceptualHash:
+    """Test suite for pHash / dHash and the BK-tree index."""
+
+    def test_resized_and_recompressed_copies_stay_close(self, temp_dir):
+        """Test that a downscaled low-quality re-upload hashes near the original and other images do not."""
+        original = image_hashes(make_garment(f"{temp_dir}/a.jpg", seed=1))
+        copy = image_hashes(make_garment(f"{temp_dir}/a_small.webp", seed=1, size=(200, 260), fmt="WEBP"))
+        other = image_hashes(make_garment(f"{temp_dir}/b.jpg", seed=2))
+
+        assert hamming(original[0], copy[0]) <= 6
+        assert hamming(original[1], copy[1]) <= 10
+        assert hamming(original[0], other[0]) > 16
+        assert color_distance(original[2], copy[2]) < 10
+
+    def test_colorways_hash_alike_but_differ_in_color(self, temp_dir):
+        """Test that the grayscale hashes miss a colour change and the colour signature catches it."""
+        red = image_hashes(make_colorway(f"{temp_dir}/red.jpg", (200, 30, 30)))
+        navy = image_hashes(make_colorway(f"{temp_dir}/navy.jpg", (30, 40, 120)))
+        red_small = image_hashes(make_colorway(f"{temp_dir}/red_small.jpg", (200, 30, 30), size=(200, 260)))
+
+        assert hamming(red[0], navy[0]) <= 4
+        assert color_distance(red[2], navy[2]) > 60
+        assert color_distance(red[2], red_small[2]) < 10
+
+    def test_transparent_background_matches_white_background(self, temp_dir):
+        """Test that a cut-out PNG hashes like the same garment on white."""
+        img = Image.new("RGBA", (200, 260), (0, 0, 0, 0))
+        ImageDraw.Draw(img).ellipse((40, 40, 160, 220), fill=(200, 30, 30, 255))
+        img.save(f"{temp_dir}/cut.png")
+        flat = Image.new("RGB", (200, 260), (255, 255, 255))
+        ImageDraw.Draw(flat).ellipse((40, 40, 160, 220), fill=(200, 30, 30))
+        flat.save(f"{temp_dir}/flat.png")
+
+        assert image_hashes(f"{temp_dir}/cut.png") == image_hashes(f"{temp_dir}/flat.png")
+
+    def test_bk_tree_search_matches_brute_force(self):
+        """Test that BK-tree range queries return exactly the items a linear scan finds."""
+        rng = random.Random(7)
+        values = [rng.getrandbits(64) for _ in range(300)]
+        # 몇 개는 일부 비트만 바꾼 이웃
+        values += [v ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64)) for v in values[:50]]
+        tree = BKTree()
+        for i, value in enumerate(values):
+            tree.add(value, i)
+
+        assert len(tree) == len(values)
+        for query in values[:20] + [rng.getrandbits(64)]:
+            expected = sorted(i for i, v in enumerate(values) if hamming(v, query) <= 8)
+            found = tree.search(query, 8)
+            assert sorted(i for _, i in found) == expected
+            assert [d for d, _ in found] == sorted(d for d, _ in found)
@@ -0,0 +1,117 @@
+import io
+import os
+import pytest
+from unittest.mock import patch
+from PIL import Image
+
+from app.services.person_session import PersonSessionStore, SessionNotFoundError
+from app.services.preprocess_service import PersonPreprocessor
+
+
+def _jpeg_bytes(color="green"):
+    buffer = io.BytesIO()
+    Image.new("RGB", (300, 400), color=color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+class TestPersonSessionStore:
+    """Test suite for PersonSessionStore class."""
+
+    @pytest.fixture
+    def preprocessor(self):
+        return PersonPreprocessor(target_size=(96, 128))
+
+    def _store(self, temp_dir, preprocessor, **kwargs):
+        return PersonSessionStore(prepare=preprocessor.prepare, root=os.path.join(temp_dir, "sessions"), **kwargs)
+
+    def test_create_and_get_returns_prepared_image(self, temp_dir, preprocessor):
+        """Test that a session keeps the model-ready image and the original digest."""
+        store = self._store(temp_dir, preprocessor)
+
+        session = store.create(_jpeg_bytes())
+        fetched = store.get(session.id)
+
+        assert fetched.prepared.image.size == (96, 128)
+        assert fetched.prepared.data == session.prepared.data
+        assert fetched.digest == session.digest
+        assert store.stats()["hits"] == 1
+
+    def test_unknown_session_raises(self, temp_dir, preprocessor):
+        """Test that unknown ids raise SessionNotFoundError."""
+        store = self._store(temp_dir, preprocessor)
+
+        with pytest.raises(SessionNotFoundError):
+            store.get("missing")
+
+    def test_expired_session_is_removed(self, temp_dir, preprocessor):
+        """Test that sessions unused for longer than the TTL expire and their files are deleted."""
+        store = self._store(temp_dir, preprocessor, ttl=60)
+        session = store.create(_jpeg_bytes())
+
+        with patch("app.services.person_session.time.time", return_value=session.expires_at + 1):
+            with pytest.raises(SessionNotFoundError):
+                store.get(session.id)
+
+        assert os.listdir(os.path.join(temp_dir, "sessions")) == []
+        assert store.stats()["expired"] == 1
+
+    def test_session_is_shared_between_workers(self, temp_dir, preprocessor):
+        """Test that a session created by one worker's store is usable from another sharing the folder."""
+        worker_a = self._store(temp_dir, preprocessor, ttl=60)
+        worker_b = self._store(temp_dir, preprocessor, ttl=60)
+        session = worker_a.create(_jpeg_bytes())
+
+        fetched = worker_b.get(session.id)
+
+        assert fetched.digest == session.digest
+        assert fetched.prepared.data == session.prepared.data
+        with pytest.raises(SessionNotFoundError):
+            worker_b.get("../../etc/passwd")
+
+    def test_use_on_another_worker_keeps_session_alive(self, temp_dir, preprocessor):
+        """Test that a worker does not expire a session that another worker used recently."""
+        worker_a = self._store(temp_dir, preprocessor, ttl=60)
+        worker_b = self._store(temp_dir, preprocessor, ttl=60)
+        session = worker_a.create(_jpeg_bytes())
+        later = session.expires_at - 10
+
+        with patch("app.services.person_session.time.time", return_value=later):
+            worker_b.get(session.id)
+        with patch("app.services.person_session.time.time", return_value=later + 30):
+            assert worker_a.sweep() == 0
+            assert worker_a.get(session.id).digest == session.digest
+
+    def test_memory_bound_falls_back_to_disk(self, temp_dir, preprocessor):
+        """Test that sessions pushed out of memory are reloaded from disk."""
+        store = self._store(temp_dir, preprocessor, max_memory_bytes=1)
+        first = store.create(_jpeg_bytes("red"))
+        store.create(_jpeg_bytes("blue"))
+
+        fetched = store.get(first.id)
+
+        assert fetched.prepared.data == first.prepared.data
+        assert store.stats()["in_memory"] == 1
+        assert store.stats()["disk_loads"] == 1
+
+    def test_disk_bound_evicts_least_recently_used(self, temp_dir, preprocessor):
+        """Test that the oldest session is deleted when the disk budget is exceeded."""
+        store = self._store(temp_dir, preprocessor)
+        first = store.create(_jpeg_bytes("red"))
+        store.max_disk_bytes = store.disk_bytes
+        second = store.create(_jpeg_bytes("blue"))
+
+        with pytest.raises(SessionNotFoundError):
+            store.get(first.id)
+        assert store.get(second.id).id == second.id
+        assert store.stats()["evictions"] == 1
+
+    def test_sessions_survive_restart(self, temp_dir, preprocessor):
+        """Test that a new store instance restores sessions from disk."""
+        session = self._store(temp_dir, preprocessor).create(_jpeg_bytes())
+
+        restored = self._store(temp_dir, preprocessor).get(session.id)
+
+        assert restored.prepared.data == session.prepared.data
+        assert restored.digest == session.digest
+        # 동시 피팅이 같은 이미지를 공유하므로 지연 디코딩 상태로 돌려주지 않음
+        assert restored.prepared.image.im is not None
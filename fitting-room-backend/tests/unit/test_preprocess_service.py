@@ -0,0 +1,77 @@
+import io
+import pytest
+from PIL import Image
+
+from app.services.preprocess_service import PersonPreprocessor
+
+
+def _jpeg_bytes(size, orientation=None):
+    image = Image.new("RGB", size, color="green")
+    buffer = io.BytesIO()
+    if orientation is None:
+        image.save(buffer, format="JPEG")
+    else:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        image.save(buffer, format="JPEG", exif=exif)
+    return buffer.getvalue()
+
+
+class TestPersonPreprocessor:
+    """Test suite for PersonPreprocessor class."""
+
+    def test_output_matches_model_input_size(self):
+        """Test that large photos are resized and padded to the target size."""
+        preprocessor = PersonPreprocessor(target_size=(768, 1024))
+
+        prepared = preprocessor.prepare(_jpeg_bytes((3000, 2000)))
+
+        assert prepared.image.size == (768, 1024)
+        assert prepared.original_size == (3000, 2000)
+        with Image.open(io.BytesIO(prepared.data)) as decoded:
+            assert decoded.format == "JPEG"
+            assert decoded.size == (768, 1024)
+
+    def test_exif_orientation_is_applied(self):
+        """Test that a rotated EXIF photo is turned upright before fitting."""
+        preprocessor = PersonPreprocessor(target_size=(40, 80))
+        # 80x40 landscape stored with "rotate 90" orientation → upright portrait 40x80
+        prepared = preprocessor.prepare(_jpeg_bytes((80, 40), orientation=6))
+
+        # the upright image fills the target exactly, so the corners are not padding
+        assert prepared.image.getpixel((0, 0))[1] > 100
+        assert prepared.image.getpixel((39, 79))[1] > 100
+
+    def test_rgba_and_png_inputs_are_converted(self):
+        """Test that non-RGB inputs are normalised to RGB."""
+        buffer = io.BytesIO()
+        Image.new("RGBA", (10, 10)).save(buffer, format="PNG")
+
+        prepared = PersonPreprocessor(target_size=(8, 8)).prepare(buffer.getvalue())
+
+        assert prepared.image.mode == "RGB"
+
+    def test_stats_report_bytes_before_and_after(self):
+        """Test that stats track input and output sizes."""
+        preprocessor = PersonPreprocessor(target_size=(96, 128))
+        data = _jpeg_bytes((1200, 1600))
+
+        prepared = preprocessor.prepare(data)
+        stats = preprocessor.stats()
+
+        assert stats["count"] == 1
+        assert stats["bytes_in"] == len(data)
+        assert stats["bytes_out"] == len(prepared.data)
+        assert stats["bytes_out"] < stats["bytes_in"]
+
+    def test_png_transfer_format(self):
+        """Test that the transfer encoding is configurable."""
+        prepared = PersonPreprocessor(target_size=(8, 8), transfer_format="png").prepare(_jpeg_bytes((16, 16)))
+
+        assert prepared.ext == "png"
+        assert prepared.data.startswith(b"\x89PNG")
+
+    def test_unknown_transfer_format_rejected(self):
+        """Test that unsupported transfer formats fail at construction."""
+        with pytest.raises(ValueError):
+            PersonPreprocessor(transfer_format="bmp")
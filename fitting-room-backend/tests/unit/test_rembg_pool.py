@@ -0,0 +1,118 @@
+import threading
+import pytest
+from unittest.mock import Mock, patch
+from PIL import Image
+
+from app.services.rembg_pool import RembgSessionPool
+
+
+class TestRembgSessionPool:
+    """Test suite for RembgSessionPool class."""
+
+    @pytest.fixture
+    def factory(self):
+        """Session factory that hands out numbered fake sessions."""
+        counter = iter(range(100))
+        return Mock(side_effect=lambda model, providers, threads: f"session-{next(counter)}")
+
+    def test_start_creates_and_warms_every_session(self, factory):
+        """Test that start() builds the configured number of sessions and runs a warmup inference on each."""
+        remove_fn = Mock(side_effect=lambda image, session: image)
+        pool = RembgSessionPool(size=3, session_factory=factory, remove_fn=remove_fn)
+
+        with patch('app.services.rembg_pool.select_providers', return_value=["CPUExecutionProvider"]):
+            pool.start()
+
+        assert factory.call_count == 3
+        assert remove_fn.call_count == 3
+        assert pool.started is True
+        assert pool.stats()["idle_sessions"] == 3
+        assert pool.stats()["providers"] == ["CPUExecutionProvider"]
+
+    def test_remove_passes_pooled_session(self, factory):
+        """Test that remove() runs rembg with a session borrowed from the pool."""
+        remove_fn = Mock(side_effect=lambda image, session: image)
+        pool = RembgSessionPool(size=1, session_factory=factory, remove_fn=remove_fn)
+        with patch('app.services.rembg_pool.select_providers', return_value=["CPUExecutionProvider"]):
+            pool.start()
+
+        pool.remove(Image.new("RGB", (2, 2)))
+
+        assert remove_fn.call_args.kwargs["session"] == "session-0"
+        assert pool.stats()["idle_sessions"] == 1
+
+    def test_concurrent_calls_use_different_sessions(self, factory):
+        """Test that two concurrent calls do not share one session."""
+        in_use = []
+        both_running = threading.Barrier(2, timeout=5)
+
+        def remove_fn(image, session):
+            if pool.started:
+                in_use.append(session)
+                both_running.wait()
+            return image
+
+        pool = RembgSessionPool(size=2, session_factory=factory, remove_fn=remove_fn)
+        with patch('app.services.rembg_pool.select_providers', return_value=["CPUExecutionProvider"]):
+            pool.start()
+
+        threads = [threading.Thread(target=pool.remove, args=(Image.new("RGB", (2, 2)),)) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert sorted(in_use) == ["session-0", "session-1"]
+
+    def test_thread_count_goes_to_session_options_not_environment(self):
+        """Test that intra_op_threads is passed via SessionOptions and OMP_NUM_THREADS stays untouched."""
+        import os
+        import sys
+        import types
+        from app.services.rembg_pool import _new_session
+
+        class FakeSession:
+            @staticmethod
+            def name():
+                return "u2net"
+
+            def __init__(self, model_name, options, providers):
+                self.options, self.providers = options, providers
+
+        ort = types.SimpleNamespace(SessionOptions=lambda: types.SimpleNamespace(intra_op_num_threads=0))
+        rembg = types.SimpleNamespace(new_session=Mock())
+        modules = {"onnxruntime": ort, "rembg": rembg,
+                   "rembg.sessions": types.SimpleNamespace(sessions_class=[FakeSession])}
+        with patch.dict(sys.modules, modules), patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("OMP_NUM_THREADS", None)
+            session = _new_session("u2net", ["CPUExecutionProvider"], 3)
+            assert "OMP_NUM_THREADS" not in os.environ
+
+        assert session.options.intra_op_num_threads == 3
+        assert session.providers == ["CPUExecutionProvider"]
+        rembg.new_session.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_failed_start_is_retried_without_leftover_sessions(self, factory):
+        """Test that a startup retry after a partial failure ends with exactly `size` sessions."""
+        from app.services.startup import StartupRegistry
+        calls = []
+
+        def flaky_factory(model, providers, threads):
+            calls.append(1)
+            if len(calls) == 2:
+                raise ConnectionError("weights download failed")
+            return factory(model, providers, threads)
+
+        pool = RembgSessionPool(size=2, session_factory=flaky_factory, remove_fn=lambda image, session: image)
+        registry = StartupRegistry()
+        registry.add("rembg", pool.start, retry_interval=0.01)
+        with patch('app.services.rembg_pool.select_providers', return_value=["CPUExecutionProvider"]):
+            registry.start()
+            await registry.wait("rembg")
+        await registry.stop()
+
+        assert registry.report()["components"]["rembg"]["attempts"] == 2
+        assert pool.stats()["idle_sessions"] == 2
+        pool.start()  # 이미 준비됨 → 세션을 더 만들지 않음
+        assert pool.stats()["idle_sessions"] == 2
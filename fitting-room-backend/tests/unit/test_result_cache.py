@@ -0,0 +1,104 @@
+import os
+import pytest
+
+from app.services.result_cache import TryOnResultCache
+
+
+class TestTryOnResultCache:
+    """Test suite for TryOnResultCache class."""
+
+    @pytest.fixture
+    def cloth_path(self, temp_dir):
+        path = os.path.join(temp_dir, "shirt.png")
+        with open(path, "wb") as f:
+            f.write(b"cloth-bytes")
+        return path
+
+    def _write_result(self, temp_dir, name, size):
+        path = os.path.join(temp_dir, name)
+        with open(path, "wb") as f:
+            f.write(b"x" * size)
+        return path
+
+    def test_key_depends_on_every_input(self, temp_dir, cloth_path):
+        """Test that the cache key changes when any input changes."""
+        cache = TryOnResultCache(index_path=os.path.join(temp_dir, "index.json"))
+        base = cache.make_key(b"person", cloth_path, "shirt", 30, 30)
+
+        assert base == cache.make_key(b"person", cloth_path, "shirt", 30, 30)
+        assert base != cache.make_key(b"other", cloth_path, "shirt", 30, 30)
+        assert base != cache.make_key(b"person", cloth_path, "dress", 30, 30)
+        assert base != cache.make_key(b"person", cloth_path, "shirt", 20, 30)
+        assert base != cache.make_key(b"person", cloth_path, "shirt", 30, 1)
+        assert base != cache.make_key(b"person", cloth_path, "shirt", 30, 30, backend="stub:768x1024")
+        assert cache.make_key(b"person", cloth_path, "shirt", 30, 30, backend="stub:768x1024") != \
+            cache.make_key(b"person", cloth_path, "shirt", 30, 30, backend="gradio:yisol/IDM-VTON:/tryon")
+
+    def test_lookup_hit_and_miss_counters(self, temp_dir):
+        """Test that lookups count hits and misses."""
+        cache = TryOnResultCache(index_path=os.path.join(temp_dir, "index.json"))
+        result = self._write_result(temp_dir, "r1.png", 10)
+
+        assert cache.lookup("k1") is None
+        cache.put("k1", "/static/results/r1.png", result)
+        assert cache.lookup("k1") == "/static/results/r1.png"
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["bytes"] == 10
+
+    def test_evicts_least_recently_used_when_over_bytes(self, temp_dir):
+        """Test that the LRU entry and its file are removed when the byte bound is exceeded."""
+        cache = TryOnResultCache(index_path=os.path.join(temp_dir, "index.json"), max_bytes=25)
+        r1 = self._write_result(temp_dir, "r1.png", 10)
+        r2 = self._write_result(temp_dir, "r2.png", 10)
+        r3 = self._write_result(temp_dir, "r3.png", 10)
+
+        cache.put("k1", "/static/results/r1.png", r1)
+        cache.put("k2", "/static/results/r2.png", r2)
+        cache.lookup("k1")  # k2 is now least recently used
+        cache.put("k3", "/static/results/r3.png", r3)
+
+        assert cache.lookup("k2") is None
+        assert not os.path.exists(r2)
+        assert cache.lookup("k1") is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_lookup_drops_entries_whose_file_is_gone(self, temp_dir):
+        """Test that a deleted result file turns into a miss."""
+        cache = TryOnResultCache(index_path=os.path.join(temp_dir, "index.json"))
+        result = self._write_result(temp_dir, "r1.png", 10)
+        cache.put("k1", "/static/results/r1.png", result)
+        os.remove(result)
+
+        assert cache.lookup("k1") is None
+        assert cache.stats()["entries"] == 0
+
+    def test_index_persists_across_instances(self, temp_dir):
+        """Test that the on-disk index is reloaded on startup."""
+        index_path = os.path.join(temp_dir, "index.json")
+        result = self._write_result(temp_dir, "r1.png", 10)
+        TryOnResultCache(index_path=index_path).put("k1", "/static/results/r1.png", result)
+
+        reloaded = TryOnResultCache(index_path=index_path)
+
+        assert reloaded.lookup("k1") == "/static/results/r1.png"
+
+    def test_index_is_shared_between_instances(self, temp_dir):
+        """Test that two caches on the same index (two workers) see each other's entries."""
+        index_path = os.path.join(temp_dir, "index.sqlite3")
+        worker_a = TryOnResultCache(index_path=index_path, max_entries=2)
+        worker_b = TryOnResultCache(index_path=index_path, max_entries=2)
+        r1 = self._write_result(temp_dir, "r1.png", 10)
+        r2 = self._write_result(temp_dir, "r2.png", 10)
+        r3 = self._write_result(temp_dir, "r3.png", 10)
+
+        worker_a.put("k1", "/static/results/r1.png", r1)
+        worker_b.put("k2", "/static/results/r2.png", r2)
+        assert worker_b.lookup("k1") == "/static/results/r1.png"  # k2 is now least recently used
+        worker_a.put("k3", "/static/results/r3.png", r3)
+
+        assert worker_b.lookup("k2") is None
+        assert not os.path.exists(r2)
+        assert worker_b.stats()["entries"] == 2
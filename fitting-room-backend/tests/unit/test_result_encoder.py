@@ -0,0 +1,73 @@
+import io
+import pytest
+from PIL import Image
+
+from app.services.result_encoder import ResultEncoder
+
+
+class TestResultEncoder:
+    """Test suite for ResultEncoder class."""
+
+    @pytest.fixture
+    def encoder(self):
+        encoder = ResultEncoder(default_format="webp", formats=("webp", "jpeg", "png"))
+        yield encoder
+        encoder.shutdown()
+
+    @pytest.mark.parametrize("accept, requested, expected", [
+        (None, None, "webp"),
+        ("application/json", None, "webp"),
+        ("*/*", None, "webp"),
+        ("image/png", None, "png"),
+        ("image/jpeg;q=0.8, image/png;q=0.5", None, "jpeg"),
+        ("image/png, image/webp", None, "webp"),
+        ("image/webp;q=0, */*", None, "jpeg"),
+        ("image/png", "jpeg", "jpeg"),
+        (None, "image/png", "png"),
+        (None, "bogus", "webp"),
+    ])
+    def test_negotiate(self, encoder, accept, requested, expected):
+        """Test format selection from the form value, the Accept header and the default."""
+        assert encoder.negotiate(accept, requested) == expected
+
+    def test_default_stays_png_for_clients_without_preferences(self):
+        """Test that clients sending no Accept or format keep getting PNG results by default."""
+        from app import config
+        encoder = ResultEncoder(default_format=config.RESULT_FORMAT)
+        try:
+            assert encoder.negotiate(None, None) == "png"
+            assert encoder.negotiate("*/*", None) == "png"
+            assert encoder.negotiate("image/webp, */*", None) == "webp"
+        finally:
+            encoder.shutdown()
+
+    @pytest.mark.parametrize("fmt, pil_format, ext", [
+        ("webp", "WEBP", "webp"),
+        ("jpeg", "JPEG", "jpg"),
+        ("png", "PNG", "png"),
+    ])
+    def test_encode_formats(self, encoder, fmt, pil_format, ext):
+        """Test that each format round-trips and reports the right extension."""
+        encoded = encoder.encode(Image.new("RGBA", (32, 32), (10, 20, 30, 255)), fmt)
+
+        assert encoded.ext == ext
+        with Image.open(io.BytesIO(encoded.data)) as image:
+            assert image.format == pil_format
+            assert image.size == (32, 32)
+
+    def test_photographic_output_is_smaller_than_png(self, encoder):
+        """Test that WebP results are much smaller than PNG for photo-like content."""
+        import numpy as np
+        rng = np.random.default_rng(0)
+        base = np.linspace(0, 255, 256 * 256 * 3).reshape(256, 256, 3)
+        noisy = np.clip(base + rng.normal(0, 8, base.shape), 0, 255).astype(np.uint8)
+        image = Image.fromarray(noisy, "RGB")
+
+        assert len(encoder.encode(image, "webp").data) < len(encoder.encode(image, "png").data) / 2
+
+    @pytest.mark.asyncio
+    async def test_encode_async_runs_in_pool(self, encoder):
+        """Test that the async helper returns the encoded image."""
+        encoded = await encoder.encode_async(Image.new("RGB", (8, 8)), "jpeg")
+
+        assert encoded.media_type == "image/jpeg"
@@ -0,0 +1,123 @@
+import os
+import pytest
+from unittest.mock import Mock, patch
+
+from app.services.result_storage import ResultStorage, result_key
+
+
+class TestResultStorage:
+    """Test suite for ResultStorage class."""
+
+    def _store(self, storage, size):
+        file_path, web_path = storage.allocate("png")
+        with open(file_path, "wb") as f:
+            f.write(b"x" * size)
+        storage.register(file_path, web_path)
+        return file_path, web_path
+
+    def test_allocate_shards_by_name_prefix(self, temp_dir):
+        """Test that result files land in a sub-directory named after their prefix."""
+        storage = ResultStorage(root=os.path.join(temp_dir, "results"), shard_depth=2)
+
+        file_path, web_path = storage.allocate("png")
+
+        name = os.path.basename(file_path)
+        assert web_path == f"/static/results/{name[:2]}/{name[2:4]}/{name}"
+        assert os.path.isdir(os.path.dirname(file_path))
+
+    def test_result_key_matches_derivatives(self):
+        """Test that a result and its derived thumbnails share the same key."""
+        assert result_key("/static/results/ab/abcd.png") == "abcd"
+        assert result_key("derived/results/ab/abcd_256.webp") == "abcd"
+
+    def test_quota_evicts_least_recently_used(self, temp_dir):
+        """Test that going over the byte quota deletes the least recently accessed result."""
+        on_evict = Mock()
+        storage = ResultStorage(root=os.path.join(temp_dir, "results"), max_bytes=250, on_evict=on_evict)
+        first, first_url = self._store(storage, 100)
+        second, _ = self._store(storage, 100)
+        storage.touch(first_url)
+
+        self._store(storage, 100)
+
+        assert os.path.exists(first)
+        assert not os.path.exists(second)
+        assert storage.stats()["bytes"] == 200
+        assert storage.stats()["evicted"] == 1
+        on_evict.assert_called_once()
+
+    def test_sweep_removes_expired_results(self, temp_dir):
+        """Test that results not accessed within the TTL are deleted by the sweeper."""
+        storage = ResultStorage(root=os.path.join(temp_dir, "results"), ttl=60)
+        old, _ = self._store(storage, 10)
+
+        with patch("app.services.result_storage.time.time", return_value=10 ** 12):
+            result = storage.sweep()
+
+        assert result == {"expired": 1, "evicted": 0}
+        assert not os.path.exists(old)
+
+    def test_scan_rebuilds_index_from_disk(self, temp_dir):
+        """Test that a restarted storage picks up existing sharded and legacy files."""
+        root = os.path.join(temp_dir, "results")
+        self._store(ResultStorage(root=root), 10)
+        with open(os.path.join(root, "legacy.png"), "wb") as f:
+            f.write(b"y" * 5)
+
+        storage = ResultStorage(root=root)
+        storage.scan()
+
+        assert storage.stats()["files"] == 2
+        assert storage.stats()["bytes"] == 15
+
+    def test_shared_touch_adopts_results_from_other_workers(self, temp_dir):
+        """Test that a shared storage records access to a result another worker saved."""
+        root = os.path.join(temp_dir, "results")
+        file_path, web_path = self._store(ResultStorage(root=root, shared=True), 10)
+        os.utime(file_path, (1000, 1000))
+        storage = ResultStorage(root=root, shared=True)
+
+        storage.touch(web_path.replace(".png", "_256.webp").replace("/static/", "/static/derived/"))
+
+        assert storage.stats()["files"] == 1
+        assert storage.stats()["bytes"] == 10
+        assert os.stat(file_path).st_atime > 1000  # 대표 워커의 재스캔이 볼 수 있도록 atime 기록
+        storage.touch("/static/results/../../etc/passwd")
+        assert storage.stats()["files"] == 1
+
+    def test_rescan_keeps_touches_not_yet_persisted(self, temp_dir):
+        """Test that a shared rescan does not forget accesses still waiting for persist_interval."""
+        storage = ResultStorage(root=os.path.join(temp_dir, "results"), shared=True, persist_interval=3600)
+        file_path, web_path = self._store(storage, 10)
+        os.utime(file_path, (1000, 1000))
+        storage._entries[result_key(web_path)][3:] = [1000, 1000]
+
+        storage.touch(web_path)  # persist_interval 안이라 atime 은 아직 안 씀
+        storage.scan(verbose=False)
+
+        assert storage._entries[result_key(web_path)][3] > 1000
+        assert os.stat(file_path).st_mtime == 1000
+
+    def test_delete_drops_index_entry(self, temp_dir):
+        """Test that delete() removes the file and frees its bytes."""
+        storage = ResultStorage(root=os.path.join(temp_dir, "results"))
+        file_path, _ = self._store(storage, 10)
+
+        other, _ = self._store(storage, 5)
+
+        storage.delete(file_path)
+
+        assert not os.path.exists(file_path)
+        assert storage.stats()["bytes"] == 5
+        storage.delete(os.path.join(temp_dir, "unknown.png"))  # 인덱스에 없는 파일은 무시
+        assert os.path.exists(other)
+        assert storage.stats()["files"] == 1
+
+    @pytest.mark.asyncio
+    async def test_start_and_stop_background_sweeper(self, temp_dir):
+        """Test that start() scans and sweeps once, and stop() cancels the sweeper task."""
+        storage = ResultStorage(root=os.path.join(temp_dir, "results"), sweep_interval=3600)
+
+        await storage.start()
+        assert storage.stats()["last_sweep"] is not None
+        await storage.stop()
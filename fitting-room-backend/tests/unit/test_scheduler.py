@@ -0,0 +1,124 @@
+import threading
+import time
+import pytest
+
+from app.services.scheduler import FairScheduler, RateLimitedError, WaitCancelledError, INTERACTIVE, BULK
+
+
+def _queue_behind_busy_slot(scheduler, requests):
+    """Occupy the only slot, queue (client, lane) requests in order, then release; return the service order."""
+    order = []
+    release = threading.Event()
+
+    def hold():
+        with scheduler.slot("holder"):
+            release.wait()
+
+    def run(client, lane):
+        with scheduler.slot(client, lane):
+            order.append(client)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    while scheduler.busy == 0:
+        time.sleep(0.001)
+    threads = []
+    for client, lane in requests:
+        thread = threading.Thread(target=run, args=(client, lane))
+        thread.start()
+        threads.append(thread)
+        # 대기열에 들어간 순서를 고정
+        while sum(scheduler.waiting.values()) < len(threads):
+            time.sleep(0.001)
+    release.set()
+    for thread in [holder, *threads]:
+        thread.join(timeout=5)
+    return order
+
+
+class TestFairScheduler:
+    """Test suite for per-client rate limiting and weighted fair queueing."""
+
+    def test_token_bucket_limits_each_client_separately(self):
+        """Test that a client is rejected after its burst while others are unaffected, then refills."""
+        now = [0.0]
+        scheduler = FairScheduler(rate=1.0, burst=2, clock=lambda: now[0])
+
+        scheduler.admit("a")
+        scheduler.admit("a")
+        with pytest.raises(RateLimitedError) as exc:
+            scheduler.admit("a")
+        assert exc.value.retry_after == pytest.approx(1.0)
+        scheduler.admit("b")
+
+        now[0] = 1.0
+        scheduler.admit("a")
+        assert scheduler.stats()["rate_limited"] == {INTERACTIVE: 1, BULK: 0}
+
+    def test_batch_cost_is_capped_at_burst(self):
+        """Test that a batch larger than the burst can still be admitted from a full bucket."""
+        scheduler = FairScheduler(rate=1.0, burst=3, clock=lambda: 0.0)
+
+        scheduler.admit("a", cost=10, lane=BULK)
+        with pytest.raises(RateLimitedError):
+            scheduler.admit("a", lane=BULK)
+
+    def test_zero_rate_disables_rate_limit(self):
+        """Test that rate <= 0 admits everything."""
+        scheduler = FairScheduler(rate=0, burst=1)
+        for _ in range(100):
+            scheduler.admit("a")
+
+    def test_clients_are_served_round_robin(self):
+        """Test that a client with many queued requests does not starve a client that arrives later."""
+        scheduler = FairScheduler(slots=1, rate=0)
+
+        order = _queue_behind_busy_slot(scheduler, [("hog", INTERACTIVE)] * 3 + [("other", INTERACTIVE)])
+
+        assert order.index("other") == 1
+
+    def test_weights_give_larger_share(self):
+        """Test that a client with weight 2 gets two slots for each slot of a weight-1 client."""
+        scheduler = FairScheduler(slots=1, rate=0, weights={"gold": 2.0})
+
+        order = _queue_behind_busy_slot(scheduler, [("plain", INTERACTIVE)] * 2 + [("gold", INTERACTIVE)] * 4)
+
+        assert order[:3].count("gold") == 2
+
+    def test_interactive_lane_goes_first_without_starving_bulk(self):
+        """Test that interactive requests jump ahead of bulk ones but bulk still gets every Nth slot."""
+        scheduler = FairScheduler(slots=1, rate=0, bulk_every=3)
+
+        requests = [(f"bulk{i}", BULK) for i in range(2)] + [(f"ui{i}", INTERACTIVE) for i in range(4)]
+        order = _queue_behind_busy_slot(scheduler, requests)
+
+        assert order == ["ui0", "ui1", "bulk0", "ui2", "ui3", "bulk1"]
+        assert scheduler.stats()["dispatched"] == {INTERACTIVE: 5, BULK: 2}
+
+    def test_cancelled_waiter_leaves_queue(self):
+        """Test that a cancelled waiter raises and does not take the freed slot."""
+        scheduler = FairScheduler(slots=1, rate=0)
+        cancel = threading.Event()
+        errors = []
+
+        def wait():
+            try:
+                with scheduler.slot("a", cancel=cancel):
+                    pass
+            except WaitCancelledError as e:
+                errors.append(e)
+
+        with scheduler.slot("holder"):
+            thread = threading.Thread(target=wait)
+            thread.start()
+            while scheduler.waiting[INTERACTIVE] == 0:
+                time.sleep(0.001)
+            cancel.set()
+            thread.join(timeout=5)
+
+        assert len(errors) == 1
+        stats = scheduler.stats()
+        assert stats["busy"] == 0
+        assert stats["waiting"] == {INTERACTIVE: 0, BULK: 0}
+        with scheduler.slot("b"):
+            assert scheduler.busy == 1
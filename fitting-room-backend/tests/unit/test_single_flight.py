@@ -0,0 +1,74 @@
+import asyncio
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """Test suite for in-flight request coalescing."""
+
+    @pytest.mark.asyncio
+    async def test_identical_calls_share_one_execution(self):
+        """Test that concurrent callers with the same key get one result from one run."""
+        flights = SingleFlight()
+        runs = []
+
+        async def work():
+            runs.append(1)
+            await asyncio.sleep(0.05)
+            return "/static/results/r.webp"
+
+        results = await asyncio.gather(*(flights.do("k", work) for _ in range(3)))
+
+        assert results == ["/static/results/r.webp"] * 3
+        assert len(runs) == 1
+        assert flights.stats() == {"in_flight": 0, "waiters": 0, "started": 1, "coalesced": 2, "cancelled": 0}
+
+    @pytest.mark.asyncio
+    async def test_errors_are_shared_and_forgotten(self):
+        """Test that every waiter sees the failure and the next call starts fresh."""
+        flights = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("gpu down")
+
+        results = await asyncio.gather(flights.do("k", fail), flights.do("k", fail), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+        async def ok():
+            return "fine"
+
+        assert await flights.do("k", ok) == "fine"
+        assert flights.stats()["started"] == 2
+
+    @pytest.mark.asyncio
+    async def test_work_survives_until_last_waiter_leaves(self):
+        """Test that cancelling one waiter keeps the shared work alive for the others."""
+        flights = SingleFlight()
+        cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                await asyncio.sleep(0.1)
+                return "done"
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        first = asyncio.ensure_future(flights.do("k", work))
+        second = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        assert await second == "done"
+        assert not cancelled.is_set()
+
+        third = asyncio.ensure_future(flights.do("k2", work))
+        await asyncio.sleep(0.01)
+        third.cancel()
+        await asyncio.sleep(0.01)
+
+        assert cancelled.is_set()
+        assert flights.stats()["cancelled"] == 1
+        assert flights.stats()["in_flight"] == 0
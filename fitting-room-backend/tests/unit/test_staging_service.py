@@ -0,0 +1,108 @@
+import os
+import threading
+import pytest
+from PIL import Image
+
+from app.services.staging_service import InputStager
+
+
+class TestInputStager:
+    """Test suite for InputStager class."""
+
+    @pytest.fixture
+    def stager(self, temp_dir):
+        return InputStager(root=os.path.join(temp_dir, "staging"))
+
+    def test_files_are_removed_when_handle_closes(self, stager):
+        """Test that staged files only live for the duration of the context manager."""
+        with stager.open() as staged:
+            person = staged.add_bytes(b"person-jpeg", "jpg")
+            cloth = staged.add_image(Image.new("RGBA", (4, 4), "red"))
+            assert os.path.exists(person)
+            assert os.path.exists(cloth)
+
+        assert not os.path.exists(person)
+        assert not os.path.exists(cloth)
+        assert os.listdir(stager.root) == [".owner"]
+
+    def test_files_are_removed_on_error(self, stager):
+        """Test that cleanup also happens when the block raises."""
+        with pytest.raises(RuntimeError):
+            with stager.open() as staged:
+                path = staged.add_bytes(b"data", "jpg")
+                raise RuntimeError("remote failed")
+
+        assert not os.path.exists(path)
+
+    def test_same_content_is_shared_until_last_release(self, stager):
+        """Test that identical inputs reuse one file and survive until the last holder releases."""
+        with stager.open() as first:
+            a = first.add_bytes(b"same", "jpg")
+            with stager.open() as second:
+                b = second.add_bytes(b"same", "jpg")
+                assert a == b
+            assert os.path.exists(a)
+        assert not os.path.exists(a)
+
+        stats = stager.stats()
+        assert stats["written"] == 1
+        assert stats["reused"] == 1
+
+    def test_different_content_gets_different_paths(self, stager):
+        """Test that concurrent requests with different inputs never share a path."""
+        paths = []
+        barrier = threading.Barrier(8)
+
+        def stage(i):
+            with stager.open() as staged:
+                paths.append(staged.add_image(Image.new("RGB", (2, 2), (i, 0, 0))))
+                barrier.wait(timeout=5)
+
+        threads = [threading.Thread(target=stage, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(set(paths)) == 8
+
+    def test_purge_removes_leftovers(self, stager):
+        """Test that purge() deletes files left from a previous run."""
+        leftover = os.path.join(stager.root, "person_1700000000.png")
+        with open(leftover, "wb") as f:
+            f.write(b"old")
+
+        stager.purge()
+
+        assert not os.path.exists(leftover)
+
+    def test_workers_sharing_a_root_do_not_delete_each_others_files(self, temp_dir):
+        """Test that two stagers on one root keep separate files and purge only dead owners' directories."""
+        root = os.path.join(temp_dir, "staging")
+        first, second = InputStager(root=root), InputStager(root=root)
+        dead = InputStager(root=root)
+        leftover = dead._acquire("crashed.jpg", lambda: b"crashed")
+        dead._owner.close()  # 반납 전에 프로세스 종료 → 잠금은 풀리고 폴더는 남음
+
+        with first.open() as a:
+            path_a = a.add_bytes(b"same", "jpg")
+            with second.open() as b:
+                path_b = b.add_bytes(b"same", "jpg")
+            second.purge()  # 다른 워커가 재시작해도 진행 중인 입력은 그대로
+
+            assert path_a != path_b
+            assert not os.path.exists(path_b)
+            assert os.path.exists(path_a)
+        assert not os.path.exists(leftover)
+        assert sorted(os.listdir(root)) == sorted([os.path.basename(first.root), os.path.basename(second.root)])
+
+        first.close()
+        second.close()
+        assert os.listdir(root) == []
+
+    def test_tmpfs_backing_uses_memory_directory(self):
+        """Test that the tmpfs backing stages under /dev/shm (or the temp dir as a fallback)."""
+        stager = InputStager(backing="tmpfs")
+        assert stager.base.endswith("fitting-room-staging")
+        assert os.path.dirname(stager.root) == stager.base
+        stager.close()
@@ -0,0 +1,75 @@
+import asyncio
+import time
+import pytest
+
+from app.services.startup import StartupRegistry, FAILED, PENDING, READY
+
+
+class TestStartupRegistry:
+    """Test suite for background component initialization."""
+
+    @pytest.mark.asyncio
+    async def test_components_start_concurrently_in_background(self):
+        """Test that start() returns immediately and blocking inits overlap."""
+        registry = StartupRegistry()
+        registry.add("a", lambda: time.sleep(0.2))
+        registry.add("b", lambda: time.sleep(0.2))
+
+        t0 = time.perf_counter()
+        registry.start()
+        assert time.perf_counter() - t0 < 0.1
+        assert not registry.is_ready()
+
+        await registry.wait()
+        assert time.perf_counter() - t0 < 0.35
+        report = registry.report()
+        assert report["ready"] is True
+        assert report["startup_seconds"] is not None
+        assert report["components"]["a"]["state"] == READY
+        assert report["components"]["a"]["seconds"] >= 0.2
+        await registry.stop()
+
+    @pytest.mark.asyncio
+    async def test_dependencies_run_in_order(self):
+        """Test that a component waits for the ones it depends on."""
+        order = []
+        registry = StartupRegistry()
+
+        async def engine():
+            await asyncio.sleep(0.05)
+            order.append("engine")
+
+        registry.add("warmup", lambda: order.append("warmup"), depends_on=("engine",))
+        registry.add("engine", engine)
+        registry.start()
+        await registry.wait()
+
+        assert order == ["engine", "warmup"]
+        await registry.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_component_is_retried(self):
+        """Test that failures are reported and retried after retry_interval."""
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 2:
+                raise ConnectionError("space is sleeping")
+
+        registry = StartupRegistry()
+        registry.add("inference", flaky, retry_interval=0.05)
+        registry.add("warmup", lambda: None, depends_on=("inference",))
+        registry.start()
+        await asyncio.sleep(0.01)
+
+        report = registry.report()
+        assert report["components"]["inference"]["state"] == FAILED
+        assert "space is sleeping" in report["components"]["inference"]["error"]
+        assert report["components"]["warmup"]["state"] == PENDING
+        assert registry.is_ready("catalog")  # unknown names are ignored
+
+        await registry.wait()
+        assert registry.report()["components"]["inference"]["attempts"] == 2
+        assert registry.is_ready()
+        await registry.stop()
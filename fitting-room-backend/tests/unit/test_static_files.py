@@ -0,0 +1,117 @@
+import gzip
+import os
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.services.static_files import TrackedStaticFiles
+
+
+def _write(root, relative, data):
+    path = os.path.join(root, *relative.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+class TestTrackedStaticFiles:
+    """Test suite for the caching /static mount."""
+
+    @pytest.fixture
+    def accessed(self):
+        return []
+
+    @pytest.fixture
+    def client(self, temp_dir, accessed):
+        app = FastAPI()
+        app.mount("/static", TrackedStaticFiles(directory=temp_dir, on_access=accessed.append), name="static")
+        return TestClient(app)
+
+    def test_immutable_paths_get_long_lived_cache_headers(self, client, temp_dir, accessed):
+        """Test that write-once paths are served as immutable with a strong ETag."""
+        _write(temp_dir, "results/ab/abcd.png", b"x" * 100)
+
+        response = client.get("/static/results/ab/abcd.png")
+
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+        assert response.headers["etag"].startswith('"')
+        assert accessed == ["results/ab/abcd.png"]
+
+    def test_other_paths_revalidate_with_content_hash_etag(self, client, temp_dir):
+        """Test that mutable paths use no-cache and an ETag that follows the content."""
+        path = _write(temp_dir, "app.txt", b"one")
+        first = client.get("/static/app.txt")
+        assert first.headers["cache-control"] == "no-cache"
+
+        _write(temp_dir, "app.txt", b"two!")
+        os.utime(path, (1, 1))
+        second = client.get("/static/app.txt")
+
+        assert second.text == "two!"
+        assert second.headers["etag"] != first.headers["etag"]
+
+    def test_if_none_match_returns_304(self, client, temp_dir, accessed):
+        """Test conditional GETs are answered without a body."""
+        _write(temp_dir, "clothes/abc.jpg", b"jpeg-bytes")
+        etag = client.get("/static/clothes/abc.jpg").headers["etag"]
+
+        response = client.get("/static/clothes/abc.jpg", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        assert len(accessed) == 2
+
+    def test_range_and_if_range(self, client, temp_dir):
+        """Test that byte ranges work and If-Range accepts the strong ETag."""
+        _write(temp_dir, "clothes/abc.jpg", b"0123456789")
+        etag = client.get("/static/clothes/abc.jpg").headers["etag"]
+
+        partial = client.get("/static/clothes/abc.jpg", headers={"Range": "bytes=2-5", "If-Range": etag})
+        stale = client.get("/static/clothes/abc.jpg", headers={"Range": "bytes=2-5", "If-Range": '"other"'})
+
+        assert partial.status_code == 206
+        assert partial.content == b"2345"
+        assert stale.status_code == 200
+        assert stale.content == b"0123456789"
+
+    def test_prefers_smaller_image_variant_when_accepted(self, client, temp_dir):
+        """Test that a pre-encoded full-size WebP is served for clients that accept it."""
+        _write(temp_dir, "clothes/abc.jpg", b"j" * 1000)
+        _write(temp_dir, "derived/clothes/abc_full.webp", b"w" * 400)
+
+        webp = client.get("/static/clothes/abc.jpg", headers={"Accept": "image/webp,*/*"})
+        plain = client.get("/static/clothes/abc.jpg", headers={"Accept": "*/*"})
+
+        assert webp.headers["content-type"] == "image/webp"
+        assert webp.content == b"w" * 400
+        assert plain.headers["content-type"] == "image/jpeg"
+        assert plain.content == b"j" * 1000
+        assert webp.headers["vary"] == plain.headers["vary"] == "Accept"
+        assert webp.headers["etag"] != plain.headers["etag"]
+
+    def test_larger_variant_is_ignored(self, client, temp_dir):
+        """Test that a variant is only used when it is actually smaller."""
+        _write(temp_dir, "clothes/abc.jpg", b"j" * 100)
+        _write(temp_dir, "derived/clothes/abc_full.webp", b"w" * 400)
+
+        response = client.get("/static/clothes/abc.jpg", headers={"Accept": "image/webp"})
+
+        assert response.headers["content-type"] == "image/jpeg"
+
+    def test_precompressed_text_variant(self, client, temp_dir):
+        """Test that .gz siblings are served with Content-Encoding when accepted."""
+        _write(temp_dir, "app.css", b"body{}" * 50)
+        _write(temp_dir, "app.css.gz", gzip.compress(b"body{}" * 50))
+
+        response = client.get("/static/app.css", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.text == "body{}" * 50
+
+    def test_missing_file_is_404(self, client):
+        """Test that unknown paths fall back to the default 404."""
+        assert client.get("/static/results/missing.png").status_code == 404
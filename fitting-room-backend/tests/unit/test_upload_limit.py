@@ -0,0 +1,53 @@
+import pytest
+from unittest.mock import AsyncMock
+
+from app.services.upload_limit import UploadLimitMiddleware
+
+
+def _scope(method="POST", path="/upload", content_length=None):
+    headers = [(b"content-type", b"multipart/form-data; boundary=x")]
+    if content_length is not None:
+        headers.append((b"content-length", str(content_length).encode()))
+    return {"type": "http", "method": method, "path": path, "headers": headers}
+
+
+class TestUploadLimitMiddleware:
+    """Test suite for UploadLimitMiddleware."""
+
+    @pytest.fixture
+    def inner(self):
+        return AsyncMock()
+
+    @pytest.fixture
+    def middleware(self, inner):
+        return UploadLimitMiddleware(inner, limits={("POST", "/upload"): 100})
+
+    @pytest.mark.asyncio
+    async def test_rejects_oversized_body_without_reading_it(self, middleware, inner):
+        """Test that a Content-Length over the limit gets a 413 before the app or receive() runs."""
+        receive, send = AsyncMock(), AsyncMock()
+
+        await middleware(_scope(content_length=101), receive, send)
+
+        inner.assert_not_called()
+        receive.assert_not_called()
+        start = send.call_args_list[0].args[0]
+        assert start["status"] == 413
+        assert (b"connection", b"close") in start["headers"]
+        assert send.call_args_list[1].args[0]["body"] == b'{"detail": "File too large"}'
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("scope", [
+        _scope(content_length=100),
+        _scope(),                                       # chunked → 저장 단계의 스트리밍 한도가 처리
+        _scope(method="GET", content_length=10 ** 9),
+        _scope(path="/other", content_length=10 ** 9),
+    ])
+    async def test_passes_other_requests_through(self, middleware, inner, scope):
+        """Test that requests within the limit, without Content-Length or on other routes reach the app."""
+        receive, send = AsyncMock(), AsyncMock()
+
+        await middleware(scope, receive, send)
+
+        inner.assert_awaited_once_with(scope, receive, send)
+        send.assert_not_called()